@@ -0,0 +1,225 @@
+"""
+Rasterizer benchmark suite. Every workload is drawn offscreen on a headless Sketch at anti-aliasing levels 1, 2, 4 and
+8, and the results are printed as JSON, so runs on different machines or rasterizer backends can be compared.
+
+Workloads are the Sketch test cases and some synthetic scenes:
+
+* tinyTriangles: many triangles of a few pixels, dominated by per primitive overhead
+* hugeTriangles: a few triangles covering the whole canvas, dominated by per pixel work
+* diagonalLines: long lines across the canvas
+
+For every workload and level the report has primitives/sec, pixels/sec (canvas pixels covered by the drawing) and the
+peak memory allocated while drawing, measured by tracemalloc in an untimed first run on a fresh canvas.
+
+Example::
+
+    python Benchmark.py -o bench.json
+    python Benchmark.py --workloads tinyTriangles diagonalLines --aa 1 4 --backends numpy loop --scale 0.1
+    python Benchmark.py --workloads hugeTriangles --size 2000 2000 --processes 1 2 4
+
+:author: Mutiraj Laksanawisit
+"""
+
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import tracemalloc
+
+import numpy as np
+
+from HeadlessRender import createSketch, testCaseNames
+from Point import Point
+from ColorType import ColorType
+
+BACKENDS = ("numpy", "edge", "loop")
+AA_LEVELS = (1, 2, 4, 8)
+
+
+class PrimitiveCounter:
+    """
+    Count lines and triangles drawn by a Sketch, by wrapping its drawing methods on the instance
+    """
+    count = 0
+    inBatch = False
+
+    def __init__(self, sketch):
+        self.count = 0
+        self.inBatch = False
+        drawLine, drawLinePairs, drawTriangle = sketch.drawLine, sketch.drawLinePairs, sketch.drawTriangle
+
+        def countedLine(*args, **kwargs):
+            if not self.inBatch:
+                self.count += 1
+            return drawLine(*args, **kwargs)
+
+        def countedLinePairs(buff, lines, *args, **kwargs):
+            # with the per pixel loops, drawLinePairs calls drawLine for every line
+            self.count += len(lines)
+            self.inBatch = True
+            try:
+                return drawLinePairs(buff, lines, *args, **kwargs)
+            finally:
+                self.inBatch = False
+
+        def countedTriangle(*args, **kwargs):
+            self.count += 1
+            return drawTriangle(*args, **kwargs)
+
+        sketch.drawLine = countedLine
+        sketch.drawLinePairs = countedLinePairs
+        sketch.drawTriangle = countedTriangle
+
+
+def tinyTriangles(sketch, scale):
+    # 20000 random triangles within 5 x 5 pixels
+    rng = random.Random(1)
+    w, h = sketch.buff.width, sketch.buff.height
+    for _ in range(max(1, int(20000 * scale))):
+        x, y = rng.randrange(0, w - 4), rng.randrange(0, h - 4)
+        points = [Point((x + rng.randrange(0, 5), y + rng.randrange(0, 5)),
+                        ColorType(rng.random(), rng.random(), rng.random())) for _ in range(3)]
+        sketch.drawTriangle(sketch.buff, *points, True, sketch.doAA, sketch.doAAlevel)
+
+
+def hugeTriangles(sketch, scale):
+    # 8 triangles, each covering half of the canvas
+    w, h = sketch.buff.width - 1, sketch.buff.height - 1
+    corners = [(0, 0), (w, 0), (w, h), (0, h)]
+    for i in range(max(1, int(8 * scale))):
+        a, b, c = corners[i % 4], corners[(i + 1) % 4], corners[(i + 2) % 4]
+        sketch.drawTriangle(sketch.buff, Point(a, ColorType(1, 0, 0)), Point(b, ColorType(0, 1, 0)),
+                            Point(c, ColorType(0, 0, 1)), True, sketch.doAA, sketch.doAAlevel)
+
+
+def diagonalLines(sketch, scale):
+    # 4000 lines from one side of the canvas to the opposite side
+    w, h = sketch.buff.width - 1, sketch.buff.height - 1
+    n = max(1, int(2000 * scale))
+    lines = []
+    for i in range(n):
+        t = i / n
+        lines.append((Point((0, int(t * h)), ColorType(1, t, 0)), Point((w, h - int(t * h)), ColorType(0, t, 1))))
+        lines.append((Point((int(t * w), 0), ColorType(t, 1, 0)), Point((w - int(t * w), h), ColorType(0, 1, t))))
+    sketch.drawLinePairs(sketch.buff, lines, True, sketch.doAA, sketch.doAAlevel)
+
+
+SYNTHETIC_WORKLOADS = {"tinyTriangles": tinyTriangles, "hugeTriangles": hugeTriangles, "diagonalLines": diagonalLines}
+
+
+def workloadNames():
+    """
+    :return: names of all workloads, test cases first
+    :rtype: list[str]
+    """
+    return testCaseNames() + list(SYNTHETIC_WORKLOADS)
+
+
+def _draw(sketch, name, scale, n_steps):
+    """
+    Clear the canvas and draw one workload, including the anti-aliasing resolve and the tiles of tiled rasterization
+    """
+    sketch.clear()
+    if name in SYNTHETIC_WORKLOADS:
+        sketch.drawTiled(SYNTHETIC_WORKLOADS[name], sketch, scale)
+    else:
+        sketch.drawTiled(getattr(sketch, name), n_steps)
+    sketch.buff.resolve()
+
+
+def runWorkload(name, width, height, aaLevel, backend="numpy", scale=1.0, n_steps=48, repeat=3, processes=None):
+    """
+    Time one workload and measure its peak memory
+
+    :param name: a test case name or a key of SYNTHETIC_WORKLOADS
+    :type name: str
+    :param aaLevel: anti-aliasing super sampling level, 1 turns anti-aliasing off
+    :type aaLevel: int
+    :param backend: "numpy" for the vectorized backends, "edge" for the same with EdgeRaster triangles, "loop" for
+                    the per pixel loops
+    :type backend: str
+    :param scale: multiplier of the number of primitives in synthetic workloads
+    :type scale: float
+    :param n_steps: n_steps passed to test cases
+    :type n_steps: int
+    :param repeat: number of timed runs, the fastest one is reported
+    :type repeat: int
+    :param processes: number of worker processes of tiled rasterization, None for no tiles
+    :type processes: int
+    :rtype: dict
+    """
+    sketch = createSketch(width, height, aaLevel, backend != "loop", processes)
+    sketch.useEdgeRaster = backend == "edge"
+    counter = PrimitiveCounter(sketch)
+    background = sketch.buff.buff.copy()
+
+    # the first run is on a fresh canvas, so the peak includes buffers kept for later frames (e.g. the AA layer)
+    tracemalloc.start()
+    _draw(sketch, name, scale, n_steps)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    seconds = float("inf")
+    for _ in range(repeat):
+        counter.count = 0
+        t1 = time.perf_counter()
+        _draw(sketch, name, scale, n_steps)
+        seconds = min(seconds, time.perf_counter() - t1)
+    # the untimed first run also started the worker processes of tiled rasterization
+    sketch.closeTiledRaster()
+    primitives = counter.count
+    pixels = int(np.any(sketch.buff.buff != background, axis=2).sum())
+
+    return {"workload": name, "backend": backend, "processes": processes, "aa": aaLevel, "width": width,
+            "height": height, "primitives": primitives, "pixels": pixels, "seconds": seconds,
+            "primitivesPerSec": primitives / seconds, "pixelsPerSec": pixels / seconds, "peakMemoryBytes": peak}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the PA1 rasterizers and report JSON")
+    parser.add_argument("--workloads", nargs="+", default=workloadNames(), choices=workloadNames(), metavar="NAME",
+                        help="workloads to run (default: all): " + ", ".join(workloadNames()))
+    parser.add_argument("--aa", type=int, nargs="+", default=list(AA_LEVELS), help="anti-aliasing levels")
+    parser.add_argument("--backends", nargs="+", default=["numpy"], choices=BACKENDS,
+                        help="numpy (default), edge for EdgeRaster triangles, loop for the per pixel loops")
+    parser.add_argument("--size", type=int, nargs=2, default=[500, 500], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--steps", type=int, default=48, help="n_steps of test cases (default: 48)")
+    parser.add_argument("--scale", type=float, default=1.0, help="scale the primitive count of synthetic workloads")
+    parser.add_argument("--processes", type=int, nargs="+", metavar="N",
+                        help="also run with tiled rasterization by N worker processes, to compare the scaling")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per workload, fastest is kept")
+    parser.add_argument("-o", "--output", help="write JSON to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.processes is not None and min(args.processes) < 1:
+        parser.error("--processes must be >= 1")
+
+    results = []
+    for backend in args.backends:
+        for processes in [None] + (args.processes or []):
+            for name in args.workloads:
+                for aaLevel in args.aa:
+                    result = runWorkload(name, args.size[0], args.size[1], aaLevel, backend, args.scale, args.steps,
+                                         args.repeat, processes)
+                    results.append(result)
+                    print("%-22s %-5s %-7s aa %d: %10.0f primitives/s %12.0f pixels/s %8.1f MiB peak"
+                          % (name, backend, "tiles %d" % processes if processes else "", aaLevel,
+                             result["primitivesPerSec"], result["pixelsPerSec"], result["peakMemoryBytes"] / 2 ** 20),
+                          file=sys.stderr)
+
+    report = {"python": platform.python_version(), "numpy": np.__version__, "platform": platform.platform(),
+              "machine": platform.machine(), "steps": args.steps, "scale": args.scale, "repeat": args.repeat,
+              "results": results}
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
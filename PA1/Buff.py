@@ -1,7 +1,8 @@
 """
 Defines Buff class to store canvas data. For a buff with size Width x Height, each entry will store a pixel color.
 Each pixel color will be represented in (R, G, B) format, where R, G, B are unsigned char in range [0, 255].
-This Buff class has a method to export all data to byte string to feed into graphic card.
+Pixels are stored row-major in a (Height, Width, 3) array, which is the memory layout OpenGL expects for a texture, so
+the whole buff can be fed into graphic card without copying. Methods still take coordinates in (x, y) order.
 
 First version Created on 09/27/2018
 
@@ -14,6 +15,8 @@ from typing import Union
 
 from Point import Point
 from ColorType import ColorType
+from ColorArray import ColorArray
+from SupersampleBuff import SupersampleBuff
 
 
 class Buff:
@@ -26,6 +29,11 @@ class Buff:
     width = None
     height = None
     background_color = None
+    supersampleBuff = None
+    dirty = None
+    backing = None
+
+    BLEND_MODES = ColorArray.BLEND_MODES
 
     def __init__(self, width=0, height=0, color=None):
         """
@@ -56,7 +64,8 @@ class Buff:
         self.width = width
         self.height = height
         self.size = (width, height)
-        self.buff = np.zeros((self.width, self.height, 3), dtype=np.uint8)
+        self.backing = self._newArray(width * height, 1).reshape(-1)
+        self.buff = self.backing.reshape((height, width, 3))
         if isinstance(color, ColorType):
             self.background_color = ColorType(*color.getRGB())
             self.clear()
@@ -67,38 +76,92 @@ class Buff:
     def __repr__(self):
         return str(self.buff)
 
+    @staticmethod
+    def wrap(array, color=None):
+        """
+        Create a Buff over an existing pixel array without copying, e.g. a region of another buff or shared memory.
+        Drawing on the returned buff changes the array.
+
+        :param array: pixels in (height, width, 3) layout
+        :type array: numpy.ndarray[uint8]
+        :param color: the background color of the buff
+        :type color: ColorType
+        :rtype: Buff
+        """
+        if not isinstance(array, np.ndarray) or array.dtype != np.uint8 or array.ndim != 3 or array.shape[2] != 3:
+            raise TypeError("Buff can only wrap an uint8 array in shape (height, width, 3)")
+        buff = Buff.__new__(Buff)
+        # the array may be a strided region, so there is no backing to grow into on resize
+        buff.backing = None
+        buff.buff = array
+        buff.height, buff.width = array.shape[:2]
+        buff.size = (buff.width, buff.height)
+        buff.background_color = color.copy() if isinstance(color, ColorType) else ColorType(0, 0, 0)
+        return buff
+
+    def _newArray(self, width, height):
+        """
+        In class usage only, allocate a black pixel array. Subclasses may override it to place pixels elsewhere.
+        The backing storage is allocated as a (1, capacity, 3) array and used flat.
+        """
+        return np.zeros((height, width, 3), dtype=np.uint8)
+
     def clear(self):
         """
         Clear buff to background color
 
         :rtype: None
         """
+        # flush pending anti-aliased drawing, it is overwritten below but the layer allocation is kept for reuse
+        self.resolve()
         r, g, b = self.background_color.getRGB_8bit()
         self.buff[:, :, 0] = r
         self.buff[:, :, 1] = g
         self.buff[:, :, 2] = b
+        self.markDirty(0, self.width - 1, 0, self.height - 1)
 
     def resize(self, width: int, height: int):
         """
-        Resize current buff to new size, data in buff will be kept as much as possible
+        Resize current buff to new size, data in buff will be kept as much as possible.
+        buff is a view at the start of a grow-only backing allocation: shrinking never allocates, and growing at least
+        doubles the capacity, so a drag resize over n sizes allocates O(log n) times.
 
         :param width: the buff width
         :type width: int
         :param height: the buff height
         :type height: int
         """
+        # Same as __init__, avoid an empty buff when window is too small
+        width = max(width, 1)
+        height = max(height, 1)
+        self.resolve()
+        self.supersampleBuff = None
         w_min = min(self.width, width)
         h_min = min(self.height, height)
 
         # keep as much common pixels as possible, clip pixels outside canvas
         tempbuff = self.buff
-        newbuff = np.zeros((height, width, 3), dtype=np.uint8)
-        newbuff[:h_min, :w_min, :] = tempbuff[:h_min, :w_min, :]
+        capacity = 0 if self.backing is None else self.backing.size // 3
+        if width * height > capacity:
+            self.backing = self._newArray(max(width * height, 2 * capacity), 1).reshape(-1)
+            newbuff = self.backing[:width * height * 3].reshape((height, width, 3))
+            newbuff[:h_min, :w_min, :] = tempbuff[:h_min, :w_min, :]
+        else:
+            newbuff = self.backing[:width * height * 3].reshape((height, width, 3))
+            if width != self.width:
+                # rows move within the same memory; longer rows move forward, so start from the last row
+                rows = range(h_min - 1, -1, -1) if width > self.width else range(h_min)
+                for y in rows:
+                    newbuff[y, :w_min] = tempbuff[y, :w_min]
+                newbuff[:h_min, w_min:] = 0
+            newbuff[h_min:] = 0
 
         self.buff = newbuff
         self.size = (width, height)
         self.width = width
         self.height = height
+        self.dirty = None
+        self.markDirty(0, width - 1, 0, height - 1)
 
     def setBackground(self, color: ColorType) -> None:
         """
@@ -141,11 +204,179 @@ class Buff:
         if (x < 0) or (x >= self.width) or (y < 0) or (y >= self.height):
             # Out of Bound, ignore this point and return False
             return False
-        self.buff[x, y, 0] = r
-        self.buff[x, y, 1] = g
-        self.buff[x, y, 2] = b
+        self.buff[y, x, 0] = r
+        self.buff[y, x, 1] = g
+        self.buff[y, x, 2] = b
+        self.markDirty(x, x, y, y)
         return True
 
+    def setPixels(self, xs, ys, colors) -> None:
+        """
+        Vectorized setPixel. Out of bound points are ignored.
+        Float colors are converted to uint8 by truncation, in the same way as Sketch.drawPoint.
+
+        :param xs: x coordinates
+        :type xs: numpy.ndarray[int]
+        :param ys: y coordinates
+        :type ys: numpy.ndarray[int]
+        :param colors: colors in [0, 1], shape (n, 3), or one color of shape (3,) for all points. A ColorArray of n
+                       colors or one color is written without going through float64.
+        :type colors: numpy.ndarray[float] or ColorArray
+        :rtype: None
+        """
+        self.resolve()
+        xs = np.asarray(xs)
+        ys = np.asarray(ys)
+        if isinstance(colors, ColorArray):
+            # already 8 bits, the assignment below is a plain copy
+            colors = colors.toUint8()
+            if len(colors) == 1:
+                colors = colors[0]
+        else:
+            colors = np.asarray(colors)
+        if xs.size == 0:
+            return
+        if xs.min() < 0 or xs.max() >= self.width or ys.min() < 0 or ys.max() >= self.height:
+            inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+            xs, ys = xs[inside], ys[inside]
+            if colors.ndim == 2:
+                colors = colors[inside]
+            if xs.size == 0:
+                return
+        self.buff[ys, xs] = colors if colors.dtype == np.uint8 else colors * 255
+        self.markDirty(int(xs.min()), int(xs.max()), int(ys.min()), int(ys.max()))
+
+    def blend(self, xs, ys, colors, coverage=1.0, mode="over") -> None:
+        """
+        Blend colors onto pixels with a coverage, reading and writing all pixels at once. Out of bound points are
+        ignored. Points on the same pixel are blended in order, as if they were blended one by one. The blend equations
+        are ColorArray.composite, the same as the resolve of the anti-aliasing layer.
+
+        :param xs: x coordinates
+        :type xs: numpy.ndarray[int]
+        :param ys: y coordinates
+        :type ys: numpy.ndarray[int]
+        :param colors: source colors in [0, 1], n colors or one color for all points. The blending is done in the dtype
+                       of a ColorArray, float64 gives the same pixels as Sketch.alpha.
+        :type colors: ColorArray or numpy.ndarray[float]
+        :param coverage: coverage in [0, 1], a float or n floats
+        :type coverage: float or numpy.ndarray[float]
+        :param mode: blend equation, one of BLEND_MODES
+        :type mode: str
+        :rtype: None
+        """
+        if mode not in Buff.BLEND_MODES:
+            raise ValueError("Unknown blend mode " + str(mode) + ", choose from " + ", ".join(Buff.BLEND_MODES))
+        self.resolve()
+        xs = np.asarray(xs, dtype=np.intp).ravel()
+        ys = np.asarray(ys, dtype=np.intp).ravel()
+        colors = colors if isinstance(colors, ColorArray) else ColorArray(colors)
+        coverage = np.broadcast_to(np.asarray(coverage, dtype=colors.dtype), xs.shape)
+        if len(colors) == 1:
+            colors = ColorArray(np.broadcast_to(colors.rgb, (xs.size, 3)), colors.dtype)
+        inside = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        if not inside.all():
+            xs, ys, coverage, colors = xs[inside], ys[inside], coverage[inside], colors[inside]
+        if xs.size == 0:
+            return
+
+        keys = ys * self.width + xs
+        if (keys[1:] > keys[:-1]).all():
+            # distinct pixels in scanline order, e.g. a span, one pass
+            passes = [slice(None)]
+        else:
+            # the k-th point on a pixel goes into pass k, so every pass gathers and scatters distinct pixels
+            order = np.argsort(keys, kind="stable")
+            sortedKeys = keys[order]
+            groupStart = np.flatnonzero(np.r_[True, sortedKeys[1:] != sortedKeys[:-1]])
+            rank = np.empty(xs.size, dtype=np.intp)
+            rank[order] = np.arange(xs.size) - np.repeat(groupStart, np.diff(np.r_[groupStart, xs.size]))
+            passes = [rank == k for k in range(int(rank.max()) + 1)]
+
+        for selected in passes:
+            px, py, a, src = xs[selected], ys[selected], coverage[selected], colors[selected]
+            dst = ColorArray.fromUint8(self.buff[py, px], colors.dtype)
+            a = a[:, None]
+            result = ColorArray(ColorArray.composite(dst.rgb, src.rgb * a, a, mode), colors.dtype)
+            self.buff[py, px] = result.toUint8()
+        self.markDirty(int(xs.min()), int(xs.max()), int(ys.min()), int(ys.max()))
+
+    def supersample(self, level: int, mode: str = "over") -> SupersampleBuff:
+        """
+        Get the anti-aliasing layer of this buff at a supersampling level. Draw into the layer with coordinates scaled
+        by level; it will be composited onto this buff by resolve(). A pending layer of another level or blend mode is
+        resolved first.
+
+        :param level: supersampling level
+        :type level: int
+        :param mode: blend equation of the resolve, one of BLEND_MODES
+        :type mode: str
+        :rtype: SupersampleBuff
+        """
+        if mode not in Buff.BLEND_MODES:
+            raise ValueError("Unknown blend mode " + str(mode) + ", choose from " + ", ".join(Buff.BLEND_MODES))
+        if self.supersampleBuff is None or self.supersampleBuff.level != level:
+            self.resolve()
+            self.supersampleBuff = SupersampleBuff(self.width, self.height, level)
+        if self.supersampleBuff.mode != mode:
+            self.resolve()
+            self.supersampleBuff.mode = mode
+        return self.supersampleBuff
+
+    def resolve(self) -> None:
+        """
+        Downsample the pending anti-aliasing layer and composite it onto buff. Called automatically before buff is read
+        or written through Buff methods, and at the end of each frame by getBytes.
+
+        :rtype: None
+        """
+        if self.supersampleBuff is not None and self.supersampleBuff.bbox is not None:
+            self.markDirty(*self.supersampleBuff.resolveOnto(self.buff))
+
+    def markDirty(self, x_min: int, x_max: int, y_min: int, y_max: int) -> None:
+        """
+        Add a region to the dirty rectangle, which bounds all pixels changed since the last takeDirty. Buff methods mark
+        what they write, code writing into the buff array directly should call this as well.
+
+        :param x_min: left bound, inclusive
+        :type x_min: int
+        :param x_max: right bound, inclusive
+        :type x_max: int
+        :param y_min: bottom bound, inclusive
+        :type y_min: int
+        :param y_max: top bound, inclusive
+        :type y_max: int
+        :rtype: None
+        """
+        x_min, y_min = max(x_min, 0), max(y_min, 0)
+        x_max, y_max = min(x_max, self.width - 1), min(y_max, self.height - 1)
+        if x_min > x_max or y_min > y_max:
+            return
+        if self.dirty is None:
+            self.dirty = [x_min, x_max, y_min, y_max]
+        else:
+            dirty = self.dirty
+            if x_min < dirty[0]:
+                dirty[0] = x_min
+            if x_max > dirty[1]:
+                dirty[1] = x_max
+            if y_min < dirty[2]:
+                dirty[2] = y_min
+            if y_max > dirty[3]:
+                dirty[3] = y_max
+
+    def takeDirty(self):
+        """
+        Get the dirty rectangle and reset it. Pending anti-aliased drawing is resolved first, so it is included.
+
+        :return: [x_min, x_max, y_min, y_max] with inclusive bounds, or None if nothing changed
+        :rtype: list[int]
+        """
+        self.resolve()
+        dirty = self.dirty
+        self.dirty = None
+        return dirty
+
     def getPoint(self, x: int, y: int) -> Union[bool, Point]:
         """
         Get pixel information and return result in Point format
@@ -171,15 +402,31 @@ class Buff:
         :type y: int
         :rtype: numpy.array[type=uint8]
         """
-        return self.buff[x, y, :]
+        self.resolve()
+        return self.buff[y, x, :]
+
+    def getColors(self, xs, ys) -> ColorArray:
+        """
+        Vectorized getPixel, in [0, 1] colors. Coordinates must be inside the buff.
+
+        :param xs: x coordinates
+        :type xs: numpy.ndarray[int]
+        :param ys: y coordinates
+        :type ys: numpy.ndarray[int]
+        :rtype: ColorArray
+        """
+        self.resolve()
+        return ColorArray.fromUint8(self.buff[ys, xs])
 
     def setStaticBuffArray(self, buffArray):
         """
-        :param buffArray: an array to load into buff array
+        :param buffArray: an array to load into buff array, in row-major (height, width, 3) layout
         :type buffArray: numpy.array(dtype=uint8)
         """
         self._setBuffArray(buffArray)
-        self.generatePointArray()
+        # The Point array takes seconds to build for a texture, so it is only generated when getPointFromPointArray is
+        # used. Vectorized texture sampling should use TextureSampler instead.
+        self.buffPointArray = None
 
     def generatePointArray(self):
         """
@@ -216,16 +463,22 @@ class Buff:
             raise TypeError("buffarray can be ndarray only")
         if self.width * self.height * 3 != buffarray.size:
             raise TypeError("You are copying buffarray with incorrect shape to this buff")
-        self.buff = buffarray.reshape((self.width, self.height, 3)).copy()
+        if self.backing is None or self.backing.size < buffarray.size:
+            self.backing = self._newArray(self.width * self.height, 1).reshape(-1)
+        self.buff = self.backing[:buffarray.size].reshape((self.height, self.width, 3))
+        self.buff[...] = np.asarray(buffarray, dtype=np.uint8).reshape((self.height, self.width, 3))
+        self.markDirty(0, self.width - 1, 0, self.height - 1)
 
     def getBytes(self):
         """
-        Turn buff to bytes, which is a copy of raw data memory content in C-order, to feed into graphic card.
+        Raw data memory content in C-order, to feed into graphic card. This is a view of buff instead of a copy, it
+        follows later changes of the buff until the buff is resized. Call tobytes() on it to get a snapshot.
 
-        :rtype: bytes
+        :rtype: memoryview
         """
-        # flip width and height to generate bytes correctly
-        return np.transpose(self.buff, (1, 0, 2)).tobytes()
+        self.resolve()
+        # rows are already in the order of the texture rows, no transpose is needed
+        return memoryview(self.buff).cast("B")
 
     def copy(self):
         """
@@ -233,10 +486,129 @@ class Buff:
 
         :rtype: Buff
         """
+        self.resolve()
         newBuff = Buff(self.width, self.height, self.background_color)
         newBuff._setBuffArray(self.buff)
         return newBuff
 
+    def copyTo(self, target=None, region=None):
+        """
+        Copy current buff into target without allocating. A target of a different size is resized first, which only
+        allocates when it grows beyond its capacity. If target is None, a new copy is made instead.
+
+        :param target: the buff to overwrite
+        :type target: Buff
+        :param region: only copy [x_min, x_max, y_min, y_max] with inclusive bounds, None to copy everything
+        :type region: list[int]
+        :return: target, or the new copy
+        :rtype: Buff
+        """
+        self.resolve()
+        if target is None:
+            return self.copy()
+        if target.size != self.size:
+            target.resize(self.width, self.height)
+            region = None
+        target.resolve()
+        if region is None:
+            region = [0, self.width - 1, 0, self.height - 1]
+        x_min, x_max, y_min, y_max = region
+        target.buff[y_min:y_max + 1, x_min:x_max + 1] = self.buff[y_min:y_max + 1, x_min:x_max + 1]
+        target.background_color = self.background_color.copy()
+        target.markDirty(x_min, x_max, y_min, y_max)
+        return target
+
+    def imageArray(self, out=None):
+        """
+        Pixels in image row order, top row first. Row 0 of buff is the bottom of the canvas, so rows are flipped.
+
+        :param out: array of shape (height, width, 3) to write into instead of allocating, e.g. a recycled frame
+        :type out: numpy.ndarray[uint8]
+        :return: C contiguous pixels, shape (height, width, 3)
+        :rtype: numpy.ndarray[uint8]
+        """
+        self.resolve()
+        if out is None:
+            return np.ascontiguousarray(self.buff[::-1])
+        out[...] = self.buff[::-1]
+        return out
+
+    def save(self, path, **params):
+        """
+        Write buff to an image file, see writeImage for the formats
+
+        :param path: output file path
+        :type path: str
+        :param params: format options passed to Pillow, e.g. compress_level=1 for a fast PNG
+        :rtype: None
+        """
+        Buff.writeImage(self.imageArray(), path, **params)
+
+    @staticmethod
+    def writeImage(image, path, **params):
+        """
+        Write pixels in image row order to a file. .ppm (binary P6) and .rgb (raw RGB bytes, no header) are written
+        directly, any other extension (.png, .jpg, ...) is encoded by Pillow.
+
+        :param image: pixels, shape (height, width, 3), e.g. from imageArray
+        :type image: numpy.ndarray[uint8]
+        :param path: output file path
+        :type path: str
+        :param params: format options passed to Pillow
+        :rtype: None
+        """
+        extension = path.lower().rsplit(".", 1)[-1]
+        if extension in ("ppm", "rgb"):
+            with open(path, "wb") as f:
+                if extension == "ppm":
+                    f.write(b"P6\n%d %d\n255\n" % (image.shape[1], image.shape[0]))
+                f.write(memoryview(np.ascontiguousarray(image)).cast("B"))
+            return
+        try:
+            # From pip package "Pillow"
+            from PIL import Image
+        except ImportError:
+            raise ImportError("Writing " + path + " needs Pillow package, use a .ppm output instead")
+        Image.fromarray(image, "RGB").save(path, **params)
+
+
+class BlendView:
+    """
+    A Buff as seen by the vectorized backends, which write whole spans with setPixels: the pixels are blended onto the
+    buff with a blend mode and coverage 1 instead of replacing it, in float64 like the per pixel loops of Sketch.
+
+    * buff(Buff): the buff to blend onto
+    * mode(str): one of Buff.BLEND_MODES
+    * width, height(int): size of buff
+    """
+    buff = None
+    mode = None
+    width = None
+    height = None
+
+    def __init__(self, buff, mode):
+        """
+        :param buff: the buff to blend onto
+        :type buff: Buff
+        :param mode: one of Buff.BLEND_MODES
+        :type mode: str
+        :rtype: None
+        """
+        if mode not in Buff.BLEND_MODES:
+            raise ValueError("Unknown blend mode " + str(mode) + ", choose from " + ", ".join(Buff.BLEND_MODES))
+        self.buff = buff
+        self.mode = mode
+        self.width = buff.width
+        self.height = buff.height
+
+    def setPixels(self, xs, ys, colors):
+        """
+        Same arguments as Buff.setPixels, float colors only
+
+        :rtype: None
+        """
+        self.buff.blend(xs, ys, ColorArray(colors, np.float64), 1.0, self.mode)
+
 
 if __name__ == "__main__":
     a = Buff(100, 100)
@@ -252,20 +624,20 @@ if __name__ == "__main__":
     print(p_default)
 
     b = Buff(5, 5, ColorType(0.3, 0., 0.4))
-    print(b.getBytes())
+    print(b.getBytes().tobytes())
     print(b.getPoint(2, 2))
     print(b.getPoint(50, 50))
 
     c = b
     d = b.copy()
-    print("c (reference of b): ", c.getBytes())
-    print("d (copy of b)     :", d.getBytes())
+    print("c (reference of b): ", c.getBytes().tobytes())
+    print("d (copy of b)     :", d.getBytes().tobytes())
     b.setBackground(ColorType(0.1, 0.2, 0.3))
     b.clear()
     b.setPixel(2, 2, 2, 0, 0)
     print("change b's background and set pixel at (2, 2)")
-    print("c (reference of b): ", c.getBytes())
-    print("d (copy of b)     :", d.getBytes())
+    print("c (reference of b): ", c.getBytes().tobytes())
+    print("d (copy of b)     :", d.getBytes().tobytes())
 
     e = Buff(3, 3, ColorType(0, 0, 0))
     e.setPixel(0, 0, 1, 1, 1)
@@ -274,16 +646,65 @@ if __name__ == "__main__":
     e.setPixel(1, 0, 4, 4, 4)
     e.setPixel(1, 1, 5, 5, 5)
     print(e)
-    print(e.getBytes())
+    print(e.getBytes().tobytes())
     e.resize(2, 4)
     print(e)
-    print(e.getBytes())
+    print(e.getBytes().tobytes())
     e.resize(5, 3)
     print(e)
-    print(e.getBytes())
+    print(e.getBytes().tobytes())
     e.resize(6, 6)
     print(e)
-    print(e.getBytes())
+    print(e.getBytes().tobytes())
     e.resize(2, 2)
     print(e)
-    print(e.getBytes())
+    print(e.getBytes().tobytes())
+
+    # Per frame upload cost: the old (width, height, 3) layout needed a transposed copy for every frame
+    import time
+    for size in (500, 2000):
+        f = Buff(size, size, ColorType(0.2, 0.4, 0.6))
+        old = np.transpose(f.buff, (1, 0, 2)).copy()
+        n = 20
+        t1 = time.time()
+        for _ in range(n):
+            np.transpose(old, (1, 0, 2)).tobytes()
+        t2 = time.time()
+        for _ in range(n):
+            f.getBytes()
+        t3 = time.time()
+        print("%dx%d upload bytes: transposed copy %.3f ms, row-major view %.3f ms"
+              % (size, size, (t2 - t1) / n * 1000, (t3 - t2) / n * 1000))
+
+    # Coverage blending of 20000 edge pixels: one getPoint, ColorType blend and write per pixel, against one blend call
+    rng = np.random.default_rng(1)
+    g = Buff(500, 500, ColorType(0.2, 0.4, 0.6))
+    xs, ys = rng.integers(0, 500, 20000), rng.integers(0, 500, 20000)
+    colors, coverage = rng.random((20000, 3)), rng.random(20000)
+    t1 = time.time()
+    for x, y, (r, gr, bl), alpha in zip(xs.tolist(), ys.tolist(), colors.tolist(), coverage.tolist()):
+        bg = g.getPoint(x, y).color
+        blended = ColorType(bg.r * (1 - alpha) + r * alpha, bg.g * (1 - alpha) + gr * alpha,
+                            bg.b * (1 - alpha) + bl * alpha)
+        g.setPixel(x, y, blended.r * 255, blended.g * 255, blended.b * 255)
+    t2 = time.time()
+    g.blend(xs, ys, colors, coverage)
+    t3 = time.time()
+    print("blend 20000 pixels: per pixel %.1f ms, Buff.blend %.1f ms" % ((t2 - t1) * 1000, (t3 - t2) * 1000))
+
+    # A drag resize from 200 x 150 to 1600 x 1200 and back, one event per pixel of width
+    class CountingBuff(Buff):
+        allocations = 0
+
+        def _newArray(self, width, height):
+            CountingBuff.allocations += 1
+            return super(CountingBuff, self)._newArray(width, height)
+
+    h = CountingBuff(200, 150)
+    sizes = [(w, w * 3 // 4) for w in range(200, 1601)]
+    t1 = time.time()
+    for w, hh in sizes + sizes[::-1]:
+        h.resize(w, hh)
+    t2 = time.time()
+    print("%d resize events: %d allocations, %.2f ms per event"
+          % (2 * len(sizes), CountingBuff.allocations - 1, (t2 - t1) / (2 * len(sizes)) * 1000))
@@ -78,6 +78,15 @@ class CanvasBase(glcanvas.GLCanvas):
     buff = Buff()
     buff_last = Buff()
 
+    # The display texture is allocated once per canvas size, and later frames only upload the dirty region of buff
+    textureId = None
+    textureSize = None
+    textureBuff = None
+
+    # Resize events of a window drag are merged, buff is resized once no event came for this long
+    RESIZE_DELAY_MS = 50
+    resizeTimer = None
+
     def __init__(self, parent):
         """
         Inherit from WxPython GLCanvas class. Bind implemented methods to window events.
@@ -109,33 +118,56 @@ class CanvasBase(glcanvas.GLCanvas):
         """
         clear display buff, but save last frame to buff_last
         """
-        self.buff_last = self.buff.copy()
+        self.buff_last = self.buff.copyTo(self.buff_last)
         self.buff.clear()
         self.points_l.clear()
         self.points_r.clear()
 
     def OnResize(self, event):
         """
-        This method handles onresize event.
+        This method handles onresize event. The viewport follows the window at once, while buff is only resized by
+        applyResize after RESIZE_DELAY_MS without another resize event, so a drag resize resizes buff once.
         """
+        self.size = self.GetClientSize()
+        self.SetCurrent(self.context)
+        self._setViewport()
+
+        if self.resizeTimer is None:
+            self.resizeTimer = wx.CallLater(self.RESIZE_DELAY_MS, self.applyResize)
+        else:
+            self.resizeTimer.Restart(self.RESIZE_DELAY_MS)
+        self.Refresh(eraseBackground=True)
 
+    def applyResize(self):
+        """
+        Resize buff to the window size and let Interrupt_Resize redraw it
+        """
+        self.resizeTimer = None
         self.context = glcanvas.GLContext(self)
         self.size = self.GetClientSize()
         self.SetCurrent(self.context)
+        # Texture names belong to the old context, a new texture will be allocated in OnDraw
+        self.textureId = None
+        self._setViewport()
 
-        gl.glViewport(0, 0, self.size.width, self.size.height)
-        gl.glMatrixMode(gl.GL_PROJECTION)
-        gl.glLoadIdentity()
-        glu.gluOrtho2D(0, self.size.width, 0, self.size.height)
-
-        # Create new buffer for display and store last frame buffer to buff_last
-        self.buff_last = self.buff.copy()
+        # Store last frame buffer to buff_last and resize buff, both reuse their pixel allocation when it is big enough
+        self.buff_last = self.buff.copyTo(self.buff_last)
         self.buff.resize(self.size.width, self.size.height)
+        self.Interrupt_Resize(self.size.width, self.size.height)
 
         # Update screen and display
         self.Refresh(eraseBackground=True)
         self.Update()
 
+    def _setViewport(self):
+        """
+        Map the OpenGL viewport and projection to the current window size
+        """
+        gl.glViewport(0, 0, self.size.width, self.size.height)
+        gl.glMatrixMode(gl.GL_PROJECTION)
+        gl.glLoadIdentity()
+        glu.gluOrtho2D(0, self.size.width, 0, self.size.height)
+
     def OnPaint(self, event=None):
         """
         A simple wrap around OnDraw, added OpenGL init checking
@@ -184,20 +216,20 @@ class CanvasBase(glcanvas.GLCanvas):
         gl.glLoadIdentity()
         # Set coordinate system, origin at left-bottom
         glu.gluOrtho2D(0, self.size.width, 0, self.size.height)
-        # Save current frame to last frame in case you need it
-        self.buff_last = self.buff.copy()
+        # Pixels changed since the last frame, anti-aliased drawing is resolved before taking it
+        dirty = self.buff.takeDirty()
+        # Save current frame to last frame in case you need it. Outside the dirty region it is the same as last time.
+        if self.buff_last.size == self.buff.size:
+            if dirty is not None:
+                self.buff.copyTo(self.buff_last, dirty)
+        else:
+            self.buff_last = self.buff.copy()
 
         # The core part for display: generate a rectangle which covers the whole canvas and map texture to it. \
         # Texture is the content we want to display on canvas
         gl.glPixelStorei(gl.GL_UNPACK_ALIGNMENT, 1)
         gl.glEnable(gl.GL_TEXTURE_2D)
-        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)
-        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_REPEAT)
-        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
-        gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
-        gl.glTexEnvf(gl.GL_TEXTURE_ENV, gl.GL_TEXTURE_ENV_MODE, gl.GL_MODULATE)
-        gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB, self.size.width, self.size.height, 0, gl.GL_RGB,
-                        gl.GL_UNSIGNED_BYTE, self.buff.getBytes())
+        self._uploadTexture(dirty)
         gl.glClear(gl.GL_COLOR_BUFFER_BIT)
         gl.glBegin(gl.GL_QUADS)
         gl.glTexCoord2f(1.0, 0.0)
@@ -213,6 +245,42 @@ class CanvasBase(glcanvas.GLCanvas):
         # Swap Buffer to display canvas
         self.SwapBuffers()
 
+    def _uploadTexture(self, dirty):
+        """
+        Make the display texture match buff. The texture is (re)allocated with the full buff when the canvas size or the
+        buff object changed, otherwise only the dirty region is uploaded with glTexSubImage2D.
+
+        :param dirty: changed region of buff as [x_min, x_max, y_min, y_max], or None
+        :type dirty: list[int]
+        """
+        size = (self.buff.width, self.buff.height)
+        if self.textureId is None or self.textureSize != size or self.textureBuff is not self.buff:
+            if self.textureId is None:
+                self.textureId = gl.glGenTextures(1)
+            gl.glBindTexture(gl.GL_TEXTURE_2D, self.textureId)
+            gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_S, gl.GL_REPEAT)
+            gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_WRAP_T, gl.GL_REPEAT)
+            gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MAG_FILTER, gl.GL_NEAREST)
+            gl.glTexParameter(gl.GL_TEXTURE_2D, gl.GL_TEXTURE_MIN_FILTER, gl.GL_LINEAR)
+            gl.glTexEnvf(gl.GL_TEXTURE_ENV, gl.GL_TEXTURE_ENV_MODE, gl.GL_MODULATE)
+            gl.glTexImage2D(gl.GL_TEXTURE_2D, 0, gl.GL_RGB, size[0], size[1], 0, gl.GL_RGB,
+                            gl.GL_UNSIGNED_BYTE, self.buff.getBytes())
+            self.textureSize = size
+            self.textureBuff = self.buff
+            return
+        gl.glBindTexture(gl.GL_TEXTURE_2D, self.textureId)
+        if dirty is not None:
+            x_min, x_max, y_min, y_max = dirty
+            # buff is row-major, so the region is read from the whole buff view by unpack strides, without a copy
+            gl.glPixelStorei(gl.GL_UNPACK_ROW_LENGTH, size[0])
+            gl.glPixelStorei(gl.GL_UNPACK_SKIP_PIXELS, x_min)
+            gl.glPixelStorei(gl.GL_UNPACK_SKIP_ROWS, y_min)
+            gl.glTexSubImage2D(gl.GL_TEXTURE_2D, 0, x_min, y_min, x_max - x_min + 1, y_max - y_min + 1, gl.GL_RGB,
+                               gl.GL_UNSIGNED_BYTE, self.buff.getBytes())
+            gl.glPixelStorei(gl.GL_UNPACK_ROW_LENGTH, 0)
+            gl.glPixelStorei(gl.GL_UNPACK_SKIP_PIXELS, 0)
+            gl.glPixelStorei(gl.GL_UNPACK_SKIP_ROWS, 0)
+
     def OnMouseLeft(self, event):
         """
         Record left mouse click event and feed coordinates to Interrupt_MouseL
@@ -248,6 +316,12 @@ class CanvasBase(glcanvas.GLCanvas):
     def Interrupt_Keyboard(self, keycode):
         raise NotImplementedError("keyboard interrupt not implemented yet")
 
+    def Interrupt_Resize(self, width, height):
+        """
+        Called after buff is resized to width x height. Pixels drawn before are kept where they fit.
+        """
+        pass
+
     @staticmethod
     def OnDestroy(event):
         print("Destroy Window")
@@ -0,0 +1,210 @@
+"""
+Defines ColorArray class, the vectorized counterpart of ColorType: N colors in one float32 N x 3 array, with the color
+operations of the rasterizer (lerp, alpha blending, conversion to 8 bits) done on all colors at once. Code that fills
+many pixels uses it instead of creating a ColorType for every pixel, and Buff.setPixels takes it directly.
+
+float32 halves the memory and bandwidth of the colors, but rounds differently from the float64 ColorType arithmetic,
+so a few 8 bits values come out 1 lower. Code that must give the same pixels as the ColorType path, e.g. the per pixel
+loops of Sketch, creates its ColorArrays with dtype=numpy.float64; the operations keep the dtype of their inputs.
+
+Named colors, e.g. ColorArray.named("RED"), are interned: every call returns the same read-only instance.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import numpy as np
+
+import ColorType as ColorTypeModule
+from ColorType import ColorType
+
+
+class ColorArray:
+    """
+    N RGB colors in [0, 1], stored as float32 unless another dtype is given.
+
+    * rgb(numpy.ndarray[float32]): N x 3 colors. Arrays given to the constructor are used without copy when they are
+      already C contiguous and of the dtype.
+    """
+    rgb = None
+
+    BLEND_MODES = ("over", "additive", "max")
+
+    _named = {}
+
+    def __init__(self, rgb, dtype=np.float32):
+        """
+        :param rgb: colors, N x 3 or one color of 3 floats
+        :type rgb: numpy.ndarray or list
+        :param dtype: numpy.float32, or numpy.float64 for the same results as ColorType
+        :type dtype: type
+        :rtype: None
+        """
+        self.rgb = np.ascontiguousarray(rgb, dtype=dtype).reshape((-1, 3))
+
+    @property
+    def dtype(self):
+        """
+        :rtype: numpy.dtype
+        """
+        return self.rgb.dtype
+
+    @staticmethod
+    def fromColors(colors, dtype=np.float32):
+        """
+        :param colors: the colors
+        :type colors: list[ColorType]
+        :param dtype: dtype of the colors
+        :type dtype: type
+        :rtype: ColorArray
+        """
+        return ColorArray([(c.r, c.g, c.b) for c in colors], dtype)
+
+    @staticmethod
+    def fromUint8(pixels, dtype=np.float32):
+        """
+        Colors from 8 bits pixels, e.g. pixels read from a Buff
+
+        :param pixels: N x 3 values in [0, 255]
+        :type pixels: numpy.ndarray[uint8]
+        :param dtype: dtype of the colors
+        :type dtype: type
+        :rtype: ColorArray
+        """
+        return ColorArray(np.asarray(pixels, dtype=dtype) / np.dtype(dtype).type(255), dtype)
+
+    @staticmethod
+    def named(name):
+        """
+        A named color of the ColorType module, e.g. "RED", as a read-only ColorArray of one color.
+        The instance is created once and shared by all callers.
+
+        :param name: color name in upper case
+        :type name: str
+        :rtype: ColorArray
+        """
+        color = ColorArray._named.get(name)
+        if color is None:
+            constant = getattr(ColorTypeModule, name, None)
+            if not isinstance(constant, ColorType):
+                raise ValueError("Unknown color name " + name)
+            color = ColorArray([constant.getRGB()])
+            color.rgb.flags.writeable = False
+            ColorArray._named[name] = color
+        return color
+
+    def toColors(self):
+        """
+        :rtype: list[ColorType]
+        """
+        return [ColorType(*c) for c in self.rgb.tolist()]
+
+    def lerp(self, other, t):
+        """
+        Linear interpolation from these colors to other colors, self * (1 - t) + other * t, in the same order of
+        operations as Sketch.smooth1D
+
+        :param other: colors at t = 1, N colors or one color for all
+        :type other: ColorArray
+        :param t: interpolation parameter, a float or N floats
+        :type t: float or numpy.ndarray[float]
+        :return: colors of the wider dtype of self and other
+        :rtype: ColorArray
+        """
+        dtype = np.promote_types(self.dtype, other.dtype)
+        t = np.asarray(t, dtype=dtype)
+        if t.ndim == 1:
+            t = t[:, None]
+        return ColorArray(self.rgb * (1 - t) + other.rgb * t, dtype)
+
+    def blend(self, dst, alpha):
+        """
+        Draw these colors over dst with coverage alpha, same as Sketch.alpha
+
+        :param dst: colors underneath, e.g. from Buff.getColors
+        :type dst: ColorArray
+        :param alpha: coverage in [0, 1], a float or N floats
+        :type alpha: float or numpy.ndarray[float]
+        :rtype: ColorArray
+        """
+        return dst.lerp(self, alpha)
+
+    @staticmethod
+    def composite(dst, premultiplied, coverage, mode="over"):
+        """
+        The blend equations of Buff.blend and SupersampleBuff.resolveOnto, on a source already multiplied by its
+        coverage. "over" is done in the same order of operations as Sketch.alpha.
+
+        * over: dst * (1 - coverage) + src * coverage
+        * additive: dst + src * coverage, clamped to 1
+        * max: the larger of dst and src * coverage, per channel
+
+        :param dst: colors underneath, shape (..., 3)
+        :type dst: numpy.ndarray[float]
+        :param premultiplied: source colors times coverage, same shape as dst
+        :type premultiplied: numpy.ndarray[float]
+        :param coverage: coverage in [0, 1], shape (..., 1)
+        :type coverage: numpy.ndarray[float]
+        :param mode: one of BLEND_MODES
+        :type mode: str
+        :rtype: numpy.ndarray[float]
+        """
+        if mode == "over":
+            return dst * (1 - coverage) + premultiplied
+        if mode == "additive":
+            return np.minimum(dst + premultiplied, 1)
+        if mode == "max":
+            return np.maximum(dst, premultiplied)
+        raise ValueError("Unknown blend mode " + str(mode) + ", choose from " + ", ".join(ColorArray.BLEND_MODES))
+
+    def toUint8(self):
+        """
+        Convert to 8 bits by truncation, in the same way as Sketch.drawPoint
+
+        :return: N x 3 values in [0, 255]
+        :rtype: numpy.ndarray[uint8]
+        """
+        return (np.clip(self.rgb, 0, 1) * 255).astype(np.uint8)
+
+    def __len__(self):
+        return len(self.rgb)
+
+    def __getitem__(self, index):
+        """
+        Colors selected by a slice, an index array or a mask. Slices share the array of these colors.
+        """
+        if isinstance(index, (int, np.integer)):
+            index = slice(index, index + 1 or None)
+        return ColorArray(self.rgb[index], self.dtype)
+
+    def __array__(self, dtype=None, copy=None):
+        return self.rgb if dtype is None else self.rgb.astype(dtype)
+
+    def __repr__(self):
+        return "ColorArray(%d colors)" % len(self)
+
+
+if __name__ == "__main__":
+    import time
+    import random
+
+    n = 100000
+    src = [ColorType(random.random(), random.random(), random.random()) for _ in range(n)]
+    dst = [ColorType(random.random(), random.random(), random.random()) for _ in range(n)]
+    alpha = [random.random() for _ in range(n)]
+
+    t1 = time.perf_counter()
+    blended = [ColorType(d.r * (1 - a) + s.r * a, d.g * (1 - a) + s.g * a, d.b * (1 - a) + s.b * a)
+               for s, d, a in zip(src, dst, alpha)]
+    pixels = [c.getRGB_8bit() for c in blended]
+    t2 = time.perf_counter()
+    print("ColorType blend of %d colors: %.1f ms" % (n, (t2 - t1) * 1000))
+
+    srcArray, dstArray, alphaArray = ColorArray.fromColors(src), ColorArray.fromColors(dst), np.array(alpha)
+    t1 = time.perf_counter()
+    pixelArray = srcArray.blend(dstArray, alphaArray).toUint8()
+    t2 = time.perf_counter()
+    print("ColorArray blend of %d colors: %.2f ms" % (n, (t2 - t1) * 1000))
+    print("channels off by more than 1:", int((np.abs(pixelArray.astype(int) - np.array(pixels)) > 1).sum()))
+    exact = ColorArray.fromColors(src, np.float64).blend(ColorArray.fromColors(dst, np.float64), alphaArray).toUint8()
+    print("float64 channels different from ColorType:", int((exact.astype(int) != np.array(pixels)).sum()))
+    assert ColorArray.named("RED") is ColorArray.named("RED")
@@ -165,6 +165,40 @@ class ColorType:
         return ColorType(self.r, self.g, self.b)
 
 
+# Named colors. They are shared instances, copy() one before changing it.
+YELLOW = ColorType(1, 1, 0)
+ORANGE = ColorType(1, 0.5, 0)
+DARKORANGE1 = ColorType(1, 140 / 255, 0)
+DARKORANGE2 = ColorType(200 / 255, 95 / 255, 0)
+DARKORANGE3 = ColorType(160 / 255, 80 / 255, 0)
+DARKORANGE4 = ColorType(130 / 255, 60 / 255, 0)
+
+DARKGREEN = ColorType(0, 100 / 255, 0)
+GREEN = ColorType(0, 1, 0)
+SOFTGREEN = ColorType(192/255, 238/255, 0)
+GREENYELLOW = ColorType(173 / 255, 255 / 255, 47 / 255)
+LIGHTGREEN = ColorType(144 / 255, 238 / 255, 144 / 255)
+SEAGREEN = ColorType(32 / 255, 178 / 255, 170 / 255)
+BLUEGREEN = ColorType(3/255, 106/255, 110/255)
+
+RED = ColorType(1, 0, 0)
+SOFTRED = ColorType(255/255, 127/255,  154/255)
+PURPLE = ColorType(0.5, 0, 0.5)
+PINK = ColorType(1, 192 / 255, 203 / 255)
+
+NAVY = ColorType(0, 0, 0.5)
+BLUE = ColorType(0, 0, 1)
+SOFTBLUE = ColorType(115/255, 197/255, 255/255)
+CYAN = ColorType(0, 1, 1)
+DODGERBLUE = ColorType(30 / 255, 144 / 255, 255 / 255)
+DEEPSKYBLUE = ColorType(0, 191 / 255, 255 / 255)
+
+SILVER = ColorType(0.75, 0.75, 0.75)
+WHITE = ColorType(1.0, 1.0, 1.0)
+GRAY = ColorType(0.2, 0.2, 0.2)
+BLACK = ColorType(0.0, 0.0, 0.0)
+
+
 if __name__ == "__main__":
     c = ColorType(0.5, 0.2, 0.1)
     print(c.getRGB_8bit())
@@ -0,0 +1,217 @@
+"""
+Display list for Sketch: drawing calls are recorded as compact commands, so a scene can be rasterized again onto any
+Buff without running the code that built it. The rasterized pixels are cached by the hash of the commands and the
+canvas size, so drawing an unchanged scene again is one copy, and a scene that only got new commands at the end
+rasterizes just those.
+
+Commands hold plain values only: points are stored as coordinate, color and texture tuples and vertex batches as the
+bytes of their arrays, so later changes to the Point objects given to a drawing method do not change the recording.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import functools
+from collections import OrderedDict
+
+import numpy as np
+
+from Point import Point
+from ColorType import ColorType
+from VertexBatch import VertexBatch
+
+
+def recorded(method):
+    """
+    Decorator of Sketch drawing methods. A call drawing on sketch.buff from outside any other drawing method is
+    appended to sketch.displayList. With sketch.recordOnly set, it is only recorded and nothing is drawn.
+    """
+    @functools.wraps(method)
+    def wrapper(self, buff, *args, **kwargs):
+        if self.drawDepth == 0 and buff is self.buff and self.displayList is not None:
+            self.displayList.record(method.__name__, args, kwargs)
+            if self.recordOnly:
+                return None
+        self.drawDepth += 1
+        try:
+            return method(self, buff, *args, **kwargs)
+        finally:
+            self.drawDepth -= 1
+    return wrapper
+
+
+class DisplayListCache:
+    """
+    Least recently used cache of rasterized display lists, shared by all Sketch instances
+
+    * maxEntries(int): number of images kept
+    """
+    maxEntries = 8
+    entries = None
+
+    def __init__(self, maxEntries=8):
+        self.maxEntries = maxEntries
+        self.entries = OrderedDict()
+
+    def get(self, key):
+        """
+        :return: cached pixels of key, or None
+        :rtype: numpy.ndarray[uint8]
+        """
+        pixels = self.entries.get(key)
+        if pixels is not None:
+            self.entries.move_to_end(key)
+        return pixels
+
+    def put(self, key, pixels):
+        """
+        :param key: see DisplayList.cacheKey
+        :param pixels: a copy of the buff array, owned by the cache afterwards
+        :type pixels: numpy.ndarray[uint8]
+        """
+        self.entries[key] = pixels
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.maxEntries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+
+class DisplayList:
+    """
+    Recorded drawing calls of a Sketch.
+
+    * commands(list[tuple]): (method name, encoded positional arguments, encoded keyword arguments) in drawing order
+    * hashes(list[int]): hashes[i] identifies commands[:i], so every prefix of the list has its own cache key
+    """
+    commands = None
+    hashes = None
+
+    def __init__(self):
+        self.commands = []
+        self.hashes = [0]
+
+    def __len__(self):
+        return len(self.commands)
+
+    def clear(self):
+        """
+        Remove all commands
+
+        :rtype: None
+        """
+        self.commands = []
+        self.hashes = [0]
+
+    def record(self, name, args=(), kwargs=None):
+        """
+        Append a call of Sketch method name
+
+        :param name: drawing method name, e.g. "drawTriangle"
+        :type name: str
+        :param args: positional arguments after buff
+        :type args: tuple
+        :param kwargs: keyword arguments
+        :type kwargs: dict
+        :rtype: None
+        """
+        command = (name, tuple(self.encode(a) for a in args),
+                   tuple(sorted((k, self.encode(v)) for k, v in (kwargs or {}).items())))
+        self.commands.append(command)
+        self.hashes.append(hash((self.hashes[-1], command)))
+
+    @staticmethod
+    def encode(value):
+        """
+        In class usage only, turn an argument into hashable plain values
+        """
+        if isinstance(value, Point):
+            color = None if value.color is None else value.color.getRGB()
+            texture = None if value.texture is None else tuple(value.texture)
+            return "Point", tuple(int(c) for c in value.coords), color, texture
+        if isinstance(value, VertexBatch):
+            uv = None if value.uv is None else value.uv.tobytes()
+            return "VertexBatch", value.xy.tobytes(), value.rgb.tobytes(), uv
+        if isinstance(value, (list, tuple)):
+            return "list", tuple(DisplayList.encode(v) for v in value)
+        if isinstance(value, np.ndarray):
+            return "ndarray", value.dtype.str, value.shape, value.tobytes()
+        return value
+
+    @staticmethod
+    def decode(value):
+        """
+        In class usage only, rebuild an argument encoded by encode
+        """
+        if not isinstance(value, tuple):
+            return value
+        kind = value[0]
+        if kind == "Point":
+            _, coords, color, texture = value
+            return Point(coords, None if color is None else ColorType(*color), texture)
+        if kind == "VertexBatch":
+            _, xy, rgb, uv = value
+            return VertexBatch(np.frombuffer(xy, dtype=np.int32), np.frombuffer(rgb, dtype=np.float32),
+                               None if uv is None else np.frombuffer(uv, dtype=np.float32))
+        if kind == "list":
+            return [DisplayList.decode(v) for v in value[1]]
+        _, dtype, shape, data = value
+        return np.frombuffer(data, dtype=dtype).reshape(shape)
+
+    def replay(self, sketch, buff, start=0, stop=None):
+        """
+        Draw commands[start:stop] on buff with the drawing methods and current backends of sketch. Nothing is recorded.
+        Primitives the commands collected for tiled rasterization are drawn before it returns.
+
+        :param sketch: the sketch whose methods draw the commands
+        :type sketch: Sketch
+        :param buff: the buff to draw on, of any size
+        :type buff: Buff
+        :rtype: None
+        """
+        sketch.drawDepth += 1
+        try:
+            for name, args, kwargs in self.commands[start:stop]:
+                getattr(sketch, name)(buff, *[self.decode(a) for a in args],
+                                      **{k: self.decode(v) for k, v in kwargs})
+            sketch.flushTiles()
+        finally:
+            sketch.drawDepth -= 1
+
+    @staticmethod
+    def cacheKey(prefixHash, length, buff, state):
+        """
+        In class usage only, the cache key of the first length commands rasterized on buff
+        """
+        return prefixHash, length, buff.width, buff.height, buff.background_color.getRGB(), state
+
+    def render(self, sketch, buff, cache, state=()):
+        """
+        Make buff show the whole display list from a cleared buff. The longest prefix of the list found in cache is
+        copied, only the commands after it are rasterized, and the result is added to cache.
+
+        :param sketch: the sketch whose methods draw the commands
+        :type sketch: Sketch
+        :param buff: the buff to draw on
+        :type buff: Buff
+        :param cache: rasterized display lists
+        :type cache: DisplayListCache
+        :param state: anything else changing the pixels, e.g. the selected backends
+        :type state: tuple
+        :return: number of commands rasterized
+        :rtype: int
+        """
+        start, pixels = len(self.commands), None
+        while start > 0:
+            pixels = cache.get(self.cacheKey(self.hashes[start], start, buff, state))
+            if pixels is not None:
+                break
+            start -= 1
+        buff.clear()
+        if pixels is not None:
+            buff.buff[...] = pixels
+        if start < len(self.commands):
+            self.replay(sketch, buff, start)
+            buff.resolve()
+            cache.put(self.cacheKey(self.hashes[-1], len(self.commands), buff, state), buff.buff.copy())
+        return len(self.commands) - start
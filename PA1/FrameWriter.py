@@ -0,0 +1,227 @@
+"""
+Defines FrameWriter class, which streams successive frames of a Buff to disk from background threads. write() only
+copies the frame into a recycled array and queues it, the encoding and file writing happen in the writer threads, so
+rendering goes on while earlier frames are compressed. The queue is bounded: when the writers fall behind by queueSize
+frames, write() waits for one of them instead of growing memory.
+
+Output is either a numbered image sequence, e.g. "frames/frame%05d.png" (any format of Buff.writeImage), or one raw
+RGB stream of all frames without headers, e.g. "out.rgb" or "-" for stdout, to be piped into an external encoder::
+
+    python render.py | ffmpeg -f rawvideo -pixel_format rgb24 -video_size 1920x1080 -i - out.mp4
+
+:author: Mutiraj Laksanawisit
+"""
+
+import sys
+import time
+import queue
+import threading
+
+import numpy as np
+
+from Buff import Buff
+
+
+class FrameWriter:
+    """
+    Background writer of a frame sequence
+
+    * path(str): image path pattern with one integer field, a .rgb path, or "-" for a raw RGB stream to stdout
+    * queueSize(int): frames waiting to be written at most
+    * threads(int): writer threads. Frames of an image sequence are encoded in parallel, a raw stream uses one thread
+      to keep the frame order.
+    * params(dict): format options passed to Pillow, e.g. compress_level for PNG
+    * frames(int): number of frames given to write
+    * blockedSeconds(float): time write spent waiting for the writers, 0 as long as they keep up
+    * closed(bool): set by close, frames can't be written after it
+    """
+    path = None
+    queueSize = 4
+    threads = 1
+    params = None
+    frames = 0
+    blockedSeconds = 0.0
+    closed = False
+    raw = False
+    shape = None
+    error = None
+    stream = None
+    pending = None
+    free = None
+    allocated = 0
+    workers = None
+
+    def __init__(self, path, queueSize=4, threads=1, **params):
+        """
+        :param path: image path pattern with one integer field (e.g. "frame%05d.png"), a .rgb path, or "-"
+        :type path: str
+        :param queueSize: frames waiting to be written at most
+        :type queueSize: int
+        :param threads: writer threads for an image sequence
+        :type threads: int
+        :param params: format options passed to Pillow. PNG defaults to compress_level=1, which is several times
+                       faster to encode than the Pillow default and still lossless.
+        :rtype: None
+        """
+        if queueSize < 1 or threads < 1:
+            raise ValueError("queueSize and threads must be at least 1")
+        self.path = path
+        self.queueSize = queueSize
+        self.raw = path == "-" or path.lower().endswith(".rgb")
+        if not self.raw:
+            try:
+                path % 0
+            except TypeError:
+                raise ValueError("image sequence path needs one integer field, e.g. frame%05d.png")
+        self.threads = 1 if self.raw else threads
+        self.params = params
+        if path.lower().endswith(".png"):
+            self.params.setdefault("compress_level", 1)
+        self.frames = 0
+        self.blockedSeconds = 0.0
+        self.closed = False
+        self.shape = None
+        self.error = None
+
+        if path == "-":
+            self.stream = sys.stdout.buffer
+        elif self.raw:
+            self.stream = open(path, "wb")
+        else:
+            self.stream = None
+        # frames in flight and recycled frame arrays, together never more than queueSize + threads arrays
+        self.pending = queue.Queue(queueSize)
+        self.free = queue.Queue()
+        self.allocated = 0
+        self.workers = [threading.Thread(target=self._work, daemon=True) for _ in range(self.threads)]
+        for worker in self.workers:
+            worker.start()
+
+    def write(self, buff):
+        """
+        Queue the current pixels of buff as the next frame. buff can be drawn on again as soon as this returns.
+
+        :param buff: the frame
+        :type buff: Buff
+        :rtype: None
+        """
+        if self.closed:
+            raise ValueError("write to a closed FrameWriter")
+        if self.error is not None:
+            raise self.error
+        shape = (buff.height, buff.width, 3)
+        if self.shape is None:
+            self.shape = shape
+        elif shape != self.shape:
+            if self.raw:
+                raise ValueError("frames of a raw stream must all have the same size")
+            self.shape = shape
+        frame = self._frame()
+        buff.imageArray(frame)
+        t1 = time.perf_counter()
+        self.pending.put((self.frames, frame))
+        self.blockedSeconds += time.perf_counter() - t1
+        self.frames += 1
+
+    def _frame(self):
+        """
+        In class usage only, a frame array of the current size, recycled when possible
+        """
+        while True:
+            try:
+                frame = self.free.get_nowait()
+            except queue.Empty:
+                if self.allocated < self.queueSize + self.threads:
+                    self.allocated += 1
+                    return np.empty(self.shape, dtype=np.uint8)
+                t1 = time.perf_counter()
+                frame = self.free.get()
+                self.blockedSeconds += time.perf_counter() - t1
+            if frame.shape == self.shape:
+                return frame
+            # frame of an older size, replaced by a new one
+            self.allocated -= 1
+
+    def _work(self):
+        """
+        In class usage only, writer thread loop
+        """
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            index, frame = item
+            try:
+                if self.error is None:
+                    if self.raw:
+                        self.stream.write(memoryview(frame).cast("B"))
+                    else:
+                        Buff.writeImage(frame, self.path % index, **self.params)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.free.put(frame)
+
+    def close(self):
+        """
+        Wait until all queued frames are written and stop the writer threads. An error of a writer is raised here.
+
+        :rtype: None
+        """
+        self.closed = True
+        if self.workers:
+            for _ in self.workers:
+                self.pending.put(None)
+            for worker in self.workers:
+                worker.join()
+            self.workers = []
+            if self.stream is not None:
+                self.stream.flush()
+                if self.stream is not sys.stdout.buffer:
+                    self.stream.close()
+        if self.error is not None:
+            raise self.error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+
+    os.environ["PA1_HEADLESS"] = "1"
+    from HeadlessRender import createSketch, renderTestCase
+
+    # a 1080p frame of a test case, the content matters for the PNG compression speed
+    sketch = createSketch(1920, 1080)
+    renderTestCase(sketch, "testCaseTri02", 48)
+    n = 30
+
+    with tempfile.TemporaryDirectory() as folder:
+        t1 = time.perf_counter()
+        for i in range(3):
+            sketch.buff.save(os.path.join(folder, "single.png"))
+        print("Buff.save 1080p png: %.1f ms per frame" % ((time.perf_counter() - t1) / 3 * 1000))
+
+        for name, threads, params in (("frame%03d.png", 1, {}), ("frame%03d.png", 4, {}),
+                                      ("frame%03d.png", 4, {"compress_level": 6}), ("frame%03d.ppm", 1, {}),
+                                      ("stream.rgb", 1, {})):
+            t1 = time.perf_counter()
+            writer = FrameWriter(os.path.join(folder, name), threads=threads, **params)
+            for i in range(n):
+                writer.write(sketch.buff)
+            t2 = time.perf_counter()
+            writer.close()
+            t3 = time.perf_counter()
+            print("%-14s %d thread(s) %-22s %6.1f frames/s written, write() %5.2f ms per frame, %4.0f%% blocked"
+                  % (name, threads, params or "", n / (t3 - t1), (t2 - t1) / n * 1000,
+                     writer.blockedSeconds / (t3 - t1) * 100))
+
+        try:
+            writer.write(sketch.buff)
+        except ValueError as e:
+            print("write after close:", e)
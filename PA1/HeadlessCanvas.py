@@ -0,0 +1,95 @@
+"""
+A stand-in for CanvasBase without any window. It keeps the same public variables and methods for drawing (buff,
+buff_last, points_l, points_r, clear, pixel scale), but nothing is displayed, so Sketch and all rasterizers can run on
+machines without wxPython or OpenGL. Sketch uses it as base class when wxPython is not available, or when environment
+variable PA1_HEADLESS is set to a non-zero value.
+
+:author: Mutiraj Laksanawisit
+"""
+
+from Buff import Buff
+from ColorType import ColorType
+
+
+class HeadlessCanvas:
+    """
+    Offscreen canvas with a fixed size buff. Window events never happen, so interrupt methods are only called if the
+    user calls them.
+    """
+    DEFAULT_SIZE = (500, 500)
+
+    __pixelScale = 1
+
+    points_r = None
+    points_l = None
+
+    buff = None
+    buff_last = None
+    size = None
+
+    def __init__(self, parent=None):
+        """
+        :param parent: canvas size as (width, height), or None for DEFAULT_SIZE. This takes the place of the wx.Frame
+                       of CanvasBase, so that Sketch(parent) works in both modes.
+        :type parent: tuple[int, int]
+        """
+        if parent is None:
+            parent = self.DEFAULT_SIZE
+        width, height = parent
+        self.size = (width, height)
+        self.points_r = []
+        self.points_l = []
+        self.buff = Buff(width, height, ColorType(0, 0, 0))
+        self.buff_last = self.buff.copy()
+
+    def setPixelScale(self, size):
+        if (not isinstance(size, int)) or size < 1:
+            raise TypeError("PixelScale can only accept integer >= 1")
+        self.__pixelScale = size
+
+    def getPixelScale(self):
+        return self.__pixelScale
+
+    def clear(self):
+        """
+        clear display buff, but save last frame to buff_last
+        """
+        self.buff_last = self.buff.copyTo(self.buff_last)
+        self.buff.clear()
+        self.points_l.clear()
+        self.points_r.clear()
+
+    def resize(self, width, height):
+        """
+        Same as a window resize in CanvasBase, store last frame to buff_last and resize buff
+
+        :param width: new canvas width
+        :type width: int
+        :param height: new canvas height
+        :type height: int
+        """
+        self.size = (width, height)
+        self.buff_last = self.buff.copyTo(self.buff_last)
+        self.buff.resize(width, height)
+        self.Interrupt_Resize(width, height)
+
+    def Refresh(self, eraseBackground=True):
+        pass
+
+    def Update(self):
+        pass
+
+    def Interrupt_MouseL(self, x, y):
+        raise NotImplementedError("Mouse Left interrupt not implemented yet")
+
+    def Interrupt_MouseR(self, x, y):
+        raise NotImplementedError("Mouse Right interrupt not implemented yet")
+
+    def Interrupt_Keyboard(self, keycode):
+        raise NotImplementedError("keyboard interrupt not implemented yet")
+
+    def Interrupt_Resize(self, width, height):
+        """
+        Called after buff is resized to width x height. Pixels drawn before are kept where they fit.
+        """
+        pass
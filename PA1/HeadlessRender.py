@@ -0,0 +1,136 @@
+"""
+Command line entry to render Sketch test cases offscreen, without wxPython or OpenGL, and write the result to an image.
+
+Example::
+
+    python HeadlessRender.py testCaseTri02 --size 1000 800 --aa 4 --steps 48 -o tri02.png
+    python HeadlessRender.py testCaseTri02 --size 2000 2000 --processes 4
+    python HeadlessRender.py --list
+
+Output format follows the file extension: .ppm is written directly, any other extension (.png, .jpg, ...) is written
+with Pillow.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import os
+import sys
+import time
+import argparse
+
+# Importing Sketch after this keeps wx and OpenGL out, even when they are installed
+os.environ["PA1_HEADLESS"] = "1"
+
+from Sketch import Sketch
+
+# The default texture sits next to this file, so rendering works from any working directory
+_TEXTURE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "pattern.jpg")
+
+
+def testCaseNames():
+    """
+    :return: names of all test case methods of Sketch
+    :rtype: list[str]
+    """
+    return sorted(name for name in dir(Sketch) if name.startswith("testCase"))
+
+
+def createSketch(width, height, aaLevel=1, useScanlineFill=True, processes=None):
+    """
+    Construct an offscreen Sketch
+
+    :param width: canvas width
+    :type width: int
+    :param height: canvas height
+    :type height: int
+    :param aaLevel: anti-aliasing super sampling level, 1 turns anti-aliasing off
+    :type aaLevel: int
+    :param useScanlineFill: Control flag of the vectorized NumPy backends
+    :type useScanlineFill: bool
+    :param processes: number of worker processes of tiled rasterization (Sketch.useTiledRaster), None for no tiles
+    :type processes: int
+    :rtype: Sketch
+    """
+    if not os.path.isfile(Sketch.texture_file_path):
+        Sketch.texture_file_path = _TEXTURE_PATH
+    sketch = Sketch((width, height))
+    sketch.doAA = aaLevel > 1
+    sketch.doAAlevel = aaLevel
+    sketch.useScanlineFill = useScanlineFill
+    sketch.useTiledRaster = processes is not None
+    sketch.tiledProcesses = processes
+    return sketch
+
+
+def renderTestCase(sketch, name, n_steps):
+    """
+    Clear the canvas and draw one test case on it, in the same way as switching test cases in the window
+
+    :param sketch: the offscreen Sketch
+    :type sketch: Sketch
+    :param name: test case method name, e.g. testCaseTri01
+    :type name: str
+    :param n_steps: step count passed to the test case
+    :type n_steps: int
+    :return: seconds spent drawing, including the anti-aliasing resolve
+    :rtype: float
+    """
+    if name not in testCaseNames():
+        raise ValueError("Unknown test case " + name + ", choose from " + ", ".join(testCaseNames()))
+    sketch.clear()
+    t1 = time.perf_counter()
+    sketch.drawTiled(getattr(sketch, name), n_steps)
+    sketch.buff.resolve()
+    return time.perf_counter() - t1
+
+
+def writeImage(buff, path):
+    """
+    Write buff to an image file, same as buff.save(path)
+
+    :param buff: the buff to write
+    :type buff: Buff
+    :param path: output file path, .ppm or any format Pillow can write
+    :type path: str
+    :rtype: None
+    """
+    buff.save(path)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render a PA1 test case offscreen and write it to an image")
+    parser.add_argument("testCase", nargs="?", help="test case method name, e.g. testCaseTri01")
+    parser.add_argument("-o", "--output", help="output image, .png or .ppm (default: <testCase>.png)")
+    parser.add_argument("--size", type=int, nargs=2, default=[500, 500], metavar=("WIDTH", "HEIGHT"),
+                        help="canvas size (default: 500 500)")
+    parser.add_argument("--aa", type=int, default=1, help="anti-aliasing super sampling level, 1 for off (default: 1)")
+    parser.add_argument("--steps", type=int, default=Sketch.n_steps,
+                        help="n_steps of the test case (default: %d)" % Sketch.n_steps)
+    parser.add_argument("--loop", action="store_true", help="draw with the per pixel loops instead of NumPy backends")
+    parser.add_argument("--processes", type=int, metavar="N",
+                        help="rasterize on screen tiles with N worker processes (default: no tiles)")
+    parser.add_argument("--list", action="store_true", help="list test case names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list or args.testCase is None:
+        print("\n".join(testCaseNames()))
+        return 0
+    if args.testCase not in testCaseNames():
+        parser.error("unknown test case " + args.testCase + ", use --list to see all test cases")
+    if args.aa < 1:
+        parser.error("--aa must be >= 1")
+    if args.processes is not None and args.processes < 1:
+        parser.error("--processes must be >= 1")
+
+    sketch = createSketch(args.size[0], args.size[1], args.aa, not args.loop, args.processes)
+    seconds = renderTestCase(sketch, args.testCase, args.steps)
+    output = args.output or args.testCase + ".png"
+    sketch.closeTiledRaster()
+    writeImage(sketch.buff, output)
+    print("%s: %dx%d, aa %d, n_steps %d, %.3f s -> %s"
+          % (args.testCase, args.size[0], args.size[1], args.aa, args.steps, seconds, output))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
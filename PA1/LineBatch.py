@@ -0,0 +1,208 @@
+"""
+Batched Bresenham line rasterization. Thousands of lines are turned into pixel coordinates and colors with a few NumPy
+operations, and written into a Buff with one fancy-indexed write per group of lines. Pixels are the same as
+Sketch.drawLine without anti-aliasing.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import numpy as np
+
+from ScanlineFill import ScanlineFill
+
+
+class LineBatch:
+    """
+    Static helpers to rasterize many lines at once.
+
+    Lines are given as starts (N x 2 int), ends (N x 2 int) and colors (N x 2 x 3 float in [0, 1]), where colors[i, 0]
+    is the color at starts[i] and colors[i, 1] is the color at ends[i].
+
+    * GROUP_PIXELS(int): pixels rasterized at once by draw. Small groups keep the temporary arrays in the CPU cache and
+      in memory the allocator reuses, instead of page faulting fresh memory for every group.
+    """
+    GROUP_PIXELS = 1 << 14
+    # scratch of _drawGroup holding the last write of every pixel, grow only like the pixels of Buff. Entries are
+    # written before they are read, so it is never cleared.
+    _owner = np.zeros(0, dtype=np.int32)
+
+    @staticmethod
+    def rasterize(starts, ends, colors, doSmooth=True, bounds=None):
+        """
+        Generate every pixel of every line, in drawing order.
+
+        :param starts: line start points, shape (N, 2)
+        :type starts: numpy.ndarray[int]
+        :param ends: line end points, shape (N, 2)
+        :type ends: numpy.ndarray[int]
+        :param colors: colors at both ends, shape (N, 2, 3)
+        :type colors: numpy.ndarray[float]
+        :param doSmooth: Control flag of color smooth interpolation, the end color is used if not set
+        :type doSmooth: bool
+        :param bounds: (width, height) of the target. Pixels outside along the major axis are not generated, pixels
+                       outside along the minor axis still are.
+        :type bounds: tuple[int, int]
+        :return: xs, ys and colors in shape (3, n)
+        """
+        xs, ys, lines, k, shading = LineBatch._walk(starts, ends, colors, bounds)
+        return xs, ys, LineBatch._shade(lines, k, shading, doSmooth)
+
+    @staticmethod
+    def _walk(starts, ends, colors, bounds=None):
+        """
+        In class usage only, the pixels of rasterize without their colors: xs, ys, the line and the major axis step k
+        of every pixel, and the per line values _shade needs
+        """
+        starts = np.asarray(starts, dtype=np.intp).reshape((-1, 2))
+        ends = np.asarray(ends, dtype=np.intp).reshape((-1, 2))
+        colors = np.asarray(colors, dtype=np.float64).reshape((-1, 2, 3))
+
+        # Always walk from left to right, in the same way as Sketch.drawLine
+        swap = starts[:, 0] > ends[:, 0]
+        p1 = np.where(swap[:, None], ends, starts)
+        p2 = np.where(swap[:, None], starts, ends)
+        dx = p2[:, 0] - p1[:, 0]
+        dy = p2[:, 1] - p1[:, 1]
+        shallow = np.abs(dy) <= dx
+        steepDown = dy < -dx
+
+        major = np.where(shallow, dx, np.abs(dy))
+        minor = np.where(shallow, np.abs(dy), dx)
+        # range of major axis steps k to generate, the major coordinate is base + k
+        kStart = np.zeros_like(major)
+        kStop = major + 1
+        if bounds is not None:
+            base = np.where(shallow, p1[:, 0], np.where(steepDown, p2[:, 1], p1[:, 1]))
+            limit = np.where(shallow, bounds[0], bounds[1])
+            kStart = np.clip(-base, 0, kStop)
+            kStop = np.maximum(np.minimum(kStop, limit - base), kStart)
+        counts = kStop - kStart
+        k = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts - kStart, counts)
+        n = ScanlineFill.bresenhamSteps(k, np.repeat(minor, counts), np.repeat(major, counts))
+
+        # x1 + k, y1 +- n for shallow lines; x1 + n, y1 + k for steep lines going up; x2 - n, y2 + k going down.
+        # Every case is base + kStep * k + nStep * n with per line coefficients.
+        steep = ~shallow
+        xs = np.repeat(np.where(steepDown, p2[:, 0], p1[:, 0]), counts)
+        xs += np.repeat(shallow, counts) * k
+        xs += np.repeat(np.where(steepDown, -1, steep), counts) * n
+        ys = np.repeat(np.where(steepDown, p2[:, 1], p1[:, 1]), counts)
+        ys += np.repeat(steep, counts) * k
+        ys += np.repeat(shallow * np.sign(dy), counts) * n
+
+        # Steep lines going down are interpolated from their lower end
+        reverse = (swap != steepDown)[:, None]
+        c1 = np.ascontiguousarray(np.where(reverse, colors[:, 1], colors[:, 0]).T)
+        c2 = np.ascontiguousarray(np.where(reverse, colors[:, 0], colors[:, 1]).T)
+        lines = np.repeat(np.arange(len(counts)), counts)
+        return xs, ys, lines, k, (c1, c2, np.maximum(major, 1).astype(np.float64), np.ascontiguousarray(colors[:, 1].T))
+
+    @staticmethod
+    def _shade(lines, k, shading, doSmooth):
+        """
+        In class usage only, colors in shape (3, n) of the pixels of _walk given by their lines and steps k
+        """
+        c1, c2, major, endColors = shading
+        # the per line colors are contiguous channels, np.take gathers them several times faster than fancy indexing
+        if not doSmooth:
+            return np.take(endColors, lines, axis=1)
+        # the walked distance over the major axis length is the smooth1D ratio of Sketch.drawLine
+        dist1 = k / np.take(major, lines)
+        values = np.take(c1, lines, axis=1)
+        values *= 1 - dist1
+        end = np.take(c2, lines, axis=1)
+        end *= dist1
+        values += end
+        return values
+
+    @staticmethod
+    def supersampled(starts, ends, colors, level):
+        """
+        Map lines to the subpixel grid of a SupersampleBuff. Along the major axis a line spans the full extent of its
+        end pixels, and it is thickened to one pixel (level subpixel lines) along the minor axis, so a line keeps the
+        one pixel width of the aliased version with fractional coverage on its sides.
+
+        :param starts: line start points in pixels, shape (N, 2)
+        :param ends: line end points in pixels, shape (N, 2)
+        :param colors: colors at both ends, shape (N, 2, 3)
+        :param level: supersampling level
+        :type level: int
+        :return: starts, ends and colors of the N * level subpixel lines
+        """
+        starts = np.asarray(starts, dtype=np.intp).reshape((-1, 2))
+        ends = np.asarray(ends, dtype=np.intp).reshape((-1, 2))
+        colors = np.asarray(colors, dtype=np.float64).reshape((-1, 2, 3))
+
+        # axis 0 is x, axis 1 is y
+        major = (np.abs(ends[:, 1] - starts[:, 1]) > np.abs(ends[:, 0] - starts[:, 0])).astype(np.intp)
+        rows = np.arange(len(starts))
+        forward = ends[rows, major] >= starts[rows, major]
+        subStarts = starts * level + level // 2
+        subEnds = ends * level + level // 2
+        # extend the major axis to the outer subpixels of both end pixels
+        subStarts[rows, major] = starts[rows, major] * level + np.where(forward, 0, level - 1)
+        subEnds[rows, major] = ends[rows, major] * level + np.where(forward, level - 1, 0)
+
+        offsets = np.arange(level) - level // 2
+        shift = np.zeros((len(starts), level, 2), dtype=np.intp)
+        shift[rows, :, 1 - major] = offsets
+        subStarts = (subStarts[:, None, :] + shift).reshape((-1, 2))
+        subEnds = (subEnds[:, None, :] + shift).reshape((-1, 2))
+        return subStarts, subEnds, np.repeat(colors, level, axis=0)
+
+    @staticmethod
+    def draw(buff, starts, ends, colors, doSmooth=True):
+        """
+        Draw all lines on buff. Where lines overlap, the later line wins, as if they were drawn one by one.
+        Lines are rasterized in groups of about GROUP_PIXELS pixels, drawn in order.
+
+        :param buff: The buff to edit, or the supersampling layer of a buff
+        :type buff: Buff or SupersampleBuff
+        :param starts: line start points, shape (N, 2)
+        :param ends: line end points, shape (N, 2)
+        :param colors: colors at both ends, shape (N, 2, 3)
+        :param doSmooth: Control flag of color smooth interpolation
+        :type doSmooth: bool
+        :rtype: None
+        """
+        starts = np.asarray(starts, dtype=np.intp).reshape((-1, 2))
+        ends = np.asarray(ends, dtype=np.intp).reshape((-1, 2))
+        colors = np.asarray(colors, dtype=np.float64).reshape((-1, 2, 3))
+        lengths = np.abs(ends - starts).max(axis=1) + 1
+        for start, stop in ScanlineFill.chunks(lengths, LineBatch.GROUP_PIXELS):
+            LineBatch._drawGroup(buff, starts[start:stop], ends[start:stop], colors[start:stop], doSmooth)
+
+    @staticmethod
+    def _drawGroup(buff, starts, ends, colors, doSmooth):
+        """
+        In class usage only, draw a group of lines with one write. Colors are only computed for the pixels written.
+        """
+        xs, ys, lines, k, shading = LineBatch._walk(starts, ends, colors, (buff.width, buff.height))
+        # a line stays in the bounding box of its ends, pixels are only outside when an end is
+        points = np.concatenate((starts, ends))
+        if points.min() < 0 or points[:, 0].max() >= buff.width or points[:, 1].max() >= buff.height:
+            inside = (xs >= 0) & (xs < buff.width) & (ys >= 0) & (ys < buff.height)
+            xs, ys, lines, k = xs[inside], ys[inside], lines[inside], k[inside]
+
+        # keep only the last write of every pixel, so the result does not depend on fancy-index write ordering
+        if xs.size == 0:
+            return
+        x0, y0 = xs.min(), ys.min()
+        width = xs.max() - x0 + 1
+        # pixel index in the bounding box of the group
+        index = (ys - y0) * width + (xs - x0)
+        area = (ys.max() - y0 + 1) * width
+        if LineBatch._owner.size < area:
+            LineBatch._owner = np.empty(max(area, 2 * LineBatch._owner.size), dtype=np.int32)
+        owner = LineBatch._owner
+        order = np.arange(xs.size, dtype=np.int32)
+        # Every pixel reads back its own write unless another write hit the same pixel, e.g. where lines cross. Only
+        # then the last write is searched, on top of entries that already hold one of their writes.
+        owner[index] = order
+        last = owner[index] == order
+        if last.all():
+            buff.setPixels(xs, ys, LineBatch._shade(lines, k, shading, doSmooth).T)
+            return
+        np.maximum.at(owner, index, order)
+        last = owner[index] == order
+        buff.setPixels(xs[last], ys[last], LineBatch._shade(lines[last], k[last], shading, doSmooth).T)
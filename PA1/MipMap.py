@@ -0,0 +1,220 @@
+"""
+Defines MipMap class, a texture pyramid for minified texture mapping. Level 0 is the texture, every next level halves
+the size with a 2 x 2 box filter, down to 1 x 1. Sampling is trilinear: the level of detail (LOD) is log2 of the number
+of level 0 texels covered by one pixel, the two nearest levels are sampled bilinearly and blended by the fraction of
+the LOD. Triangles covering fewer pixels than texels read a smaller level instead of skipping over the texture, so
+they neither alias nor touch the whole texture.
+
+Texture coordinates of all levels are given in level 0 texels, as for TextureSampler. Texel j of level L covers level
+0 texels j * 2^L to (j + 1) * 2^L - 1, so its center is at u = j * 2^L + (2^L - 1) / 2.
+
+The static helpers also give the screen space derivatives of perspective correct texture coordinates. Vertices carry
+(u / w, v / w, 1 / w), which are linear in screen space, and u, v are recovered per pixel by dividing by 1 / w.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import numpy as np
+
+from TextureSampler import TextureSampler
+
+
+class MipMap:
+    """
+    Texture pyramid with trilinear sampling
+
+    * levels(list[TextureSampler]): level 0 (the texture) to the 1 x 1 level, all in the same address mode
+    * width, height(int): level 0 size in texels
+    """
+    levels = None
+    width = None
+    height = None
+
+    def __init__(self, image, mode=TextureSampler.CLAMP):
+        """
+        :param image: level 0, same as the image of TextureSampler. Float32 texels are used without copying.
+        :type image: numpy.ndarray[uint8] or numpy.ndarray[float32]
+        :param mode: address mode, TextureSampler.CLAMP or TextureSampler.WRAP
+        :type mode: str
+        :rtype: None
+        """
+        level = TextureSampler(image, mode)
+        self.width, self.height = level.width, level.height
+        self.levels = [level]
+        texels = level.texels
+        while texels.shape[0] > 1 or texels.shape[1] > 1:
+            texels = self.reduce(texels)
+            self.levels.append(TextureSampler(texels, mode))
+
+    @staticmethod
+    def reduce(texels):
+        """
+        Halve a level with a 2 x 2 box filter. An odd size repeats its last row or column, so the next level has
+        ceil(size / 2) texels.
+
+        :param texels: level texels, shape (height, width, 3)
+        :type texels: numpy.ndarray[float32]
+        :rtype: numpy.ndarray[float32]
+        """
+        height, width = texels.shape[:2]
+        if height % 2 or width % 2:
+            texels = np.pad(texels, ((0, height % 2), (0, width % 2), (0, 0)), mode="edge")
+        blocks = texels.reshape((texels.shape[0] // 2, 2, texels.shape[1] // 2, 2, 3))
+        return blocks.mean(axis=(1, 3), dtype=np.float32)
+
+    def setMode(self, mode):
+        """
+        :param mode: address mode of all levels, TextureSampler.CLAMP or TextureSampler.WRAP
+        :type mode: str
+        :rtype: None
+        """
+        for level in self.levels:
+            level.setMode(mode)
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the texels of all levels, in bytes
+
+        :rtype: int
+        """
+        return sum(level.texels.nbytes for level in self.levels)
+
+    def sampleTrilinear(self, u, v, lod):
+        """
+        Sample every coordinate at its level of detail, blending the bilinear samples of the two nearest levels
+
+        :param u: horizontal texture coordinates in level 0 texels
+        :type u: numpy.ndarray[float]
+        :param v: vertical texture coordinates in level 0 texels, same shape as u
+        :type v: numpy.ndarray[float]
+        :param lod: level of detail of every coordinate, 0 or less samples level 0 only
+        :type lod: numpy.ndarray[float]
+        :return: colors in [0, 1], shape u.shape + (3,)
+        :rtype: numpy.ndarray[float32]
+        """
+        u = np.asarray(u, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        shape = u.shape
+        u, v = u.ravel(), v.ravel()
+        lod = np.clip(np.broadcast_to(lod, shape).ravel(), 0, len(self.levels) - 1)
+        base = np.floor(lod).astype(np.intp)
+        fraction = (lod - base).astype(np.float32)
+        if not base.any():
+            # no minification, the common case of a magnified texture costs one bilinear fetch
+            colors = self.levels[0].sampleBilinear(u, v)
+            mixed = np.flatnonzero(fraction)
+            if mixed.size:
+                colors[mixed] += (self._sampleLevel(1, u[mixed], v[mixed]) - colors[mixed]) * fraction[mixed, None]
+            return colors.reshape(shape + (3,))
+
+        colors = np.empty((u.size, 3), dtype=np.float32)
+        for level in np.unique(base).tolist():
+            index = np.flatnonzero(base == level)
+            colors[index] = self._sampleLevel(level, u[index], v[index])
+            mixed = index[fraction[index] > 0]
+            if mixed.size:
+                colors[mixed] += (self._sampleLevel(level + 1, u[mixed], v[mixed]) - colors[mixed]) * \
+                                 fraction[mixed, None]
+        return colors.reshape(shape + (3,))
+
+    def _sampleLevel(self, level, u, v):
+        """
+        In class usage only, bilinear sample of one level at level 0 texture coordinates
+        """
+        scale = 0.5 ** level
+        return self.levels[level].sampleBilinear((u + 0.5) * scale - 0.5, (v + 0.5) * scale - 0.5)
+
+    @staticmethod
+    def homogeneous(textureCoords):
+        """
+        Perspective divided texture coordinates of the triangle vertices. A vertex texture coordinate is (u, v), or
+        (u, v, w) with w the clip space w (depth) of the vertex, which is 1 for a flat on screen texture.
+
+        :param textureCoords: texture coordinates of the three vertices
+        :type textureCoords: list[list[float]]
+        :return: (u / w, v / w, 1 / w) of every vertex, shape (3, 3), and whether any w differs from 1
+        :rtype: tuple[numpy.ndarray[float], bool]
+        """
+        values = np.ones((3, 3), dtype=np.float64)
+        for i, coords in enumerate(textureCoords):
+            values[i, :len(coords)] = coords[:3]
+        w = values[:, 2].copy()
+        if np.any(w <= 0):
+            raise ValueError("texture coordinate w must be positive")
+        perspective = bool(np.any(w != 1))
+        values[:, :2] /= w[:, None]
+        values[:, 2] = 1 / w
+        return values, perspective
+
+    @staticmethod
+    def gradients(xs, ys, values):
+        """
+        Screen space gradients of values which are linear over a triangle
+
+        :param xs: vertex x coordinates
+        :type xs: list[int] or numpy.ndarray[int]
+        :param ys: vertex y coordinates
+        :type ys: list[int] or numpy.ndarray[int]
+        :param values: value of every vertex, shape (3, c)
+        :type values: numpy.ndarray[float]
+        :return: d/dx and d/dy of the values, each shape (c,). Zero for a zero area triangle.
+        :rtype: tuple[numpy.ndarray[float]]
+        """
+        xs = np.asarray(xs, dtype=np.float64)
+        ys = np.asarray(ys, dtype=np.float64)
+        area = (xs[1] - xs[0]) * (ys[2] - ys[0]) - (xs[2] - xs[0]) * (ys[1] - ys[0])
+        if area == 0:
+            return np.zeros(values.shape[1]), np.zeros(values.shape[1])
+        # the barycentric weight of vertex i changes by A_i / area along x and B_i / area along y
+        A = (ys[[1, 2, 0]] - ys[[2, 0, 1]]) / area
+        B = (xs[[2, 0, 1]] - xs[[1, 2, 0]]) / area
+        return A @ values, B @ values
+
+    @staticmethod
+    def lod(q, dqdx, dqdy):
+        """
+        Level of detail of perspective correct texture coordinates
+
+        :param q: interpolated (u / w, v / w, 1 / w), shape (3, n)
+        :type q: numpy.ndarray[float]
+        :param dqdx: d/dx of (u / w, v / w, 1 / w), shape (3,)
+        :type dqdx: numpy.ndarray[float]
+        :param dqdy: d/dy of (u / w, v / w, 1 / w), shape (3,)
+        :type dqdy: numpy.ndarray[float]
+        :return: log2 of the level 0 texels covered by a pixel along its longer axis, shape (n,)
+        :rtype: numpy.ndarray[float]
+        """
+        w = 1 / q[2]
+        u, v = q[0] * w, q[1] * w
+        # quotient rule: d(u) = (d(u / w) - u * d(1 / w)) * w
+        dudx, dvdx = (dqdx[0] - u * dqdx[2]) * w, (dqdx[1] - v * dqdx[2]) * w
+        dudy, dvdy = (dqdy[0] - u * dqdy[2]) * w, (dqdy[1] - v * dqdy[2]) * w
+        rho = np.maximum(dudx * dudx + dvdx * dvdx, dudy * dudy + dvdy * dvdy)
+        with np.errstate(divide="ignore"):
+            return 0.5 * np.log2(rho)
+
+
+if __name__ == "__main__":
+    import time
+
+    rng = np.random.default_rng(1)
+    image = rng.integers(0, 256, (1024, 1024, 3), dtype=np.uint8)
+    t1 = time.perf_counter()
+    mipmap = MipMap(image)
+    print("pyramid of %d levels: %.1f ms, %.2f x the level 0 memory"
+          % (len(mipmap.levels), (time.perf_counter() - t1) * 1000, mipmap.nbytes / mipmap.levels[0].texels.nbytes))
+
+    # a level of a constant texture is the same constant, and the last level is the mean of the texture
+    print("1 x 1 level is the mean:", np.allclose(mipmap.levels[-1].texels[0, 0], image.mean(axis=(0, 1)) / 255,
+                                                  atol=1e-4))
+
+    # a 1024 texels wide texture drawn over 64 pixels: every pixel covers 16 texels, LOD 4
+    n = 64
+    u = (np.arange(n) + 0.5) * 16 - 0.5
+    v = np.full(n, 519.5)
+    full = mipmap.levels[0].sampleBilinear(u, v)
+    filtered = mipmap.sampleTrilinear(u, v, np.full(n, 4.0))
+    truth = image[512:528].reshape((16, n, 16, 3)).mean(axis=(0, 2)) / 255
+    print("error against the 16 x 16 texel average: level 0 bilinear %.3f, trilinear %.3f"
+          % (np.abs(full - truth).mean(), np.abs(filtered - truth).mean()))
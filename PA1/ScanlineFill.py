@@ -0,0 +1,645 @@
+"""
+Vectorized scanline fill backend for triangles. It produces the same pixels as the Bresenham based
+Sketch.findLineBoundary/drawTriangle pipeline (without anti-aliasing), but every edge and every span is computed with
+NumPy arrays instead of per pixel Point and ColorType objects.
+
+The Bresenham loops in Sketch have a closed form: for a line whose major axis has length `major` and minor axis has
+length `minor`, the minor coordinate has been stepped ceil((2 * minor * k - major) / (2 * major)) times at the k-th
+major step. This lets a whole edge be generated in one shot.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import numpy as np
+
+from MipMap import MipMap
+from TextureSampler import TextureSampler
+
+
+class ScanlineFill:
+    """
+    Static helpers to rasterize triangles with NumPy row segments.
+
+    Edge tables are returned as a tuple (lx, lval, rx, rval), where lx and rx are the leftmost and rightmost x of every
+    scanline from the lowest y of the edge upwards, and lval and rval are the interpolated colors (or texture
+    coordinates) at those x. lval and rval are None if no value interpolation is requested.
+    Interpolated values are stored channel first, in shape (c, n), to keep per channel operations contiguous.
+
+    * MAX_PIXELS(int): pixels expanded at once. Larger primitives are written in blocks of rows to bound memory.
+    * FIXED_BITS(int): fraction bits of the fixed point span interpolation, 16 for 16.16 numbers
+    * STEP_BITS(int): extra fraction bits of the fixed point steps, so the error does not grow with the span length
+    """
+    MAX_PIXELS = 1 << 20
+    FIXED_BITS = 16
+    STEP_BITS = 8
+
+    @staticmethod
+    def chunks(sizes, budget):
+        """
+        Split consecutive items into ranges of about budget total size. An item larger than budget gets its own range.
+
+        :param sizes: size of every item
+        :type sizes: numpy.ndarray[int]
+        :param budget: maximum total size of a range, unless it has only one item
+        :type budget: int
+        :return: (start, stop) index ranges in order
+        :rtype: list[tuple[int, int]]
+        """
+        ends = np.cumsum(sizes)
+        if len(ends) == 0 or ends[-1] <= budget:
+            return [(0, len(ends))]
+        # an item joins the range of the budget block where it starts
+        block = (ends - sizes) // budget
+        splits = np.flatnonzero(block[1:] != block[:-1]) + 1
+        bounds = [0] + splits.tolist() + [len(ends)]
+        return list(zip(bounds[:-1], bounds[1:]))
+
+    @staticmethod
+    def bresenhamSteps(k, minor, major):
+        """
+        Number of minor axis steps taken by the Bresenham loop after k major axis steps
+
+        :param k: major axis step indices
+        :type k: numpy.ndarray[int]
+        :param minor: absolute length of the minor axis
+        :type minor: int or numpy.ndarray[int]
+        :param major: absolute length of the major axis
+        :type major: int or numpy.ndarray[int]
+        :rtype: numpy.ndarray[int]
+        """
+        major = np.maximum(major, 1)
+        return np.maximum(0, -((major - 2 * minor * k) // (2 * major)))
+
+    @staticmethod
+    def lerp(v1, v2, l, m, r):
+        """
+        Vectorized version of Sketch.smooth1D/smoothTexture1D. The operation order is kept the same, so that results are
+        bit identical with the per pixel version. Positions must satisfy l <= r, and m == l wherever l == r, in which
+        case v1 is returned.
+
+        :param v1: value at l, shape (c,) or (c, n)
+        :param v2: value at r, shape (c,) or (c, n)
+        :param l: left position
+        :param m: queried positions, shape (n,)
+        :param r: right position
+        :return: interpolated values, shape (c, n)
+        :rtype: numpy.ndarray[float]
+        """
+        v1 = np.asarray(v1, dtype=np.float64)
+        v2 = np.asarray(v2, dtype=np.float64)
+        if v1.ndim == 1:
+            v1 = v1[:, None]
+        if v2.ndim == 1:
+            v2 = v2[:, None]
+        # v1 * 1.0 + v2 * 0.0 is exactly v1, so l == r needs no special case beyond avoiding the division by zero
+        dist1 = (m - l) / np.maximum(np.asarray(r) - l, 1)
+        dist2 = 1 - dist1
+        result = v1 * dist2
+        result += v2 * dist1
+        return result
+
+    @staticmethod
+    def linePixels(p1, p2, values=None):
+        """
+        Generate all pixels visited by the Bresenham loop between p1 and p2, in loop order.
+
+        :param p1: One end point of the line, (x, y)
+        :type p1: tuple[int]
+        :param p2: Another end point of the line, (x, y)
+        :type p2: tuple[int]
+        :param values: optional (value at p1, value at p2) to interpolate along the line
+        :return: xs, ys and interpolated values (or None)
+        """
+        (x1, y1), (x2, y2) = p1, p2
+        if values is not None:
+            v1, v2 = values
+        else:
+            v1 = v2 = None
+        if x1 > x2:
+            x1, y1, x2, y2 = x2, y2, x1, y1
+            v1, v2 = v2, v1
+        dx = x2 - x1
+        dy = y2 - y1
+
+        if -dx <= dy <= dx:
+            k = np.arange(dx + 1)
+            xs = x1 + k
+            n = ScanlineFill.bresenhamSteps(k, abs(dy), dx)
+            ys = y1 + n if dy >= 0 else y1 - n
+            vals = None if v1 is None else ScanlineFill.lerp(v1, v2, x1, xs, x2)
+        elif dy > 0:
+            k = np.arange(dy + 1)
+            xs = x1 + ScanlineFill.bresenhamSteps(k, dx, dy)
+            ys = y1 + k
+            vals = None if v1 is None else ScanlineFill.lerp(v1, v2, y1, ys, y2)
+        else:
+            k = np.arange(-dy + 1)
+            xs = x2 - ScanlineFill.bresenhamSteps(k, dx, -dy)
+            ys = y2 + k
+            vals = None if v1 is None else ScanlineFill.lerp(v2, v1, y2, ys, y1)
+        return xs, ys, vals
+
+    @staticmethod
+    def edgeBoundary(p1, p2, values=None):
+        """
+        Vectorized Sketch.findLineBoundary without anti-aliasing.
+
+        :param p1: One end point of the edge, (x, y)
+        :type p1: tuple[int]
+        :param p2: Another end point of the edge, (x, y)
+        :type p2: tuple[int]
+        :param values: optional (value at p1, value at p2) to interpolate along the edge
+        :return: edge table (lx, lval, rx, rval), rows ordered by ascending y
+        """
+        xs, ys, vals = ScanlineFill.linePixels(p1, p2, values)
+        # ys is monotonic in loop order, so every scanline is one contiguous run of pixels
+        change = ys[1:] != ys[:-1]
+        first = np.concatenate(([True], change))
+        last = np.concatenate((change, [True]))
+        lx, rx = xs[first], xs[last]
+        lval = None if vals is None else vals[:, first]
+        rval = None if vals is None else vals[:, last]
+        if ys[0] > ys[-1]:
+            lx, rx = lx[::-1], rx[::-1]
+            if vals is not None:
+                lval, rval = lval[:, ::-1], rval[:, ::-1]
+        return lx, lval, rx, rval
+
+    @staticmethod
+    def sharedEdgeBoundary(edgeTable, ids, p1, p2, values=None):
+        """
+        edgeBoundary of an edge of a mesh, computed once per vertex pair. The edge table of a Bresenham line does not
+        depend on the direction it is drawn in, so triangles sharing the edge get the same boundary and no gap or
+        overlap can appear between them.
+
+        :param edgeTable: edge tables of the mesh keyed by (smaller vertex index, larger vertex index), or None to not
+                          share edges
+        :type edgeTable: dict
+        :param ids: mesh vertex indices of p1 and p2
+        :type ids: tuple[int, int]
+        :param p1: One end point of the edge, (x, y)
+        :type p1: tuple[int]
+        :param p2: Another end point of the edge, (x, y)
+        :type p2: tuple[int]
+        :param values: optional (value at p1, value at p2) to interpolate along the edge
+        :return: edge table (lx, lval, rx, rval), shared with the other triangles of the edge, must not be modified
+        """
+        if edgeTable is None:
+            return ScanlineFill.edgeBoundary(p1, p2, values)
+        key = (ids[0], ids[1]) if ids[0] < ids[1] else (ids[1], ids[0])
+        edge = edgeTable.get(key)
+        if edge is None:
+            edge = ScanlineFill.edgeBoundary(p1, p2, values)
+            edgeTable[key] = edge
+        return edge
+
+    @staticmethod
+    def textureCoords(texture, xy):
+        """
+        Texture coordinates for the triangle vertices, the triangle bounding box is scaled to fit in the texture.
+
+        :param texture: the texture
+        :type texture: TextureSampler
+        :param xy: (x, y) of the three vertices
+        :type xy: list[tuple[int]]
+        :rtype: list[list[float]]
+        """
+        xs = [c[0] for c in xy]
+        ys = [c[1] for c in xy]
+        bound_l, bound_d = min(xs), min(ys)
+        bound_width = max(xs) - bound_l
+        bound_height = max(ys) - bound_d
+
+        scales = []
+        if bound_width != 0:
+            scales.append((texture.width - 1) / bound_width)
+        if bound_height != 0:
+            scales.append((texture.height - 1) / bound_height)
+        scale = min(scales) if scales else 0
+        return [[(texture.width - 1) / 2 + (c[0] - bound_l - bound_width / 2) * scale,
+                 (texture.height - 1) / 2 + (c[1] - bound_d - bound_height / 2) * scale]
+                for c in xy]
+
+    @staticmethod
+    def pointArrays(p1, p2, p3, textureCoords=None):
+        """
+        The vertex arrays of a triangle of Points, as taken by fillTriangleArrays. Texture coordinates are
+        textureCoords if given, else the textures of the points if all of them have one, else None.
+
+        :return: xy, rgb and texture coordinates
+        :rtype: tuple
+        """
+        points = (p1, p2, p3)
+        if textureCoords is None and all(p.texture is not None for p in points):
+            textureCoords = [p.texture for p in points]
+        rgb = [(0, 0, 0) if p.color is None else p.color.getRGB() for p in points]
+        return [p.coords for p in points], rgb, textureCoords
+
+    @staticmethod
+    def textureValues(texture, xy, textureCoords=None):
+        """
+        Values to interpolate over a textured triangle. Texture coordinates are textureCoords if given, else the
+        bounding box fit of textureCoords.
+        A texture coordinate (u, v, w) with w != 1 makes the triangle perspective correct: (u / w, v / w, 1 / w) are
+        interpolated instead of (u, v).
+
+        :param texture: the texture
+        :type texture: TextureSampler or MipMap
+        :param xy: (x, y) of the three vertices
+        :type xy: list[tuple[int]]
+        :param textureCoords: texture coordinates of the vertices in texels, optionally with w
+        :type textureCoords: list[list[float]] or numpy.ndarray[float]
+        :return: values of every vertex, shape (3, 2) or (3, 3) if perspective correct
+        :rtype: numpy.ndarray[float]
+        """
+        if textureCoords is None:
+            textureCoords = ScanlineFill.textureCoords(texture, xy)
+        values, perspective = MipMap.homogeneous(textureCoords)
+        return values if perspective else values[:, :2]
+
+    @staticmethod
+    def textureLod(values, dvdx, dvdy):
+        """
+        Level of detail of interpolated texture values
+
+        :param values: values from textureValues at the queried pixels, shape (2, n) or (3, n)
+        :type values: numpy.ndarray[float]
+        :param dvdx: d/dx of the values over the triangle, shape (2,) or (3,)
+        :type dvdx: numpy.ndarray[float]
+        :param dvdy: d/dy of the values over the triangle, shape (2,) or (3,)
+        :type dvdy: numpy.ndarray[float]
+        :rtype: numpy.ndarray[float]
+        """
+        if len(values) == 2:
+            # affine mapping, 1 / w is 1 everywhere
+            values = np.vstack((values, np.ones((1, values.shape[1]))))
+            dvdx, dvdy = np.append(dvdx, 0), np.append(dvdy, 0)
+        return MipMap.lod(values, dvdx, dvdy)
+
+    @staticmethod
+    def sampleTexture(texture, values, lod=None):
+        """
+        Sample the texture at interpolated texture values
+
+        :param texture: the texture
+        :type texture: TextureSampler or MipMap
+        :param values: values from textureValues, shape (2, n) or (3, n)
+        :type values: numpy.ndarray[float]
+        :param lod: level of detail of every value, for a MipMap. Without it a MipMap is sampled at level 0.
+        :type lod: numpy.ndarray[float]
+        :return: colors, shape (n, 3)
+        :rtype: numpy.ndarray[float32]
+        """
+        if len(values) == 3:
+            u, v = values[0] / values[2], values[1] / values[2]
+        else:
+            u, v = values[0], values[1]
+        if isinstance(texture, MipMap):
+            if lod is None:
+                return texture.levels[0].sampleBilinear(u, v)
+            return texture.sampleTrilinear(u, v, lod)
+        return texture.sampleBilinear(u, v)
+
+    @staticmethod
+    def fixedSpans(lv, rv, counts, scale):
+        """
+        Start values and per pixel steps of spans as int32 fixed point numbers, for a DDA along every span. Only this
+        per span setup uses floats.
+
+        :param lv: values at the left end of every span, shape (c, rows)
+        :type lv: numpy.ndarray[float]
+        :param rv: values at the right end of every span, shape (c, rows)
+        :type rv: numpy.ndarray[float]
+        :param counts: number of pixels of every span
+        :type counts: numpy.ndarray[int]
+        :param scale: values are multiplied by scale before conversion, e.g. 255 to get 8 bits colors
+        :type scale: float
+        :return: start, step and the STEP_BITS bits of the step below its last fixed point bit, all shape (rows, c),
+                 or None if the values or their differences don't fit in int32
+        :rtype: tuple[numpy.ndarray[int32]]
+        """
+        lv, rv = lv.T, rv.T
+        counts = counts[:, None]
+        one = scale * (1 << ScanlineFill.FIXED_BITS)
+        # start + offset * step is summed in int32, so the span ends and their difference must all fit
+        if lv.size and max(np.abs(lv).max(), np.abs(rv).max(), np.abs(rv - lv).max()) * one >= (1 << 31) - 1:
+            return None
+        start = np.rint(lv * one)
+        step = np.rint((rv - lv) * one / np.maximum(counts - 1, 1) * (1 << ScanlineFill.STEP_BITS)).astype(np.int64)
+        stepFraction = step & ((1 << ScanlineFill.STEP_BITS) - 1)
+        return start.astype(np.int32), (step >> ScanlineFill.STEP_BITS).astype(np.int32), stepFraction.astype(np.int32)
+
+    @staticmethod
+    def fixedValues(start, step, stepFraction, rows, offsets):
+        """
+        Fixed point values of span pixels, start + offset * step, in int32 only
+
+        :param start: span start values from fixedSpans, shape (rows, c)
+        :type start: numpy.ndarray[int32]
+        :param step: span steps from fixedSpans, shape (rows, c)
+        :type step: numpy.ndarray[int32]
+        :param stepFraction: extra step bits from fixedSpans, shape (rows, c)
+        :type stepFraction: numpy.ndarray[int32]
+        :param rows: span of every pixel
+        :type rows: numpy.ndarray[int]
+        :param offsets: pixel offsets from the left end of their span
+        :type offsets: numpy.ndarray[int]
+        :return: values, shape (n, c)
+        :rtype: numpy.ndarray[int32]
+        """
+        offsets = offsets.astype(np.int32)[:, None]
+        values = stepFraction[rows]
+        values *= offsets
+        values >>= ScanlineFill.STEP_BITS
+        values += step[rows] * offsets
+        values += start[rows]
+        return values
+
+    @staticmethod
+    def fillTriangle(buff, p1, p2, p3, doSmooth=True, doTexture=False, texture=None, textureCoords=None,
+                     edgeTable=None, ids=None, fixedPoint=False):
+        """
+        Fill a triangle on buff. Same arguments and same pixels as Sketch.drawTriangle with doAA off.
+        The points are read into the arguments of fillTriangleArrays, see there for the other arguments.
+
+        :param buff: The buff to edit, or the supersampling layer of a buff
+        :type buff: Buff or SupersampleBuff
+        :param p1: First triangle vertex
+        :param p2: Second triangle vertex
+        :param p3: Third triangle vertex
+        :type p1: Point
+        :type p2: Point
+        :type p3: Point
+        :param textureCoords: texture coordinates of p1, p2 and p3 in texels, optionally with w for perspective
+                              correct mapping. By default the textures of the points, or the triangle bounding box
+                              fitted in the texture.
+        :type textureCoords: list[list[float]]
+        :rtype: None
+        """
+        xy, rgb, textureCoords = ScanlineFill.pointArrays(p1, p2, p3, textureCoords)
+        ScanlineFill.fillTriangleArrays(buff, xy, rgb, doSmooth, doTexture, texture, textureCoords, edgeTable, ids,
+                                        fixedPoint)
+
+    @staticmethod
+    def fillTriangleArrays(buff, xy, rgb, doSmooth=True, doTexture=False, texture=None, textureCoords=None,
+                           edgeTable=None, ids=None, fixedPoint=False):
+        """
+        Fill a triangle given as vertex arrays on buff, e.g. slices of a VertexBatch, without any Point or ColorType.
+        A triangle of a mesh can share its edge tables with its neighbours through edgeTable, see fillTriangleMesh.
+
+        :param buff: The buff to edit, or the supersampling layer of a buff
+        :type buff: Buff or SupersampleBuff
+        :param xy: (x, y) of the three vertices, shape (3, 2)
+        :type xy: numpy.ndarray[int] or list[tuple[int]]
+        :param rgb: colors of the three vertices, shape (3, 3). The first one is used for flat filling.
+        :type rgb: numpy.ndarray[float] or list[tuple[float]]
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doTexture: Draw triangle with texture control flag
+        :type doTexture: bool
+        :param texture: the texture, needed if doTexture is set. It is sampled for all pixels at once, bilinearly or
+                        trilinearly for a MipMap, with the level of detail of every span taken at its center.
+        :type texture: TextureSampler or MipMap
+        :param textureCoords: texture coordinates of the vertices in texels, shape (3, 2), or (3, 3) with w for
+                              perspective correct mapping. By default the triangle bounding box fitted in the texture.
+        :type textureCoords: numpy.ndarray[float] or list[list[float]]
+        :param edgeTable: edge tables of the mesh, see sharedEdgeBoundary. Vertex values must be the same in every
+                          triangle using it, so it can't be used with bounding box fitted texture coordinates.
+        :type edgeTable: dict
+        :param ids: mesh vertex indices of the three vertices, needed with edgeTable
+        :type ids: tuple[int, int, int]
+        :param fixedPoint: interpolate colors and texture coordinates along spans with 16.16 fixed point DDA on int32
+                           arrays, and write 8 bits colors without float conversion. Within 1 of the float path.
+                           buff must take uint8 colors, i.e. be a Buff. Perspective correct and mipmapped textures
+                           stay on the float path, as do texture coordinates too large for 16.16 numbers. With a
+                           WRAP texture every span is first moved by whole texture periods to start in the texture.
+        :type fixedPoint: bool
+        :rtype: None
+        """
+        xy = [tuple(c) for c in np.asarray(xy, dtype=np.int64).tolist()]
+        rgb = np.asarray(rgb, dtype=np.float64)
+        mipmap = doTexture and isinstance(texture, MipMap)
+        spanLod = None
+        if doTexture:
+            values = ScanlineFill.textureValues(texture, xy, textureCoords)
+            if mipmap:
+                dvdx, dvdy = MipMap.gradients([c[0] for c in xy], [c[1] for c in xy], values)
+        elif doSmooth:
+            values = rgb
+        else:
+            values = [None] * 3
+        vertices = list(zip(xy, values, ids if ids is not None else (None,) * 3))
+
+        # Sort vertices to have their y-value ascending, in the same way as Sketch.drawTriangle
+        if vertices[0][0][1] > vertices[1][0][1]:
+            vertices[0], vertices[1] = vertices[1], vertices[0]
+        if vertices[1][0][1] > vertices[2][0][1]:
+            vertices[1], vertices[2] = vertices[2], vertices[1]
+        if vertices[0][0][1] > vertices[1][0][1]:
+            vertices[0], vertices[1] = vertices[1], vertices[0]
+        (q1, v1, i1), (q2, v2, i2), (q3, v3, i3) = vertices
+
+        interpolate = doTexture or doSmooth
+        edge1 = ScanlineFill.sharedEdgeBoundary(edgeTable, (i1, i2), q1, q2, (v1, v2) if interpolate else None)
+        edge2 = ScanlineFill.sharedEdgeBoundary(edgeTable, (i2, i3), q2, q3, (v2, v3) if interpolate else None)
+        edge3 = ScanlineFill.sharedEdgeBoundary(edgeTable, (i1, i3), q1, q3, (v1, v3) if interpolate else None)
+
+        # One side is edge1 + edge2 (sharing the row of q2), another side is edge3
+        s1lx = np.concatenate((edge1[0][:-1], edge2[0]))
+        s1rx = np.concatenate((edge1[2][:-1], edge2[2]))
+        s2lx, s2rx = edge3[0], edge3[2]
+        takeLeft1 = s1lx < s2lx
+        takeRight1 = s1rx > s2rx
+        lx = np.where(takeLeft1, s1lx, s2lx)
+        rx = np.where(takeRight1, s1rx, s2rx)
+
+        counts = rx - lx + 1
+        if interpolate:
+            s1lv = np.concatenate((edge1[1][:, :-1], edge2[1]), axis=1)
+            s1rv = np.concatenate((edge1[3][:, :-1], edge2[3]), axis=1)
+            lv = np.where(takeLeft1, s1lv, edge3[1])
+            rv = np.where(takeRight1, s1rv, edge3[3])
+            if mipmap:
+                # one level of detail per span, at its center
+                spanLod = ScanlineFill.textureLod((lv + rv) / 2, dvdx, dvdy)
+            fixedPoint = fixedPoint and not mipmap and len(lv) == (2 if doTexture else 3)
+            if fixedPoint:
+                fixedLv, fixedRv = lv, rv
+                if doTexture and texture.mode == TextureSampler.WRAP:
+                    # whole periods don't change the samples, the spans start in [0, size) to fit in 16.16 numbers
+                    shift = np.floor(lv / [[texture.width], [texture.height]]) * [[texture.width], [texture.height]]
+                    fixedLv, fixedRv = lv - shift, rv - shift
+                # texture coordinates in 16.16 texels, colors in 8.16
+                fixedSpan = ScanlineFill.fixedSpans(fixedLv, fixedRv, counts, 1 if doTexture else 255)
+                fixedPoint = fixedSpan is not None
+
+        # Only expand the part of every span inside buff, rows outside buff get an empty span
+        y0 = q1[1]
+        rowYs = y0 + np.arange(len(lx))
+        inside = (rowYs >= 0) & (rowYs < buff.height)
+        clipLx = np.maximum(lx, 0)
+        clipCounts = np.where(inside, np.maximum(np.minimum(rx, buff.width - 1) - clipLx + 1, 0), 0)
+
+        for start, stop in ScanlineFill.chunks(clipCounts, ScanlineFill.MAX_PIXELS):
+            # Expand every row into its span of pixels
+            blockCounts = clipCounts[start:stop]
+            rows = np.repeat(np.arange(start, stop), blockCounts)
+            offsets = np.arange(rows.size) - np.repeat(np.cumsum(blockCounts) - blockCounts, blockCounts)
+            # offsets from the unclipped left end, so interpolation is the same as without clipping
+            offsets += clipLx[rows] - lx[rows]
+            xs = lx[rows] + offsets
+            ys = y0 + rows
+
+            if interpolate and fixedPoint:
+                values = ScanlineFill.fixedValues(*fixedSpan, rows, offsets)
+                if doTexture:
+                    values = texture.sampleBilinearFixed(values[:, 0], values[:, 1], ScanlineFill.FIXED_BITS)
+                else:
+                    np.clip(values, 0, (256 << ScanlineFill.FIXED_BITS) - 1, out=values)
+                    values >>= ScanlineFill.FIXED_BITS
+                    values = values.astype(np.uint8)
+            elif interpolate:
+                # same as lerp(lv, rv, lx, xs, rx) per pixel, reusing the span offsets
+                dist1 = offsets / np.maximum(counts - 1, 1)[rows]
+                values = lv[:, rows] * (1 - dist1)
+                values += rv[:, rows] * dist1
+                if doTexture:
+                    values = ScanlineFill.sampleTexture(texture, values, None if spanLod is None else spanLod[rows])
+                else:
+                    values = values.T
+            else:
+                values = rgb[0]
+
+            buff.setPixels(xs, ys, values)
+
+    @staticmethod
+    def fillTriangleMesh(buff, points, indices, doSmooth=True, doTexture=False, texture=None, fixedPoint=False):
+        """
+        Fill the triangles of an indexed mesh of Points on buff, see fillTriangleMeshArrays. The points are read into
+        vertex arrays once.
+
+        :param points: mesh vertices. Their texture coordinates are used if all points have one.
+        :type points: list[Point]
+        :return: number of edges rasterized
+        :rtype: int
+        """
+        return ScanlineFill.fillTriangleMeshArrays(buff, *ScanlineFill.meshArrays(points), indices, doSmooth, doTexture,
+                                                   texture, fixedPoint)
+
+    @staticmethod
+    def meshArrays(points):
+        """
+        The vertex arrays of a list of Points, as taken by fillTriangleMeshArrays
+
+        :param points: mesh vertices. Their texture coordinates are kept if all points have one.
+        :type points: list[Point]
+        :return: xy (N, 2), rgb (N, 3) and uv (N, 2) or (N, 3), or None
+        :rtype: tuple[numpy.ndarray]
+        """
+        xy = np.array([p.coords for p in points], dtype=np.int64).reshape((-1, 2))
+        rgb = np.array([(0, 0, 0) if p.color is None else p.color.getRGB() for p in points],
+                       dtype=np.float64).reshape((-1, 3))
+        uv = None
+        if points and all(p.texture is not None for p in points):
+            uv = np.array([p.texture for p in points], dtype=np.float64)
+        return xy, rgb, uv
+
+    @staticmethod
+    def fillTriangleMeshArrays(buff, xy, rgb, uv, indices, doSmooth=True, doTexture=False, texture=None,
+                               fixedPoint=False):
+        """
+        Fill the triangles of an indexed mesh on buff, in order. Every edge is rasterized once and its edge table is
+        reused by all triangles sharing it. The pixels are the same as filling the triangles one by one.
+
+        :param buff: The buff to edit, or the supersampling layer of a buff
+        :type buff: Buff or SupersampleBuff
+        :param xy: vertex coordinates, shape (N, 2), e.g. VertexBatch.xy
+        :type xy: numpy.ndarray[int]
+        :param rgb: vertex colors, shape (N, 3)
+        :type rgb: numpy.ndarray[float]
+        :param uv: vertex texture coordinates in texels, shape (N, 2) or (N, 3) with w, or None
+        :type uv: numpy.ndarray[float]
+        :param indices: vertex indices of every triangle, shape (M, 3)
+        :type indices: numpy.ndarray[int]
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doTexture: Draw triangle with texture control flag. Edges are only shared if uv is given, bounding box
+                          fitted coordinates differ between triangles.
+        :type doTexture: bool
+        :param texture: the texture, needed if doTexture is set
+        :type texture: TextureSampler or MipMap
+        :param fixedPoint: interpolate along spans in fixed point, see fillTriangleArrays
+        :type fixedPoint: bool
+        :return: number of edges rasterized
+        :rtype: int
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape((-1, 3))
+        shared = not doTexture or uv is not None
+        edgeTable = {} if shared else None
+        for triangle in indices:
+            ScanlineFill.fillTriangleArrays(buff, xy[triangle], rgb[triangle], doSmooth, doTexture, texture,
+                                            None if uv is None else uv[triangle], edgeTable, tuple(triangle.tolist()),
+                                            fixedPoint)
+        return len(edgeTable) if shared else 3 * len(indices)
+
+
+if __name__ == "__main__":
+    import time
+    import math
+    from Buff import Buff
+    from Point import Point
+    from ColorType import ColorType
+
+    # the fan of Sketch.testCaseTri02 with 192 steps: 96 triangles around a center vertex
+    n, radius, cx, cy = 96, 225, 250, 250
+    points = [Point((cx, cy), ColorType(1, 1, 1))]
+    for k in range(n):
+        theta = 2 * math.pi * (k + 1) / n
+        points.append(Point((int(cx + math.sin(theta) * radius), int(cy + math.cos(theta) * radius)),
+                            ColorType(0.5 + 0.5 * math.sin(theta), 0.5 + 0.5 * math.cos(theta), 0.5)))
+    indices = np.array([(0, k + 1, (k + 1) % n + 1) for k in range(n)])
+
+    separate, mesh = Buff(500, 500), Buff(500, 500)
+    t1 = time.perf_counter()
+    for _ in range(10):
+        for i1, i2, i3 in indices:
+            ScanlineFill.fillTriangle(separate, points[i1], points[i2], points[i3])
+    t2 = time.perf_counter()
+    for _ in range(10):
+        edges = ScanlineFill.fillTriangleMesh(mesh, points, indices)
+    t3 = time.perf_counter()
+    print("%d triangles one by one: %d edges, %.2f ms" % (n, 3 * n, (t2 - t1) * 100))
+    print("%d triangles as a mesh: %d edges, %.2f ms" % (n, edges, (t3 - t2) * 100))
+    print("same pixels:", np.array_equal(separate.buff, mesh.buff))
+
+    # fixed point against float span interpolation, on a triangle covering half of a 1000 x 1000 canvas
+    from TextureSampler import TextureSampler
+    texture = TextureSampler(np.random.default_rng(1).integers(0, 256, (256, 256, 3), dtype=np.uint8))
+    triangle = [Point((0, 0), ColorType(1, 0, 0), (0, 0)), Point((999, 0), ColorType(0, 1, 0), (255, 0)),
+                Point((999, 999), ColorType(0, 0, 1), (255, 255))]
+    for doTexture in (False, True):
+        results = []
+        for fixedPoint in (False, True):
+            buff = Buff(1000, 1000)
+            seconds = float("inf")
+            for _ in range(7):
+                t1 = time.perf_counter()
+                ScanlineFill.fillTriangle(buff, *triangle, True, doTexture, texture, fixedPoint=fixedPoint)
+                seconds = min(seconds, time.perf_counter() - t1)
+            results.append((seconds * 1000, buff.buff.astype(int)))
+        print("%s: float %.1f ms, fixed point %.1f ms, largest difference %d"
+              % ("texture" if doTexture else "smooth color", results[0][0], results[1][0],
+                 np.abs(results[0][1] - results[1][1]).max()))
+
+    # texture coordinates beyond 32768 texels: WRAP spans are moved back into the texture, CLAMP falls back to floats
+    for mode, offset in ((TextureSampler.WRAP, 40000), (TextureSampler.CLAMP, 40000), (TextureSampler.WRAP, -1e6)):
+        texture.setMode(mode)
+        triangle = [Point((0, 0), ColorType(1, 0, 0), (offset, 0)),
+                    Point((99, 0), ColorType(0, 1, 0), (offset + 99, 0)),
+                    Point((99, 99), ColorType(0, 0, 1), (offset + 99, 99))]
+        results = []
+        for fixedPoint in (False, True):
+            buff = Buff(100, 100)
+            ScanlineFill.fillTriangle(buff, *triangle, True, True, texture, fixedPoint=fixedPoint)
+            results.append(buff.buff.astype(int))
+        print("%s texture at u = %d: largest difference %d" % (mode, offset, np.abs(results[0] - results[1]).max()))
@@ -0,0 +1,101 @@
+"""
+Defines SharedBuff class, a Buff whose pixel array lives in multiprocessing shared memory. Other processes attach to it
+by name and draw into the same pixels, so no pixel data is pickled between processes.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import os
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from Buff import Buff
+
+
+class SharedBuff(Buff):
+    """
+    Same as Buff, except that pixels are in a shared memory block owned by this object.
+
+    * sharedMemory(multiprocessing.shared_memory.SharedMemory): the block of the current pixel array. Its name is what
+      other processes need, together with the buff size, to call SharedBuff.attach.
+    * owner(int): id of the process which created the block, only that process frees it
+    """
+    sharedMemory = None
+    owner = None
+
+    def _newArray(self, width, height):
+        """
+        In class usage only, allocate the pixel array in a new shared memory block. The old block is released by resize.
+        """
+        self.sharedMemory = shared_memory.SharedMemory(create=True, size=width * height * 3)
+        self.owner = os.getpid()
+        array = np.ndarray((height, width, 3), dtype=np.uint8, buffer=self.sharedMemory.buf)
+        array[...] = 0
+        return array
+
+    def resize(self, width: int, height: int):
+        """
+        Same as Buff.resize. When the buff grows beyond its capacity, pixels are moved to a new shared memory block and
+        the old block is released, so processes attached to it must attach again.
+
+        :param width: the buff width
+        :type width: int
+        :param height: the buff height
+        :type height: int
+        """
+        old = self.sharedMemory
+        super(SharedBuff, self).resize(width, height)
+        if self.sharedMemory is not old:
+            self._release(old)
+
+    @staticmethod
+    def attach(name, width, height):
+        """
+        Open the pixel array of a SharedBuff created in another process
+
+        :param name: sharedMemory.name of the SharedBuff
+        :type name: str
+        :param width: the buff width
+        :type width: int
+        :param height: the buff height
+        :type height: int
+        :return: the shared memory block, which must be kept open while the array is used, and the pixel array
+        :rtype: tuple[multiprocessing.shared_memory.SharedMemory, numpy.ndarray[uint8]]
+        """
+        block = shared_memory.SharedMemory(name=name)
+        return block, np.ndarray((height, width, 3), dtype=np.uint8, buffer=block.buf)
+
+    @staticmethod
+    def _release(block):
+        """
+        In class usage only, close and remove a shared memory block
+        """
+        if block is None:
+            return
+        try:
+            block.close()
+        except BufferError:
+            # a view of the pixels is still alive, the memory is freed when it goes away
+            pass
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+    def release(self):
+        """
+        Free the shared memory block. The buff must not be used afterwards.
+
+        :rtype: None
+        """
+        self.buff = None
+        self.backing = None
+        self.supersampleBuff = None
+        self._release(self.sharedMemory)
+        self.sharedMemory = None
+
+    def __del__(self):
+        # a forked child, e.g. a pool worker, may collect its copy of this object, the block stays with the parent
+        if self.owner == os.getpid():
+            self.release()
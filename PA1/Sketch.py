@@ -10,22 +10,34 @@ First version Created on 09/28/2018
 
 import os
 
-import wx
 import math
 import random
 import numpy as np
 
-from Buff import Buff
+# Without wxPython and OpenGL, or with environment variable PA1_HEADLESS set, Sketch draws on an offscreen canvas
+HEADLESS = os.environ.get("PA1_HEADLESS", "0") not in ("", "0")
+if not HEADLESS:
+    try:
+        import wx
+        from CanvasBase import CanvasBase
+    except ImportError:
+        HEADLESS = True
+if HEADLESS:
+    wx = None
+    from HeadlessCanvas import HeadlessCanvas as CanvasBase
+
+from Buff import Buff, BlendView
 from Point import Point
-from ColorType import ColorType
-from CanvasBase import CanvasBase
-
-try:
-    # From pip package "Pillow"
-    from PIL import Image
-except Exception:
-    print("Need to install PIL package. Pip package name is Pillow")
-    raise ImportError
+from ColorType import ColorType, BLACK
+from ColorArray import ColorArray
+from ScanlineFill import ScanlineFill
+from EdgeRaster import EdgeRaster
+from LineBatch import LineBatch
+from VertexBatch import VertexBatch
+from TiledRaster import TiledRaster
+from TextureSampler import TextureSampler
+from TextureCache import TextureCache
+from DisplayList import DisplayList, DisplayListCache, recorded
 
 
 class Sketch(CanvasBase):
@@ -41,11 +53,38 @@ class Sketch(CanvasBase):
         * 2 will print more details and do some type checking, which might be helpful in debugging
     
     * texture(Buff): loaded texture in Buff instance
+    * textureSampler(TextureSampler): loaded texture as float texels, used by the vectorized texture mapping
+    * textureMipMap(MipMap): mip pyramid of the texture, used by the vectorized texture mapping if doMipmap is set
+    * textureCache(TextureCache): decoded texels of texture files, shared by all instances
     * random_color(bool): Control flag of random color generation of point.
     * doTexture(bool): Control flag of doing texture mapping
+    * doMipmap(bool): Control flag of sampling minified textures trilinearly from textureMipMap, with the vectorized \
+    backends. Off by default, the per pixel loops always sample bilinearly and both backends draw the same texels
     * doSmooth(bool): Control flag of doing smooth
     * doAA(bool): Control flag of doing anti-aliasing
     * doAAlevel(int): anti-alising super sampling level
+    * useScanlineFill(bool): Control flag of drawing lines and triangles with the vectorized NumPy backends \
+    (ScanlineFill, LineBatch and the supersampled anti-aliasing layer of Buff)
+    * useEdgeRaster(bool): Control flag of filling triangles with the edge function rasterizer EdgeRaster instead of \
+    ScanlineFill, when the vectorized backends are used
+    * useFixedPoint(bool): Control flag of interpolating colors and texture coordinates along ScanlineFill spans in \
+    16.16 fixed point, without anti-aliasing
+    * blendMode(str): how lines and triangles are blended onto buff with their coverage, one of Buff.BLEND_MODES. \
+    The vectorized backends draw into the anti-aliasing layer of buff, which is resolved after every primitive unless \
+    the mode is "over"
+    * useTiledRaster(bool): Control flag of collecting the lines and triangles drawn in drawTiled (e.g. by redraw) \
+    into a TiledRaster, which rasterizes them on screen tiles with worker processes. Same pixels as drawing them one \
+    by one; primitives TiledRaster can't draw (EdgeRaster, fixed point, blend modes other than "over", texture \
+    coordinates) are drawn directly after the collected ones
+    * tiledProcesses(int): number of TiledRaster worker processes, None for the number of CPU cores
+    * tiledRaster(TiledRaster): primitives collected on buff during drawTiled. Its worker processes are kept for the
+    next frames until closeTiledRaster
+    * tiling(bool): set while drawTiled collects primitives
+    * tiledLevel(int): super sampling level of the collected primitives, 0 without anti-aliasing
+    * displayList(DisplayList): drawing calls on buff since the last clear, used by redraw
+    * displayListCache(DisplayListCache): rasterized display lists, shared by all instances
+    * recordOnly(bool): while set, drawing calls on buff are recorded into displayList without drawing
+    * drawDepth(int): number of drawing methods being executed, only outermost calls are recorded
         
     Method Instruction:
 
@@ -53,7 +92,11 @@ class Sketch(CanvasBase):
     * Interrupt_Keyboard: Used to deal with key board press interruption. Use this to add new keys or new methods
     * drawPoint: method to draw a point
     * drawLine: method to draw a line
+    * drawLines: method to draw many lines in one call
     * drawTriangle: method to draw a triangle with filling and smoothing
+    * drawTriangleMesh: method to draw indexed triangles, sharing the edges between neighbours
+    * drawTiled: method to draw a whole frame, on tiles with worker processes if useTiledRaster is set
+    * redraw: method to draw the display list again, from the cache when possible
     
     List of methods to override the ones in CanvasBase:
 
@@ -73,13 +116,34 @@ class Sketch(CanvasBase):
     debug = 0
     texture_file_path = "./pattern.jpg"
     texture = None
+    textureSampler = None
+    textureMipMap = None
+    textureCache = TextureCache()
 
     # control flags
     randomColor = False
     doTexture = False
+    doMipmap = False
     doSmooth = False
     doAA = False
     doAAlevel = 4
+    useScanlineFill = True
+    useEdgeRaster = False
+    useFixedPoint = False
+    blendMode = "over"
+    useTiledRaster = False
+    tiledProcesses = None
+
+    # tiled rasterization
+    tiledRaster = None
+    tiling = False
+    tiledLevel = 0
+
+    # display list
+    displayList = None
+    displayListCache = DisplayListCache()
+    recordOnly = False
+    drawDepth = 0
 
     # test case status
     MIN_N_STEPS = 6
@@ -92,26 +156,28 @@ class Sketch(CanvasBase):
         """
         Initialize the instance, load texture file to Buff, and load test cases.
 
-        :param parent: wxpython frame
+        :param parent: wxpython frame, or canvas size as (width, height) in headless mode
         :type parent: wx.Frame
         """
+        self.displayList = DisplayList()
         super(Sketch, self).__init__(parent)
         self.test_case_list = [lambda _: self.clear(),
                                self.testCaseLine01,
                                self.testCaseLine02,
                                self.testCaseTri01,
                                self.testCaseTri02,
-                               self.testCaseTriTexture01]  # method at here must accept one argument, n_steps
+                               self.testCaseTriTexture01,
+                               self.testCaseTriTexture02]  # method at here must accept one argument, n_steps
         # Try to read texture file
         if os.path.isfile(self.texture_file_path):
-            # Read image and make it to an ndarray
-            texture_image = Image.open(self.texture_file_path)
-            texture_array = np.array(texture_image).astype(np.uint8)
-            # Because imported image is upside down, reverse it
-            texture_array = np.flip(texture_array, axis=0)
+            # Decoded and flipped texels are cached by file modification time, in memory and next to the image
+            texels = self.textureCache.load(self.texture_file_path)
+            self.textureSampler = TextureSampler(texels)
+            self.textureMipMap = self.textureCache.loadMipMap(self.texture_file_path)
+            texture_array = np.rint(texels * 255).astype(np.uint8)
             # Store texture image in our Buff format
             self.texture = Buff(texture_array.shape[1], texture_array.shape[0])
-            self.texture.setStaticBuffArray(np.transpose(texture_array, (1, 0, 2)))
+            self.texture.setStaticBuffArray(texture_array)
             if self.debug > 0:
                 print("Texture Loaded with shape: ", texture_array.shape)
                 print("Texture Buff have size: ", self.texture.size)
@@ -132,6 +198,7 @@ class Sketch(CanvasBase):
         if len(self.points_l) % 2 == 1:
             if self.debug > 0:
                 print("draw a point", self.points_l[-1])
+            self.displayList.record("drawPoint", (self.points_l[-1],))
             self.drawPoint(self.buff, self.points_l[-1])
         elif len(self.points_l) % 2 == 0 and len(self.points_l) > 0:
             if self.debug > 0:
@@ -145,15 +212,18 @@ class Sketch(CanvasBase):
         if len(self.points_r) % 3 == 1:
             if self.debug > 0:
                 print("draw a point", self.points_r[-1])
+            self.displayList.record("drawPoint", (self.points_r[-1],))
             self.drawPoint(self.buff, self.points_r[-1])
         elif len(self.points_r) % 3 == 2:
             if self.debug > 0:
                 print("draw a line from ", self.points_r[-1], " -> ", self.points_r[-2])
+            self.displayList.record("drawPoint", (self.points_r[-1],))
             self.drawPoint(self.buff, self.points_r[-1])
             self.drawLine(self.buff, self.points_r[-1], self.points_r[-2], self.doSmooth, self.doAA, self.doAAlevel)
         elif len(self.points_r) % 3 == 0 and len(self.points_r) > 0:
             if self.debug > 0:
                 print("draw a triangle {} -> {} -> {}".format(self.points_r[-3], self.points_r[-2], self.points_r[-1]))
+            self.displayList.record("drawPoint", (self.points_r[-1],))
             self.drawPoint(self.buff, self.points_r[-1])
             self.drawTriangle(self.buff, self.points_r[-3], self.points_r[-2], self.points_r[-1], self.doSmooth, self.doAA, self.doAAlevel, self.doTexture)
             self.points_r.clear()
@@ -164,31 +234,32 @@ class Sketch(CanvasBase):
 
         * r, R: Generate Random Color point
         * c, C: clear buff and screen
+        * f, F: Switch line and triangle backend between vectorized NumPy and per pixel loops
+        * e, E: Switch vectorized triangle filling between ScanlineFill and EdgeRaster
+        * p, P: Switch trilinear mipmapped texture sampling on and off
+        * i, I: Switch fixed point span interpolation on and off
+        * g, G: Switch tiled multi-process rasterization of redraws on and off
         * LEFT, UP: Last Test case
         * t, T, RIGHT, DOWN: Next Test case
         """
         # Trigger for test cases
         if keycode in [wx.WXK_LEFT, wx.WXK_UP]:  # Last Test Case
-            self.clear()
             if len(self.test_case_list) != 0:
                 self.test_case_index = (self.test_case_index - 1) % len(self.test_case_list)
-            self.test_case_list[self.test_case_index](self.n_steps)
+            self.drawTestCase()
             print("Display Test case: ", self.test_case_index, "n_steps: ", self.n_steps)
         if keycode in [ord("t"), ord("T"), wx.WXK_RIGHT, wx.WXK_DOWN]:  # Next Test Case
-            self.clear()
             if len(self.test_case_list) != 0:
                 self.test_case_index = (self.test_case_index + 1) % len(self.test_case_list)
-            self.test_case_list[self.test_case_index](self.n_steps)
+            self.drawTestCase()
             print("Display Test case: ", self.test_case_index, "n_steps: ", self.n_steps)
         if chr(keycode) in ",<":
-            self.clear()
             self.n_steps = max(self.MIN_N_STEPS, round(self.n_steps / 2))
-            self.test_case_list[self.test_case_index](self.n_steps)
+            self.drawTestCase()
             print("Display Test case: ", self.test_case_index, "n_steps: ", self.n_steps)
         if chr(keycode) in ".>":
-            self.clear()
             self.n_steps = min(self.MAX_N_STEPS, round(self.n_steps * 2))
-            self.test_case_list[self.test_case_index](self.n_steps)
+            self.drawTestCase()
             print("Display Test case: ", self.test_case_index, "n_steps: ", self.n_steps)
 
         # Switches
@@ -207,6 +278,142 @@ class Sketch(CanvasBase):
         if chr(keycode) in "mM":
             self.doTexture = not self.doTexture
             print("texture mapping: ", self.doTexture)
+        if chr(keycode) in "pP":
+            self.doMipmap = not self.doMipmap
+            print("Mipmapped texture mapping: ", self.doMipmap)
+        if chr(keycode) in "iI":
+            self.useFixedPoint = not self.useFixedPoint
+            print("Fixed point interpolation: ", self.useFixedPoint)
+        if chr(keycode) in "fF":
+            self.useScanlineFill = not self.useScanlineFill
+            print("Scanline Fill: ", self.useScanlineFill)
+        if chr(keycode) in "eE":
+            self.useEdgeRaster = not self.useEdgeRaster
+            print("Edge function rasterizer: ", self.useEdgeRaster)
+        if chr(keycode) in "bB":
+            modes = Buff.BLEND_MODES
+            self.blendMode = modes[(modes.index(self.blendMode) + 1) % len(modes)]
+            print("Blend mode: ", self.blendMode)
+        if chr(keycode) in "gG":
+            self.useTiledRaster = not self.useTiledRaster
+            if not self.useTiledRaster:
+                self.closeTiledRaster()
+            print("Tiled rasterization: ", self.useTiledRaster)
+
+    def Interrupt_Resize(self, width, height):
+        """
+        Rasterize the display list again at the new canvas size, instead of keeping the cropped old frame
+        """
+        if len(self.displayList) != 0:
+            self.redraw()
+
+    def clear(self):
+        """
+        clear display buff and the display list, but save last frame to buff_last
+        """
+        super(Sketch, self).clear()
+        if self.displayList is not None:
+            self.displayList.clear()
+
+    def rasterState(self):
+        """
+        Settings other than the drawing calls which change the pixels of a display list
+
+        :rtype: tuple
+        """
+        return self.useScanlineFill, self.useEdgeRaster, self.useFixedPoint, self.doMipmap, self.blendMode, \
+            self.texture_file_path
+
+    def redraw(self):
+        """
+        Clear buff and draw the display list on it again. A display list drawn before with the same canvas size and
+        settings is copied from displayListCache, and if only commands were appended since, only those are rasterized.
+
+        :return: number of commands rasterized
+        :rtype: int
+        """
+        return self.drawTiled(self.displayList.render, self, self.buff, self.displayListCache, self.rasterState())
+
+    def drawTiled(self, draw, *args):
+        """
+        Call draw(*args), e.g. a test case. With useTiledRaster set, the lines and triangles it draws on buff are
+        collected and rasterized on tiles by tiledProcesses worker processes, at the latest when draw returns.
+
+        :param draw: function drawing on buff
+        :type draw: callable
+        :return: the return value of draw
+        """
+        if not self.useTiledRaster or self.tiling:
+            return draw(*args)
+        processes = self.tiledProcesses if self.tiledProcesses is not None else (os.cpu_count() or 1)
+        if self.tiledRaster is not None and self.tiledRaster.processes != processes:
+            self.closeTiledRaster()
+        if self.tiledRaster is None:
+            self.tiledRaster = TiledRaster(processes=processes)
+        self.tiling = True
+        try:
+            return draw(*args)
+        finally:
+            self.flushTiles()
+            self.tiling = False
+
+    def closeTiledRaster(self):
+        """
+        Stop the worker processes of tiled rasterization, drawTiled starts new ones when needed
+
+        :rtype: None
+        """
+        if self.tiledRaster is not None:
+            self.tiledRaster.close()
+            self.tiledRaster = None
+
+    def tilesFor(self, buff, doAA, doAAlevel, collectable=True):
+        """
+        The TiledRaster collecting a primitive drawn on buff, or None if the primitive has to be drawn now. Collected
+        primitives are rasterized first when a primitive on buff isn't collected or changes the anti-aliasing level.
+
+        :param collectable: False for a primitive TiledRaster can't draw, e.g. with texture coordinates
+        :type collectable: bool
+        :rtype: TiledRaster or None
+        """
+        if not self.tiling or buff is not self.buff:
+            return None
+        if not collectable or not self.useScanlineFill or self.useEdgeRaster or self.useFixedPoint \
+                or self.blendMode != "over":
+            self.flushTiles()
+            return None
+        level = doAAlevel if doAA else 0
+        if level != self.tiledLevel:
+            self.flushTiles()
+            self.tiledLevel = level
+        return self.tiledRaster
+
+    def flushTiles(self):
+        """
+        Rasterize the primitives collected by tilesFor on buff
+
+        :rtype: None
+        """
+        if not self.tiling or len(self.tiledRaster.primitives) == 0:
+            return
+        texture = self.textureMipMap if self.doMipmap else self.textureSampler
+        self.tiledRaster.render(self.buff, self.tiledLevel > 0, self.tiledLevel, texture)
+        self.tiledRaster.clear()
+
+    def drawTestCase(self):
+        """
+        Clear the canvas and show the current test case. The test case is recorded without drawing, then drawn by
+        redraw, so switching back to a test case seen before is a copy from the display list cache.
+
+        :rtype: None
+        """
+        self.clear()
+        self.recordOnly = True
+        try:
+            self.test_case_list[self.test_case_index](self.n_steps)
+        finally:
+            self.recordOnly = False
+        self.redraw()
 
     def queryTextureBuffPoint(self, texture: Buff, x: int, y: int) -> Point:
         """
@@ -227,10 +434,10 @@ class Sketch(CanvasBase):
                 print("Warning: Texture Query y coordinate outbound")
         return texture.getPointFromPointArray(x, y)
 
-    @staticmethod
-    def drawPoint(buff, point):
+    def drawPoint(self, buff, point):
         """
-        Draw a point on buff
+        Draw a point on buff, after the pending anti-aliased drawing and the lines and triangles collected for tiled
+        rasterization
 
         :param buff: The buff to draw point on
         :type buff: Buff
@@ -238,12 +445,16 @@ class Sketch(CanvasBase):
         :type point: Point
         :rtype: None
         """
+        if buff is self.buff:
+            self.flushTiles()
+        buff.resolve()
         x, y = point.coords
         c = point.color
         # because we have already specified buff.buff has data type uint8, type conversion will be done in numpy
-        buff.buff[x, y, 0] = c.r * 255
-        buff.buff[x, y, 1] = c.g * 255
-        buff.buff[x, y, 2] = c.b * 255
+        buff.buff[y, x, 0] = c.r * 255
+        buff.buff[y, x, 1] = c.g * 255
+        buff.buff[y, x, 2] = c.b * 255
+        buff.markDirty(x, x, y, y)
 
     def smooth1D(self, color1, color2, l, m, r):
         if l!=r:
@@ -257,7 +468,7 @@ class Sketch(CanvasBase):
         if l!=r:
             dist1 = (m-l)/(r-l)
             dist2 = 1 - dist1
-            return [texture1[0]*dist2 + texture2[0]*dist1, texture1[1]*dist2 + texture2[1]*dist1]
+            return [t1*dist2 + t2*dist1 for t1, t2 in zip(texture1, texture2)]
         else:
             return texture1
         
@@ -283,14 +494,16 @@ class Sketch(CanvasBase):
         bg = buff.getPoint(x, y)
         return self.smooth1D(bg.color, color, 0, alpha, 1)
 
-    def drawLine(self, buff, p1, p2, doSmooth=True, doAA=False, doAAlevel=4):
+    @recorded
+    def drawLine(self, buff, p1, p2=None, doSmooth=True, doAA=False, doAAlevel=4):
         """
-        Draw a line between p1 and p2 on buff
+        Draw a line between p1 and p2 on buff.
+        If p1 is a VertexBatch, p2 is ignored and a line is drawn between every 2 consecutive vertices of the batch.
 
         :param buff: The buff to edit
         :type buff: Buff
-        :param p1: One end point of the line
-        :type p1: Point
+        :param p1: One end point of the line, or a batch of end points
+        :type p1: Point or VertexBatch
         :param p2: Another end point of the line
         :type p2: Point
         :param doSmooth: Control flag of color smooth interpolation
@@ -306,6 +519,20 @@ class Sketch(CanvasBase):
         #   1. Only integer is allowed in interpolate point coordinates between p1 and p2
         #   2. Float number is allowed in interpolate point color
 
+        if isinstance(p1, VertexBatch):
+            if self.useScanlineFill:
+                self.drawLineArrays(buff, *p1.lineArrays(), doSmooth, doAA, doAAlevel)
+            else:
+                points = p1.toPoints()
+                for i in range(0, len(points) - 1, 2):
+                    self.drawLine(buff, points[i], points[i + 1], doSmooth, doAA, doAAlevel)
+            return
+
+        if self.useScanlineFill:
+            self.drawLineArrays(buff, [p1.coords], [p2.coords], [(p1.color.getRGB(), p2.color.getRGB())],
+                                doSmooth, doAA, doAAlevel)
+            return
+
         color = p2.color
 
         if not doAA:
@@ -318,6 +545,7 @@ class Sketch(CanvasBase):
         delta_y = (p2.coords[1] - p1.coords[1]) * doAAlevel + (doAAlevel - 1) * (2 * ((p2.coords[1] - p1.coords[1]) >= 0) - 1)
         #print(delta_x, delta_y)
         cnt = 1 #Indicate how many subpixels are filled in the current pixel
+        pixels = [] #(x, y, coverage) of every drawn pixel, blended onto buff together at the end
 
         #print("START AT ", p1.coords)
 
@@ -333,10 +561,7 @@ class Sketch(CanvasBase):
                     up = True
                     if y%doAAlevel==0:
                         #print("Paint Y", (x-1)//doAAlevel, (y-up)//doAAlevel, cnt/doAAlevel)
-                        if doSmooth:
-                            self.drawPoint(buff, Point(((x-1)//doAAlevel, (y-up)//doAAlevel), self.alpha(buff, (x-1)//doAAlevel, (y-up)//doAAlevel, self.smooth1D(p1.color, p2.color, p1.coords[0], (x-1)//doAAlevel, p2.coords[0]), cnt/doAAlevel)))
-                        else:
-                            self.drawPoint(buff, Point(((x-1)//doAAlevel, (y-up)//doAAlevel), self.alpha(buff, (x-1)//doAAlevel, (y-up)//doAAlevel, color, cnt/doAAlevel)))
+                        pixels.append(((x-1)//doAAlevel, (y-up)//doAAlevel, cnt/doAAlevel))
                         drawn = True
                         cnt = 0
                 else:
@@ -351,10 +576,7 @@ class Sketch(CanvasBase):
 
                 if x%doAAlevel==0 and not drawn:
                     #print("Paint X", (x-1)//doAAlevel, (y-up)//doAAlevel, cnt/doAAlevel)
-                    if doSmooth:
-                        self.drawPoint(buff, Point(((x-1)//doAAlevel, (y-up)//doAAlevel), self.alpha(buff, (x-1)//doAAlevel, (y-up)//doAAlevel, self.smooth1D(p1.color, p2.color, p1.coords[0], (x-1)//doAAlevel, p2.coords[0]), cnt/doAAlevel)))
-                    else:
-                        self.drawPoint(buff, Point(((x-1)//doAAlevel, (y-up)//doAAlevel), self.alpha(buff, (x-1)//doAAlevel, (y-up)//doAAlevel, color, cnt/doAAlevel)))
+                    pixels.append(((x-1)//doAAlevel, (y-up)//doAAlevel, cnt/doAAlevel))
                     cnt = 0
                 cnt += 1
 
@@ -370,10 +592,7 @@ class Sketch(CanvasBase):
                     right = True
                     if x%doAAlevel==0:
                         #print("Paint X", (x-right)//doAAlevel, (y-1)//doAAlevel, cnt/doAAlevel)
-                        if doSmooth:
-                            self.drawPoint(buff, Point(((x-right)//doAAlevel, (y-1)//doAAlevel), self.alpha(buff, (x-right)//doAAlevel, (y-1)//doAAlevel, self.smooth1D(p1.color, p2.color, p1.coords[1], (y-1)//doAAlevel, p2.coords[1]), cnt/doAAlevel)))
-                        else:
-                            self.drawPoint(buff, Point(((x-right)//doAAlevel, (y-1)//doAAlevel), self.alpha(buff, (x-right)//doAAlevel, (y-1)//doAAlevel, color, cnt/doAAlevel)))
+                        pixels.append(((x-right)//doAAlevel, (y-1)//doAAlevel, cnt/doAAlevel))
                         drawn = True
                         cnt = 0
                 else:
@@ -388,10 +607,7 @@ class Sketch(CanvasBase):
 
                 if y%doAAlevel==0 and not drawn:
                     #print("Paint Y", (x-right)//doAAlevel, (y-1)//doAAlevel, cnt/doAAlevel)
-                    if doSmooth:
-                        self.drawPoint(buff, Point(((x-right)//doAAlevel, (y-1)//doAAlevel), self.alpha(buff, (x-right)//doAAlevel, (y-1)//doAAlevel, self.smooth1D(p1.color, p2.color, p1.coords[1], (y-1)//doAAlevel, p2.coords[1]), cnt/doAAlevel)))
-                    else:
-                        self.drawPoint(buff, Point(((x-right)//doAAlevel, (y-1)//doAAlevel), self.alpha(buff, (x-right)//doAAlevel, (y-1)//doAAlevel, color, cnt/doAAlevel)))
+                    pixels.append(((x-right)//doAAlevel, (y-1)//doAAlevel, cnt/doAAlevel))
                     cnt = 0
                 cnt += 1
 
@@ -407,10 +623,7 @@ class Sketch(CanvasBase):
                     down = True
                     if y%doAAlevel==doAAlevel-1:
                         #print("Paint Y", (x-1)//doAAlevel, (y+down)//doAAlevel, cnt/doAAlevel)
-                        if doSmooth:
-                            self.drawPoint(buff, Point(((x-1)//doAAlevel, (y+down)//doAAlevel), self.alpha(buff, (x-1)//doAAlevel, (y+down)//doAAlevel, self.smooth1D(p1.color, p2.color, p1.coords[0], (x-1)//doAAlevel, p2.coords[0]), cnt/doAAlevel)))
-                        else: 
-                            self.drawPoint(buff, Point(((x-1)//doAAlevel, (y+down)//doAAlevel), self.alpha(buff, (x-1)//doAAlevel, (y+down)//doAAlevel, color, cnt/doAAlevel)))
+                        pixels.append(((x-1)//doAAlevel, (y+down)//doAAlevel, cnt/doAAlevel))
                         drawn = True
                         cnt = 0
                 else:
@@ -425,10 +638,7 @@ class Sketch(CanvasBase):
 
                 if x%doAAlevel==0 and not drawn:
                     #print("Paint X", (x-1)//doAAlevel, (y+down)//doAAlevel, cnt/doAAlevel)
-                    if doSmooth:
-                        self.drawPoint(buff, Point(((x-1)//doAAlevel, (y+down)//doAAlevel), self.alpha(buff, (x-1)//doAAlevel, (y+down)//doAAlevel, self.smooth1D(p1.color, p2.color, p1.coords[0], (x-1)//doAAlevel, p2.coords[0]), cnt/doAAlevel)))
-                    else:
-                        self.drawPoint(buff, Point(((x-1)//doAAlevel, (y+down)//doAAlevel), self.alpha(buff, (x-1)//doAAlevel, (y+down)//doAAlevel, color, cnt/doAAlevel)))
+                    pixels.append(((x-1)//doAAlevel, (y+down)//doAAlevel, cnt/doAAlevel))
                     cnt = 0
                 cnt += 1
 
@@ -444,10 +654,7 @@ class Sketch(CanvasBase):
                     left = True
                     if x%doAAlevel==doAAlevel-1:
                         #print("Paint X", (x+left)//doAAlevel, (y-1)//doAAlevel, cnt/doAAlevel)
-                        if doSmooth:
-                            self.drawPoint(buff, Point(((x+left)//doAAlevel, (y-1)//doAAlevel), self.alpha(buff, (x+left)//doAAlevel, (y-1)//doAAlevel,self.smooth1D(p2.color, p1.color, p2.coords[1], (y-1)//doAAlevel, p1.coords[1]), cnt/doAAlevel)))
-                        else: 
-                            self.drawPoint(buff, Point(((x+left)//doAAlevel, (y-1)//doAAlevel), self.alpha(buff, (x+left)//doAAlevel, (y-1)//doAAlevel,color, cnt/doAAlevel)))
+                        pixels.append(((x+left)//doAAlevel, (y-1)//doAAlevel, cnt/doAAlevel))
                         drawn = True
                         cnt = 0
                 else:
@@ -462,16 +669,115 @@ class Sketch(CanvasBase):
 
                 if y%doAAlevel==0 and not drawn:
                     #print("Paint Y", (x+left)//doAAlevel, (y-1)//doAAlevel, cnt/doAAlevel)
-                    if doSmooth:
-                        self.drawPoint(buff, Point(((x+left)//doAAlevel, (y-1)//doAAlevel), self.alpha(buff, (x+left)//doAAlevel, (y-1)//doAAlevel, self.smooth1D(p2.color, p1.color, p2.coords[1], (y-1)//doAAlevel, p1.coords[1]), cnt/doAAlevel)))
-                    else:
-                        self.drawPoint(buff, Point(((x+left)//doAAlevel, (y-1)//doAAlevel), self.alpha(buff, (x+left)//doAAlevel, (y-1)//doAAlevel, color, cnt/doAAlevel)))
+                    pixels.append(((x+left)//doAAlevel, (y-1)//doAAlevel, cnt/doAAlevel))
                     cnt = 0
                 cnt += 1
 
         #print("END AT ", p2.coords)
 
-        return
+        if not pixels:
+            return
+        xs, ys, coverage = np.array(pixels).T
+        xs, ys = xs.astype(int), ys.astype(int)
+        if doSmooth:
+            # same interpolation as smooth1D in each octant above
+            if (delta_y >= 0 and delta_y <= delta_x) or (delta_y < 0 and delta_y >= -delta_x):
+                start, end, l, m, r = p1, p2, p1.coords[0], xs, p2.coords[0]
+            elif delta_y >= 0:
+                start, end, l, m, r = p1, p2, p1.coords[1], ys, p2.coords[1]
+            else:
+                start, end, l, m, r = p2, p1, p2.coords[1], ys, p1.coords[1]
+            t = (m - l) / (r - l) if l != r else 0
+            colors = ColorArray(start.color.getRGB(), np.float64).lerp(ColorArray(end.color.getRGB(), np.float64), t)
+        else:
+            colors = ColorArray(color.getRGB(), np.float64)
+        buff.blend(xs, ys, colors, coverage, self.blendMode)
+
+    @staticmethod
+    def drawLines(buff, starts, ends, colors, doSmooth=True, doAA=False, doAAlevel=4, mode="over"):
+        """
+        Draw N lines on buff in one call. Same pixels as calling drawLine without anti-aliasing for every line in order.
+        With anti-aliasing, lines are drawn one pixel wide into the supersampling layer of buff.
+        With another blend mode than "over", every line is blended onto the result of the lines before it, so the
+        lines are written one by one.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param starts: line start points, N x 2 integer array
+        :type starts: numpy.ndarray[int]
+        :param ends: line end points, N x 2 integer array
+        :type ends: numpy.ndarray[int]
+        :param colors: line colors at start and end, N x 2 x 3 float array in [0, 1]
+        :type colors: numpy.ndarray[float]
+        :param doSmooth: Control flag of color smooth interpolation, end color is used for the whole line if not set
+        :type doSmooth: bool
+        :param doAA: Control flag of doing anti-aliasing
+        :type doAA: bool
+        :param doAAlevel: anti-aliasing super sampling level
+        :type doAAlevel: int
+        :param mode: blend mode, one of Buff.BLEND_MODES
+        :type mode: str
+        :rtype: None
+        """
+        if doAA:
+            starts, ends, colors = LineBatch.supersampled(starts, ends, colors, doAAlevel)
+        if mode == "over":
+            LineBatch.draw(Sketch.blendTarget(buff, doAA, doAAlevel, mode), starts, ends, colors, doSmooth)
+            return
+        # a line with anti-aliasing is doAAlevel consecutive subpixel lines
+        k = doAAlevel if doAA else 1
+        for i in range(0, len(starts), k):
+            LineBatch.draw(Sketch.blendTarget(buff, doAA, doAAlevel, mode), starts[i:i + k], ends[i:i + k],
+                           colors[i:i + k], doSmooth)
+            buff.resolve()
+
+    @staticmethod
+    def blendTarget(buff, doAA, doAAlevel, mode):
+        """
+        Where the vectorized backends write a primitive: with anti-aliasing the supersampling layer of buff, resolved
+        with mode, otherwise buff itself in "over" mode and a BlendView of buff in the other modes.
+        A primitive in a mode other than "over" must be resolved before the next one is drawn.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :rtype: Buff or SupersampleBuff or BlendView
+        """
+        if doAA:
+            return buff.supersample(doAAlevel, mode)
+        return buff if mode == "over" else BlendView(buff, mode)
+
+    @recorded
+    def drawLinePairs(self, buff, lines, doSmooth=True, doAA=False, doAAlevel=4):
+        """
+        Draw a list of (p1, p2) point pairs, batched with drawLines unless the per pixel loops are selected
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param lines: end points of every line
+        :type lines: list[tuple[Point, Point]]
+        :rtype: None
+        """
+        if not self.useScanlineFill:
+            for p1, p2 in lines:
+                self.drawLine(buff, p1, p2, doSmooth, doAA, doAAlevel)
+            return
+        self.drawLineArrays(buff,
+                            [p1.coords for p1, _ in lines],
+                            [p2.coords for _, p2 in lines],
+                            [(p1.color.getRGB(), p2.color.getRGB()) for p1, p2 in lines],
+                            doSmooth, doAA, doAAlevel)
+
+    def drawLineArrays(self, buff, starts, ends, colors, doSmooth=True, doAA=False, doAAlevel=4):
+        """
+        drawLines with the blend mode of this sketch, collected for tiled rasterization during drawTiled
+
+        :rtype: None
+        """
+        tiles = self.tilesFor(buff, doAA, doAAlevel)
+        if tiles is not None:
+            tiles.addLines(starts, ends, colors, doSmooth)
+            return
+        self.drawLines(buff, starts, ends, colors, doSmooth, doAA, doAAlevel, self.blendMode)
 
     def findLineBoundary(self, buff, p1, p2, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False):
         """
@@ -506,7 +812,7 @@ class Sketch(CanvasBase):
         #print(p1, p2)
         delta_x = (p2.coords[0] - p1.coords[0]) * doAAlevel + (doAAlevel - 1) * (2 * ((p2.coords[0] - p1.coords[0]) >= 0) - 1)
         delta_y = (p2.coords[1] - p1.coords[1]) * doAAlevel + (doAAlevel - 1) * (2 * ((p2.coords[1] - p1.coords[1]) >= 0) - 1)
-        edge = [[Point((buff.width*doAAlevel+1, 0), ColorType(0, 0, 0)), Point((-1, 0), ColorType(0, 0, 0))] for _ in range(abs(delta_y) + 1)] #Store leftmost and rightmost point in for each y value (subpixel included)
+        edge = [[Point((buff.width*doAAlevel+1, 0), BLACK), Point((-1, 0), BLACK)] for _ in range(abs(delta_y) + 1)] #Store leftmost and rightmost point in for each y value (subpixel included)
         #print(len(edge))
         #print("START AT ", p1.coords)
 
@@ -649,17 +955,69 @@ class Sketch(CanvasBase):
 
         return edge
 
-    def drawTriangle(self, buff, p1, p2, p3, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False):
+    def fillTriangle(self, buff, p1, p2, p3, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False,
+                     textureCoords=None):
+        """
+        Same as drawTriangle, computed with the vectorized backends. Same pixels as the per pixel loops with
+        ScanlineFill and doAA off, pixels of EdgeRaster follow the top-left rule instead. With doAA the triangle is
+        filled into the supersampling layer of buff, which filters differently from the coverage counting loops.
+
+        :param textureCoords: texture coordinates of p1, p2 and p3 in texels, optionally with w for perspective
+                              correct mapping. By default the textures of the points, or the bounding box fit.
+        :type textureCoords: list[list[float]]
+        :rtype: None
+        """
+        self.fillTriangleArrays(buff, *ScanlineFill.pointArrays(p1, p2, p3, textureCoords), doSmooth, doAA, doAAlevel,
+                                doTexture)
+
+    def fillTriangleArrays(self, buff, xy, rgb, textureCoords=None, doSmooth=True, doAA=False, doAAlevel=4,
+                           doTexture=False):
+        """
+        fillTriangle of a triangle given as vertex arrays, e.g. slices of a VertexBatch
+
+        :param xy: (x, y) of the three vertices, shape (3, 2)
+        :type xy: numpy.ndarray[int]
+        :param rgb: colors of the three vertices, shape (3, 3)
+        :type rgb: numpy.ndarray[float]
+        :param textureCoords: texture coordinates of the vertices, shape (3, 2) or (3, 3), or None for the bounding
+                              box fit
+        :type textureCoords: numpy.ndarray[float]
+        :rtype: None
+        """
+        tiles = self.tilesFor(buff, doAA, doAAlevel, not doTexture or textureCoords is None)
+        if tiles is not None:
+            tiles.addTriangles(xy, rgb, doSmooth, doTexture)
+            return
+        if doAA:
+            # Fill at doAAlevel times the resolution with vertices at pixel centers, the supersampling layer is
+            # box filtered onto buff at the end of the frame
+            xy = np.asarray(xy, dtype=np.int64) * doAAlevel + doAAlevel // 2
+        target = self.blendTarget(buff, doAA, doAAlevel, self.blendMode)
+        texture = self.textureMipMap if self.doMipmap else self.textureSampler
+        if self.useEdgeRaster:
+            EdgeRaster.fillTriangleArrays(target, xy, rgb, doSmooth, doTexture, texture, textureCoords)
+        else:
+            ScanlineFill.fillTriangleArrays(target, xy, rgb, doSmooth, doTexture, texture, textureCoords,
+                                            fixedPoint=self.useFixedPoint and target is buff)
+        if self.blendMode != "over":
+            buff.resolve()
+
+    @recorded
+    def drawTriangle(self, buff, p1, p2=None, p3=None, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False):
         """
         draw Triangle to buff. apply smooth color filling if doSmooth set to true, otherwise fill with first point color
         if doAA is true, apply anti-aliasing to triangle based on doAAlevel given.
+        If p1 is a VertexBatch, p2 and p3 are ignored and a triangle is drawn for every 3 consecutive vertices of the
+        batch. Texture coordinates of the batch are used for texture mapping.
+        With doTexture, the texture coordinates of the points are used if all three have one, (u, v) in texels or
+        (u, v, w) for perspective correct mapping, otherwise the triangle bounding box is fitted in the texture.
 
         :param buff: The buff to edit
         :type buff: Buff
-        :param p1: First triangle vertex
+        :param p1: First triangle vertex, or a batch of triangle vertices
         :param p2: Second triangle vertex
         :param p3: Third triangle vertex
-        :type p1: Point
+        :type p1: Point or VertexBatch
         :type p2: Point
         :type p3: Point
         :param doSmooth: Color smooth filling control flag
@@ -681,13 +1039,30 @@ class Sketch(CanvasBase):
         #   3. You should be able to support both flat shading and smooth shading, which is controlled by doSmooth
         #   4. For texture-mapped fill of triangles, it should be controlled by doTexture flag.
 
+        if isinstance(p1, VertexBatch):
+            coords, colors, textureCoords = p1.triangleArrays()
+            if not self.useScanlineFill:
+                # the per pixel loops work on Points
+                points = p1.toPoints()
+                for i in range(0, len(coords) * 3, 3):
+                    self.drawTriangle(buff, *points[i:i + 3], doSmooth, doAA, doAAlevel, doTexture)
+                return
+            for i in range(len(coords)):
+                self.fillTriangleArrays(buff, coords[i], colors[i], None if textureCoords is None else textureCoords[i],
+                                        doSmooth, doAA, doAAlevel, doTexture)
+            return
+
+        if self.useScanlineFill:
+            self.fillTriangle(buff, p1, p2, p3, doSmooth, doAA, doAAlevel, doTexture)
+            return
+
         color = p1.color
         if not doAA:
             doAAlevel = 1
         if not doSmooth or doTexture:
             p2.color = color
             p3.color = color
-        if doTexture:
+        if doTexture and any(p.texture is None for p in (p1, p2, p3)):
             #Setup for texture mapping
             bound_l = min(min(p1.coords[0], p2.coords[0]), p3.coords[0])
             bound_r = max(max(p1.coords[0], p2.coords[0]), p3.coords[0])
@@ -705,6 +1080,11 @@ class Sketch(CanvasBase):
             #print(p1.texture)
             #print(p2.texture)
             #print(p3.texture)
+        if doTexture:
+            # (u / w, v / w, 1 / w) are interpolated for perspective correct mapping and divided at every pixel, on
+            # copies so the texture coordinates of the given points stay the same
+            values = ScanlineFill.textureValues(None, None, [p.texture for p in (p1, p2, p3)])
+            p1, p2, p3 = [Point(p.coords, p.color, value) for p, value in zip((p1, p2, p3), values.tolist())]
         
         #Sort p to have their y-value ascending
         if p1.coords[1] > p2.coords[1]:
@@ -757,36 +1137,90 @@ class Sketch(CanvasBase):
 
             #print(left.coords[0]//doAAlevel, right.coords[0]//doAAlevel, y)
 
-            for x in range(left.coords[0]//doAAlevel, right.coords[0]//doAAlevel+1):
-                '''
-                cnt = 0 #count number of subpixels in the pixel
-                for y_sub in range(doAAlevel): #y_sub refers to subpixel
-                    y_side = (y-p1.coords[1])*doAAlevel + y_sub
-                    #cnt += min(right.coords[0], (x+1)*doAAlevel - 1) - max(left.coords[0], x*doAAlevel) + 1
-
-                if doSmooth:
-                    self.drawPoint(buff, Point((x, y), self.alpha(buff, x, y, self.smooth1D(left.color, right.color, left.coords[0]//doAAlevel, x, right.coords[0]//doAAlevel), cnt/(doAAlevel**2))))
-                else:
-                    self.drawPoint(buff, Point((x, y), self.alpha(buff, x, y, color, cnt/(doAAlevel**2))))'''
-                
-                cnt_x = 0 #count number of subpixels in the pixel horizontally
-                cnt_y = 0 #count number of subpixels in the pixel vertically
-                for y_sub in range(doAAlevel): #y_sub refers to subpixel
-                    y_side = (y-p1.coords[1])*doAAlevel + y_sub
-                    cnt_x = max(cnt_x, min(right.coords[0], (x+1)*doAAlevel - 1) - max(left.coords[0], x*doAAlevel) + 1)
-                    cnt_y += min(min(right.coords[0], (x+1)*doAAlevel - 1) - max(left.coords[0], x*doAAlevel) + 1, 1)
-                    cnt = max(cnt_x, cnt_y)
-
-                if doTexture:
-                    #print('(', left.coords[0]//doAAlevel, ',', right.coords[0]//doAAlevel, ') ->', self.smoothTexture1D(left.texture, right.texture, left.coords[0]//doAAlevel, x, right.coords[0]//doAAlevel))
-                    self.drawPoint(buff, Point((x, y), self.smoothTexture2D(self.smoothTexture1D(left.texture, right.texture, left.coords[0]//doAAlevel, x, right.coords[0]//doAAlevel))))
-                elif doSmooth:
-                    self.drawPoint(buff, Point((x, y), self.alpha(buff, x, y, self.smooth1D(left.color, right.color, left.coords[0]//doAAlevel, x, right.coords[0]//doAAlevel), cnt/doAAlevel)))
-                else:
-                    self.drawPoint(buff, Point((x, y), self.alpha(buff, x, y, color, cnt/doAAlevel)))
+            # the whole span of this row at once, colors stay in a ColorArray instead of a ColorType per pixel, in
+            # float64 to round the same as the ColorType arithmetic
+            l, r = left.coords[0]//doAAlevel, right.coords[0]//doAAlevel
+            xs = np.arange(max(l, 0), min(r, buff.width - 1) + 1)
+            if xs.size == 0 or y < 0 or y >= buff.height:
+                continue
+            ys = np.full(xs.size, y)
+            t = (xs - l) / (r - l) if l != r else 0
+
+            if doTexture:
+                values = [t1 * (1 - t) + t2 * t for t1, t2 in zip(left.texture, right.texture)]
+                u, v = (values[0] / values[2], values[1] / values[2]) if len(values) == 3 else values
+                buff.blend(xs, ys, ColorArray(self.textureSampler.sampleBilinear(u, v)), 1.0, self.blendMode)
+                continue
+
+            # count number of subpixels in the pixel horizontally, and vertically
+            width = np.minimum(right.coords[0], (xs+1)*doAAlevel - 1) - np.maximum(left.coords[0], xs*doAAlevel) + 1
+            cnt = np.maximum(np.maximum(width, 0), doAAlevel * np.minimum(width, 1))
+            if doSmooth:
+                src = ColorArray(left.color.getRGB(), np.float64).lerp(ColorArray(right.color.getRGB(), np.float64), t)
+            else:
+                src = ColorArray(color.getRGB(), np.float64)
+            buff.blend(xs, ys, src, cnt/doAAlevel, self.blendMode)
 
         return
 
+    @recorded
+    def drawTriangleMesh(self, buff, vertices, indices, doSmooth=True, doAA=False, doAAlevel=4, doTexture=False):
+        """
+        draw the triangles of an indexed mesh to buff, e.g. a triangle fan sharing its center vertex. With the
+        vectorized ScanlineFill backend every edge is rasterized once and reused by both triangles sharing it.
+        Otherwise the triangles are drawn one by one with drawTriangle.
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param vertices: mesh vertices
+        :type vertices: list[Point] or VertexBatch
+        :param indices: vertex indices of every triangle, shape (M, 3). The first vertex gives the flat color.
+        :type indices: numpy.ndarray[int] or list[tuple[int]]
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doAA: Anti-aliasing control flag
+        :type doAA: bool
+        :param doAAlevel: Anti-aliasing super sampling level
+        :type doAAlevel: int
+        :param doTexture: Draw triangle with texture control flag
+        :type doTexture: bool
+        :rtype: None
+        """
+        indices = np.asarray(indices, dtype=np.int64).reshape((-1, 3))
+        if not self.useScanlineFill:
+            # the per pixel loops change the points they draw, so every triangle gets its own copies
+            if isinstance(vertices, VertexBatch):
+                vertices = vertices.toPoints()
+            for i1, i2, i3 in indices.tolist():
+                self.drawTriangle(buff, *[Point(vertices[i].coords, vertices[i].color, vertices[i].texture)
+                                          for i in (i1, i2, i3)], doSmooth, doAA, doAAlevel, doTexture)
+            return
+
+        if isinstance(vertices, VertexBatch):
+            xy, rgb, uv = vertices.xy, vertices.rgb, vertices.uv
+        else:
+            xy, rgb, uv = ScanlineFill.meshArrays(vertices)
+        tiles = self.tilesFor(buff, doAA, doAAlevel, not doTexture or uv is None)
+        if tiles is not None:
+            # tiles draw the triangles one by one, which gives the same pixels as sharing the edges
+            tiles.addTriangles(xy[indices], rgb[indices], doSmooth, doTexture)
+            return
+        if self.useEdgeRaster:
+            for triangle in indices:
+                self.fillTriangleArrays(buff, xy[triangle], rgb[triangle], None if uv is None else uv[triangle],
+                                        doSmooth, doAA, doAAlevel, doTexture)
+            return
+
+        if doAA:
+            # same subpixel vertices as fillTriangle
+            xy = xy.astype(np.int64) * doAAlevel + doAAlevel // 2
+        target = self.blendTarget(buff, doAA, doAAlevel, self.blendMode)
+        texture = self.textureMipMap if self.doMipmap else self.textureSampler
+        ScanlineFill.fillTriangleMeshArrays(target, xy, rgb, uv, indices, doSmooth, doTexture, texture,
+                                            self.useFixedPoint and target is buff)
+        if self.blendMode != "over":
+            buff.resolve()
+
     # test for lines lines in all directions
     def testCaseLine01(self, n_steps):
         center_x = int(self.buff.width / 2)
@@ -794,14 +1228,16 @@ class Sketch(CanvasBase):
         radius = int(min(self.buff.width, self.buff.height) * 0.45)
 
         v0 = Point([center_x, center_y], ColorType(1, 1, 0))
+        lines = []
         for step in range(0, n_steps):
             theta = math.pi * step / n_steps
             v1 = Point([center_x + int(math.sin(theta) * radius), center_y + int(math.cos(theta) * radius)],
                        ColorType(0, 0, (1 - step / n_steps)))
             v2 = Point([center_x - int(math.sin(theta) * radius), center_y - int(math.cos(theta) * radius)],
                        ColorType(0, (1 - step / n_steps), 0))
-            self.drawLine(self.buff, v2, v0, doSmooth=True)
-            self.drawLine(self.buff, v0, v1, doSmooth=True)
+            lines.append((v2, v0))
+            lines.append((v0, v1))
+        self.drawLinePairs(self.buff, lines, doSmooth=True)
 
     # test for lines: drawing circle and petal 
     def testCaseLine02(self, n_steps):
@@ -813,10 +1249,10 @@ class Sketch(CanvasBase):
         radius = (0.75 * min(cx, cy))
         p = radius * 0.25
 
+        lines = []
         # Outer petals
         for i in range(n_steps + 2):
-            self.drawLine(self.buff,
-                          Point((math.floor(0.5 + radius * math.sin(d_theta * i) + p * math.sin(d_petal * i)) + cx,
+            lines.append((Point((math.floor(0.5 + radius * math.sin(d_theta * i) + p * math.sin(d_petal * i)) + cx,
                                  math.floor(0.5 + radius * math.cos(d_theta * i) + p * math.cos(d_petal * i)) + cy),
                                 ColorType(1, (128 + math.sin(d_theta * i * 5) * 127) / 255,
                                           (128 + math.cos(d_theta * i * 5) * 127) / 255)),
@@ -825,8 +1261,7 @@ class Sketch(CanvasBase):
                                  math.floor(0.5 + radius * math.cos(d_theta * (i + 1)) + p * math.cos(
                                      d_petal * (i + 1))) + cy),
                                 ColorType(1, (128 + math.sin(d_theta * 5 * (i + 1)) * 127) / 255,
-                                          (128 + math.cos(d_theta * 5 * (i + 1)) * 127) / 255)),
-                          doSmooth=True, doAA=self.doAA, doAAlevel=self.doAAlevel)
+                                          (128 + math.cos(d_theta * 5 * (i + 1)) * 127) / 255))))
 
         # Draw circle
         for i in range(n_steps + 1):
@@ -834,7 +1269,8 @@ class Sketch(CanvasBase):
                         math.floor(0.5 * radius * math.cos(d_theta * i)) + cy), ColorType(1, 97. / 255, 0))
             v1 = Point((math.floor(0.5 * radius * math.sin(d_theta * (i + 1))) + cx,
                         math.floor(0.5 * radius * math.cos(d_theta * (i + 1))) + cy), ColorType(1, 97. / 255, 0))
-            self.drawLine(self.buff, v0, v1, doSmooth=True, doAA=self.doAA, doAAlevel=self.doAAlevel)
+            lines.append((v0, v1))
+        self.drawLinePairs(self.buff, lines, doSmooth=True, doAA=self.doAA, doAAlevel=self.doAAlevel)
 
     # test for smooth filling triangle
     def testCaseTri01(self, n_steps):
@@ -906,6 +1342,28 @@ class Sketch(CanvasBase):
         for t in triangleList:
             self.drawTriangle(self.buff, *t, doTexture=True)
 
+    def testCaseTriTexture02(self, n_steps):
+        # Test case for perspective correct and mipmapped texture mapping, a floor of texture tiles going to the horizon
+        tiles = max(2, n_steps // 6)
+        horizon = self.buff.height * 0.8
+        focal = self.buff.height * 0.7
+        halfWidth = (self.buff.width / 2 - 1) / focal
+        cx = self.buff.width / 2
+        tu, tv = self.texture.width - 1, self.texture.height - 1
+
+        def vertex(i, j):
+            # floor point (x, z) one unit below the eye, i across and j into the screen
+            x = halfWidth * (2 * i / tiles - 1)
+            z = 1 + 4 * j
+            return Point((int(cx + focal * x / z), int(horizon - focal / z)), ColorType(1, 1, 1),
+                         (tu * (i % 2), tv * (j % 2), z))
+
+        for j in range(tiles):
+            for i in range(tiles):
+                v00, v10, v01, v11 = vertex(i, j), vertex(i + 1, j), vertex(i, j + 1), vertex(i + 1, j + 1)
+                self.drawTriangle(self.buff, v00, v10, v11, doTexture=True)
+                self.drawTriangle(self.buff, v00, v11, v01, doTexture=True)
+
 
 if __name__ == "__main__":
     def main():
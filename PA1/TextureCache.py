@@ -0,0 +1,181 @@
+"""
+Defines TextureCache class, which memoizes decoded texture images as float32 texel arrays ready for TextureSampler,
+and their MipMap pyramids. Entries are keyed by file path and modification time. Besides the in-memory cache, texels
+can be stored on disk as an .npy file next to the image, which later runs memory-map instead of decoding the image
+again.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import os
+
+import numpy as np
+
+from MipMap import MipMap
+
+try:
+    # From pip package "Pillow"
+    from PIL import Image
+except Exception:
+    print("Need to install PIL package. Pip package name is Pillow")
+    raise ImportError
+
+
+class TextureCache:
+    """
+    Texels are float32 in [0, 1] with shape (height, width, 3), flipped so that row 0 is the bottom of the image.
+
+    * useDisk(bool): Control flag of reading and writing the .npy texel file next to the image
+    * hits(int): loads served from memory
+    * diskHits(int): loads served by memory-mapping the .npy file
+    * misses(int): loads which decoded the image
+    """
+    DISK_SUFFIX = ".texels.npy"
+
+    entries = None
+    mipmaps = None
+    useDisk = True
+    hits = 0
+    diskHits = 0
+    misses = 0
+
+    def __init__(self, useDisk=True):
+        """
+        :param useDisk: Control flag of reading and writing the .npy texel file next to the image
+        :type useDisk: bool
+        :rtype: None
+        """
+        self.entries = {}
+        self.mipmaps = {}
+        self.useDisk = useDisk
+        self.hits = 0
+        self.diskHits = 0
+        self.misses = 0
+
+    @staticmethod
+    def diskPath(path):
+        """
+        :param path: image file path
+        :type path: str
+        :return: path of the .npy texel file for the image
+        :rtype: str
+        """
+        return path + TextureCache.DISK_SUFFIX
+
+    @staticmethod
+    def decode(path):
+        """
+        Decode an image file to texels, without any caching
+
+        :param path: image file path
+        :type path: str
+        :rtype: numpy.ndarray[float32]
+        """
+        image = np.array(Image.open(path).convert("RGB"), dtype=np.uint8)
+        # Because imported image is upside down, reverse it
+        image = np.flip(image, axis=0)
+        return np.divide(image, 255, dtype=np.float32)
+
+    def load(self, path):
+        """
+        Get texels of an image file. The returned array is shared between callers and must not be modified.
+
+        :param path: image file path
+        :type path: str
+        :rtype: numpy.ndarray[float32]
+        """
+        path = os.path.abspath(path)
+        mtime = os.stat(path).st_mtime_ns
+        entry = self.entries.get(path)
+        if entry is not None and entry[0] == mtime:
+            self.hits += 1
+            return entry[1]
+
+        texels = None
+        npyPath = self.diskPath(path)
+        if self.useDisk and os.path.isfile(npyPath) and os.stat(npyPath).st_mtime_ns >= mtime:
+            try:
+                texels = np.load(npyPath, mmap_mode="r")
+                self.diskHits += 1
+            except (OSError, ValueError):
+                texels = None
+        if texels is None:
+            texels = self.decode(path)
+            texels.flags.writeable = False
+            self.misses += 1
+            if self.useDisk:
+                self._save(npyPath, texels)
+
+        self.entries[path] = (mtime, texels)
+        return texels
+
+    def loadMipMap(self, path):
+        """
+        Get the mip pyramid of an image file, built once from the texels of load and shared between callers
+
+        :param path: image file path
+        :type path: str
+        :rtype: MipMap
+        """
+        texels = self.load(path)
+        entry = self.mipmaps.get(os.path.abspath(path))
+        if entry is not None and entry[0] is texels:
+            return entry[1]
+        mipmap = MipMap(texels)
+        self.mipmaps[os.path.abspath(path)] = (texels, mipmap)
+        return mipmap
+
+    def _save(self, npyPath, texels):
+        """
+        In class usage only, write texels next to the image. Failing to write (e.g. read-only folder) is not an error.
+        """
+        tempPath = npyPath + ".tmp"
+        try:
+            with open(tempPath, "wb") as f:
+                np.save(f, texels)
+            os.replace(tempPath, npyPath)
+        except OSError:
+            if os.path.exists(tempPath):
+                os.remove(tempPath)
+
+    def invalidate(self, path=None, removeDisk=False):
+        """
+        Drop cached texels of one image, or of all images if path is None
+
+        :param path: image file path
+        :type path: str
+        :param removeDisk: also delete the .npy texel files
+        :type removeDisk: bool
+        :rtype: None
+        """
+        if path is None:
+            paths = list(self.entries.keys())
+        else:
+            paths = [os.path.abspath(path)]
+        for p in paths:
+            self.entries.pop(p, None)
+            self.mipmaps.pop(p, None)
+            if removeDisk and os.path.isfile(self.diskPath(p)):
+                os.remove(self.diskPath(p))
+
+    def stats(self):
+        """
+        :return: hit and miss counts, and the number of images in memory
+        :rtype: dict
+        """
+        return {"hits": self.hits, "diskHits": self.diskHits, "misses": self.misses, "entries": len(self.entries)}
+
+
+if __name__ == "__main__":
+    import time
+
+    cache = TextureCache()
+    cache.invalidate("./pattern.jpg", removeDisk=True)
+    for _ in range(3):
+        t1 = time.time()
+        cache.load("./pattern.jpg")
+        print(time.time() - t1, cache.stats())
+    cache.invalidate()
+    t1 = time.time()
+    cache.load("./pattern.jpg")
+    print(time.time() - t1, cache.stats())
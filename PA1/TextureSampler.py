@@ -0,0 +1,181 @@
+"""
+Defines TextureSampler class, which holds a texture as one contiguous float32 texel array and samples it for whole
+arrays of texture coordinates at once. This replaces per pixel Point queries on a texture Buff.
+
+Texture coordinates are in texel units: texel (i, j) is at u = i, v = j, so u in [0, width - 1] and v in
+[0, height - 1] are inside the texture. Coordinates outside are clamped or wrapped depending on the address mode.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import numpy as np
+
+
+class TextureSampler:
+    """
+    Vectorized texture fetch
+
+    * texels(numpy.ndarray[float32]): texture colors in [0, 1], shape (height, width, 3), row v = 0 at the bottom
+    * width, height(int): texture size in texels
+    * mode(str): address mode for out of range coordinates, TextureSampler.CLAMP or TextureSampler.WRAP
+    * texels8(numpy.ndarray[int32]): texels in [0, 255] for sampleBilinearFixed, made on first use
+    """
+    CLAMP = "clamp"
+    WRAP = "wrap"
+    # fraction bits of the fixed point bilinear weights, 8 bits colors * 2 weights stay within int32
+    WEIGHT_BITS = 11
+
+    texels = None
+    texels8 = None
+    width = None
+    height = None
+    mode = None
+
+    def __init__(self, image, mode=CLAMP):
+        """
+        :param image: texture image in uint8, shape (height, width, 3) or (height, width, 4). Row 0 is v = 0.
+                      A float32 array in [0, 1] (e.g. from TextureCache) is used as texels without copying.
+        :type image: numpy.ndarray[uint8] or numpy.ndarray[float32]
+        :param mode: address mode, TextureSampler.CLAMP or TextureSampler.WRAP
+        :type mode: str
+        :rtype: None
+        """
+        if not isinstance(image, np.ndarray) or image.ndim != 3 or image.shape[2] < 3:
+            raise TypeError("TextureSampler needs an image array in shape (height, width, 3)")
+        self.setMode(mode)
+        self.height, self.width = image.shape[:2]
+        if image.dtype == np.float32:
+            self.texels = np.ascontiguousarray(image[:, :, :3])
+        else:
+            self.texels = np.ascontiguousarray(np.divide(image[:, :, :3], 255, dtype=np.float32))
+
+    def setMode(self, mode):
+        """
+        :param mode: address mode, TextureSampler.CLAMP or TextureSampler.WRAP
+        :type mode: str
+        :rtype: None
+        """
+        if mode not in (TextureSampler.CLAMP, TextureSampler.WRAP):
+            raise TypeError("TextureSampler mode can only be clamp or wrap")
+        self.mode = mode
+
+    def _address(self, index, size):
+        """
+        In class usage only, map integer texel indices into [0, size - 1] by the address mode
+        """
+        if self.mode == TextureSampler.WRAP:
+            return np.mod(index, size)
+        return np.clip(index, 0, size - 1)
+
+    def _fetch(self, x, y):
+        """
+        In class usage only, gather texels at in range integer indices
+        """
+        return np.take(self.texels.reshape((-1, 3)), y * self.width + x, axis=0)
+
+    def sampleNearest(self, u, v):
+        """
+        Sample the nearest texel of every coordinate
+
+        :param u: horizontal texture coordinates
+        :type u: numpy.ndarray[float]
+        :param v: vertical texture coordinates, same shape as u
+        :type v: numpy.ndarray[float]
+        :return: colors in [0, 1], shape u.shape + (3,)
+        :rtype: numpy.ndarray[float32]
+        """
+        u = np.asarray(u, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        x = self._address(np.floor(u + 0.5).astype(np.intp), self.width)
+        y = self._address(np.floor(v + 0.5).astype(np.intp), self.height)
+        return self._fetch(x.ravel(), y.ravel()).reshape(u.shape + (3,))
+
+    def sampleBilinear(self, u, v):
+        """
+        Sample with bilinear interpolation between the four texels around every coordinate
+
+        :param u: horizontal texture coordinates
+        :type u: numpy.ndarray[float]
+        :param v: vertical texture coordinates, same shape as u
+        :type v: numpy.ndarray[float]
+        :return: colors in [0, 1], shape u.shape + (3,)
+        :rtype: numpy.ndarray[float32]
+        """
+        u = np.asarray(u, dtype=np.float64)
+        v = np.asarray(v, dtype=np.float64)
+        shape = u.shape
+        u = u.ravel()
+        v = v.ravel()
+        if self.mode == TextureSampler.CLAMP:
+            u = np.clip(u, 0, self.width - 1)
+            v = np.clip(v, 0, self.height - 1)
+        floor_u = np.floor(u)
+        floor_v = np.floor(v)
+        dist_u = (u - floor_u).astype(np.float32)[:, None]
+        dist_v = (v - floor_v).astype(np.float32)[:, None]
+        left = floor_u.astype(np.intp)
+        down = floor_v.astype(np.intp)
+        right = self._address(left + 1, self.width)
+        up = self._address(down + 1, self.height)
+        left = self._address(left, self.width)
+        down = self._address(down, self.height)
+
+        color_d = self._fetch(left, down)
+        color_d += (self._fetch(right, down) - color_d) * dist_u
+        color_u = self._fetch(left, up)
+        color_u += (self._fetch(right, up) - color_u) * dist_u
+        color_d += (color_u - color_d) * dist_v
+        return color_d.reshape(shape + (3,))
+
+    def sampleBilinearFixed(self, u, v, bits=16):
+        """
+        Integer version of sampleBilinear for fixed point texture coordinates, with WEIGHT_BITS bilinear weights.
+        Within 1 of the truncated 8 bits sampleBilinear colors.
+
+        :param u: horizontal texture coordinates, fixed point with bits fraction bits
+        :type u: numpy.ndarray[int32]
+        :param v: vertical texture coordinates, fixed point with bits fraction bits
+        :type v: numpy.ndarray[int32]
+        :param bits: fraction bits of u and v
+        :type bits: int
+        :return: colors, shape (n, 3)
+        :rtype: numpy.ndarray[uint8]
+        """
+        if self.texels8 is None:
+            self.texels8 = np.rint(self.texels.reshape((-1, 3)) * 255).astype(np.int32)
+        u = np.asarray(u, dtype=np.int32)
+        v = np.asarray(v, dtype=np.int32)
+        if self.mode == TextureSampler.CLAMP:
+            u = np.clip(u, 0, (self.width - 1) << bits)
+            v = np.clip(v, 0, (self.height - 1) << bits)
+        # weights rounded to WEIGHT_BITS, a weight of 1 << WEIGHT_BITS is the next texel
+        weightShift = bits - TextureSampler.WEIGHT_BITS
+        half = 1 << (weightShift - 1)
+        dist_u = (((u & ((1 << bits) - 1)) + half) >> weightShift)[:, None]
+        dist_v = (((v & ((1 << bits) - 1)) + half) >> weightShift)[:, None]
+        left = u >> bits
+        down = v >> bits
+        right = self._address(left + 1, self.width)
+        up = self._address(down + 1, self.height)
+        left = self._address(left, self.width)
+        down = self._address(down, self.height)
+
+        def fetch(x, y):
+            return np.take(self.texels8, y * self.width + x, axis=0)
+
+        color_d = fetch(left, down)
+        color_d = (color_d << TextureSampler.WEIGHT_BITS) + (fetch(right, down) - color_d) * dist_u
+        color_u = fetch(left, up)
+        color_u = (color_u << TextureSampler.WEIGHT_BITS) + (fetch(right, up) - color_u) * dist_u
+        color_d = (color_d << TextureSampler.WEIGHT_BITS) + (color_u - color_d) * dist_v
+        return (color_d >> (2 * TextureSampler.WEIGHT_BITS)).astype(np.uint8)
+
+
+if __name__ == "__main__":
+    image = np.zeros((2, 2, 3), dtype=np.uint8)
+    image[1, 1] = 255
+    sampler = TextureSampler(image)
+    print(sampler.sampleBilinear([0, 0.5, 1, 2], [0, 0.5, 1, 2]))
+    print(sampler.sampleNearest([0.4, 0.6], [0.4, 0.6]))
+    sampler.setMode(TextureSampler.WRAP)
+    print(sampler.sampleBilinear([1.5, -0.5], [1.5, -0.5]))
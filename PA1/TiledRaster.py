@@ -0,0 +1,464 @@
+"""
+Tiled multi-core rasterization. Triangles and lines are recorded in drawing order, binned into square screen tiles by
+their bounding boxes, and the tiles are rasterized by a multiprocessing pool kept until close(). Workers draw straight
+into the pixels of a SharedBuff and read the texture from shared memory, so every task only sends the primitives of its
+tile. With one process the primitives are drawn on the whole canvas at once, without binning.
+
+Every pixel belongs to exactly one tile, and inside a tile primitives are drawn in their recorded order with the same
+backends as Sketch (ScanlineFill, LineBatch and the supersampling layer), so the image is the same as drawing the
+primitives one by one, whatever the number of processes.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import os
+import multiprocessing
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from Buff import Buff
+from SharedBuff import SharedBuff
+from ScanlineFill import ScanlineFill
+from LineBatch import LineBatch
+from SupersampleBuff import SupersampleBuff
+from TextureSampler import TextureSampler
+from MipMap import MipMap
+
+# State of a pool worker: shared memory blocks it is attached to, kept between tasks by TiledRaster._attach
+_worker = {}
+
+
+class TiledRaster:
+    """
+    Record primitives with addTriangle(s)/addLine(s), then draw all of them on a buff with render.
+
+    * tileSize(int): tile width and height in pixels
+    * processes(int): number of worker processes, 1 renders in the calling process
+    * pool(multiprocessing.pool.Pool): the worker processes, started by the first render with several tiles
+    * sharedBuff(SharedBuff): pixels shared with the workers when a plain Buff is rendered
+    * sharedTexture(TextureSampler or MipMap): the texture whose level 0 texels are in textureMemory
+    """
+    TRIANGLE = 0
+    LINE = 1
+
+    tileSize = 64
+    processes = None
+    primitives = None
+    pool = None
+    sharedBuff = None
+    sharedTexture = None
+    textureMemory = None
+    owner = None
+
+    def __init__(self, tileSize=64, processes=None):
+        """
+        :param tileSize: tile width and height in pixels
+        :type tileSize: int
+        :param processes: number of worker processes, default is the number of CPU cores
+        :type processes: int
+        :rtype: None
+        """
+        if (not isinstance(tileSize, int)) or tileSize < 1:
+            raise TypeError("tileSize must be an integer >= 1")
+        self.tileSize = tileSize
+        self.processes = processes if processes is not None else (os.cpu_count() or 1)
+        self.primitives = []
+        self.owner = os.getpid()
+
+    def clear(self):
+        """
+        Remove all recorded primitives
+
+        :rtype: None
+        """
+        self.primitives = []
+
+    def addTriangles(self, coords, colors, doSmooth=True, doTexture=False):
+        """
+        Record N triangles, same as calling Sketch.drawTriangle on each of them in order
+
+        :param coords: vertex coordinates, shape (N, 3, 2)
+        :type coords: numpy.ndarray[int]
+        :param colors: vertex colors in [0, 1], shape (N, 3, 3)
+        :type colors: numpy.ndarray[float]
+        :param doSmooth: Color smooth filling control flag
+        :type doSmooth: bool
+        :param doTexture: Draw triangle with texture control flag
+        :type doTexture: bool
+        :rtype: None
+        """
+        coords = np.asarray(coords, dtype=np.intp).reshape((-1, 3, 2))
+        colors = np.asarray(colors, dtype=np.float64).reshape((-1, 3, 3))
+        self.primitives.append((self.TRIANGLE, coords, colors, doSmooth, doTexture))
+
+    def addTriangle(self, p1, p2, p3, doSmooth=True, doTexture=False):
+        """
+        Record one triangle, same arguments as Sketch.drawTriangle
+
+        :type p1: Point
+        :type p2: Point
+        :type p3: Point
+        :rtype: None
+        """
+        points = (p1, p2, p3)
+        self.addTriangles([p.coords for p in points], [p.color.getRGB() for p in points], doSmooth, doTexture)
+
+    def addLines(self, starts, ends, colors, doSmooth=True):
+        """
+        Record N lines, same as calling Sketch.drawLines
+
+        :param starts: line start points, shape (N, 2)
+        :type starts: numpy.ndarray[int]
+        :param ends: line end points, shape (N, 2)
+        :type ends: numpy.ndarray[int]
+        :param colors: colors at both ends, shape (N, 2, 3)
+        :type colors: numpy.ndarray[float]
+        :param doSmooth: Control flag of color smooth interpolation
+        :type doSmooth: bool
+        :rtype: None
+        """
+        starts = np.asarray(starts, dtype=np.intp).reshape((-1, 2))
+        ends = np.asarray(ends, dtype=np.intp).reshape((-1, 2))
+        coords = np.zeros((len(starts), 3, 2), dtype=np.intp)
+        coords[:, 0] = starts
+        coords[:, 1] = ends
+        coords[:, 2] = ends
+        padded = np.zeros((len(starts), 3, 3), dtype=np.float64)
+        padded[:, :2] = np.asarray(colors, dtype=np.float64).reshape((-1, 2, 3))
+        self.primitives.append((self.LINE, coords, padded, doSmooth, False))
+
+    def addLine(self, p1, p2, doSmooth=True):
+        """
+        Record one line, same arguments as Sketch.drawLine
+
+        :type p1: Point
+        :type p2: Point
+        :rtype: None
+        """
+        self.addLines([p1.coords], [p2.coords], [(p1.color.getRGB(), p2.color.getRGB())], doSmooth)
+
+    def scene(self):
+        """
+        All recorded primitives as flat arrays, in drawing order
+
+        :return: kinds (N,), coords (N, 3, 2), colors (N, 3, 3), smooth flags (N,) and texture flags (N,). Lines use
+                 the first two vertices and colors.
+        :rtype: tuple[numpy.ndarray]
+        """
+        if len(self.primitives) == 0:
+            return (np.zeros(0, dtype=np.int8), np.zeros((0, 3, 2), dtype=np.intp), np.zeros((0, 3, 3)),
+                    np.zeros(0, dtype=bool), np.zeros(0, dtype=bool))
+        counts = [len(p[1]) for p in self.primitives]
+        return (np.repeat([p[0] for p in self.primitives], counts).astype(np.int8),
+                np.concatenate([p[1] for p in self.primitives]),
+                np.concatenate([p[2] for p in self.primitives]),
+                np.repeat([p[3] for p in self.primitives], counts).astype(bool),
+                np.repeat([p[4] for p in self.primitives], counts).astype(bool))
+
+    def binTiles(self, coords, width, height):
+        """
+        Find the primitives touching every tile, by bounding box
+
+        :param coords: primitive vertices, shape (N, 3, 2)
+        :type coords: numpy.ndarray[int]
+        :param width: canvas width
+        :type width: int
+        :param height: canvas height
+        :type height: int
+        :return: [x_min, x_max, y_min, y_max] of every non empty tile and its primitive indices in drawing order
+        :rtype: list[tuple[list[int], numpy.ndarray[int]]]
+        """
+        size = self.tileSize
+        tilesX = (width + size - 1) // size
+        tilesY = (height + size - 1) // size
+        # tile range of every bounding box, boxes outside the canvas get an empty range
+        tx0 = np.clip(coords[:, :, 0].min(axis=1) // size, 0, tilesX)
+        tx1 = np.clip(coords[:, :, 0].max(axis=1) // size, -1, tilesX - 1)
+        ty0 = np.clip(coords[:, :, 1].min(axis=1) // size, 0, tilesY)
+        ty1 = np.clip(coords[:, :, 1].max(axis=1) // size, -1, tilesY - 1)
+        spanX = np.maximum(tx1 - tx0 + 1, 0)
+        spanY = np.maximum(ty1 - ty0 + 1, 0)
+
+        # one (tile, primitive) pair for every tile of every bounding box
+        perPrimitive = spanX * spanY
+        if perPrimitive.sum() == 0:
+            return []
+        primitive = np.repeat(np.arange(len(coords)), perPrimitive)
+        local = np.arange(primitive.size) - np.repeat(np.cumsum(perPrimitive) - perPrimitive, perPrimitive)
+        tileX = tx0[primitive] + local % spanX[primitive]
+        tileY = ty0[primitive] + local // spanX[primitive]
+        tile = tileY * tilesX + tileX
+        # a stable sort keeps the drawing order of primitives inside every tile
+        order = np.argsort(tile, kind="stable")
+        tile, primitive = tile[order], primitive[order]
+        bounds = np.flatnonzero(np.concatenate(([True], tile[1:] != tile[:-1], [True])))
+
+        tiles = []
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            y, x = divmod(int(tile[start]), tilesX)
+            rect = [x * size, min((x + 1) * size, width) - 1, y * size, min((y + 1) * size, height) - 1]
+            tiles.append((rect, primitive[start:stop]))
+        return tiles
+
+    def render(self, buff, doAA=False, doAAlevel=4, texture=None):
+        """
+        Draw all recorded primitives on buff. A plain Buff is drawn through sharedBuff and copied back.
+
+        :param buff: The buff to edit
+        :type buff: Buff or SharedBuff
+        :param doAA: Anti-aliasing control flag
+        :type doAA: bool
+        :param doAAlevel: Anti-aliasing super sampling level
+        :type doAAlevel: int
+        :param texture: the texture of textured triangles
+        :type texture: TextureSampler or MipMap
+        :rtype: None
+        """
+        buff.resolve()
+        scene = self.scene()
+        level = doAAlevel if doAA else 0
+        if self.processes <= 1:
+            self.renderDirect(buff, scene, texture, level)
+            return
+        tiles = self.binTiles(scene[1], buff.width, buff.height)
+        if len(tiles) <= 1:
+            self.renderDirect(buff, scene, texture, level)
+            return
+
+        target = buff
+        if not isinstance(buff, SharedBuff):
+            if self.sharedBuff is None:
+                self.sharedBuff = SharedBuff(buff.width, buff.height)
+            elif (self.sharedBuff.width, self.sharedBuff.height) != (buff.width, buff.height):
+                self.sharedBuff.resize(buff.width, buff.height)
+            target = self.sharedBuff
+            target.buff[...] = buff.buff
+        pixels = (target.sharedMemory.name, buff.width, buff.height)
+        textureInfo = self.shareTexture(texture)
+        if self.pool is None:
+            self.pool = multiprocessing.Pool(self.processes)
+        # every task gets only the primitives of its tile, larger tiles first so the last tasks are short
+        tiles.sort(key=lambda tile: -len(tile[1]))
+        tasks = [(pixels, textureInfo, rect, tuple(a[indices] for a in scene), level) for rect, indices in tiles]
+        list(self.pool.imap_unordered(TiledRaster._renderTask, tasks))
+        if target is not buff:
+            buff.buff[...] = target.buff
+        for rect, _ in tiles:
+            buff.markDirty(*rect)
+
+    @staticmethod
+    def renderDirect(buff, scene, texture=None, level=0):
+        """
+        Draw a scene on the whole buff in the calling process, the same pixels as rendering it by tiles
+
+        :param buff: The buff to edit
+        :type buff: Buff
+        :param scene: output of TiledRaster.scene
+        :type scene: tuple[numpy.ndarray]
+        :rtype: None
+        """
+        coords = scene[1]
+        if len(coords) == 0:
+            return
+        rect = [0, buff.width - 1, 0, buff.height - 1]
+        TiledRaster.renderTile(buff.buff, rect, np.arange(len(coords)), scene, texture, level)
+        x_min, y_min = np.maximum(coords.min(axis=(0, 1)), 0)
+        x_max, y_max = np.minimum(coords.max(axis=(0, 1)), [buff.width - 1, buff.height - 1])
+        if x_min <= x_max and y_min <= y_max:
+            buff.markDirty(int(x_min), int(x_max), int(y_min), int(y_max))
+
+    def shareTexture(self, texture):
+        """
+        Put the level 0 texels of texture in shared memory for the workers, once for every texture
+
+        :type texture: TextureSampler or MipMap
+        :return: what TiledRaster._renderTask needs to open the texture, None without texture
+        :rtype: tuple
+        """
+        if texture is None:
+            return None
+        base = texture.levels[0] if isinstance(texture, MipMap) else texture
+        if texture is not self.sharedTexture:
+            self.releaseTexture()
+            self.textureMemory = shared_memory.SharedMemory(create=True, size=base.texels.nbytes)
+            np.ndarray(base.texels.shape, dtype=np.float32, buffer=self.textureMemory.buf)[...] = base.texels
+            self.sharedTexture = texture
+        # workers build the mip pyramid again from level 0, once for every texture
+        return self.textureMemory.name, base.texels.shape, base.mode, isinstance(texture, MipMap)
+
+    def releaseTexture(self):
+        """
+        Free the shared texels of sharedTexture
+
+        :rtype: None
+        """
+        if self.textureMemory is not None:
+            self.textureMemory.close()
+            try:
+                self.textureMemory.unlink()
+            except FileNotFoundError:
+                pass
+        self.textureMemory = None
+        self.sharedTexture = None
+
+    def close(self):
+        """
+        Stop the worker processes and free the shared memory. Rendering again starts new workers.
+
+        :rtype: None
+        """
+        if self.pool is not None:
+            self.pool.close()
+            self.pool.join()
+            self.pool = None
+        if self.sharedBuff is not None:
+            self.sharedBuff.release()
+            self.sharedBuff = None
+        self.releaseTexture()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, excType, excValue, traceback):
+        self.close()
+
+    def __del__(self):
+        # without close, the workers are stopped at once and only the shared texels are freed here, the pixels of
+        # sharedBuff free themselves. Copies in forked workers leave everything to the parent.
+        if self.owner != os.getpid():
+            return
+        if self.pool is not None:
+            self.pool.terminate()
+        self.releaseTexture()
+
+    @staticmethod
+    def renderTile(pixels, rect, indices, scene, texture=None, level=0):
+        """
+        Draw primitives clipped to one tile
+
+        :param pixels: pixel array of the whole canvas, in (height, width, 3) layout
+        :type pixels: numpy.ndarray[uint8]
+        :param rect: the tile as [x_min, x_max, y_min, y_max], inclusive
+        :type rect: list[int]
+        :param indices: primitives touching the tile, in drawing order
+        :type indices: numpy.ndarray[int]
+        :param scene: output of TiledRaster.scene
+        :type scene: tuple[numpy.ndarray]
+        :param texture: the texture of textured triangles
+        :type texture: TextureSampler or MipMap
+        :param level: super sampling level, 0 for no anti-aliasing
+        :type level: int
+        :rtype: None
+        """
+        kinds, coords, colors, smooth, textured = scene
+        x_min, x_max, y_min, y_max = rect
+        region = pixels[y_min:y_max + 1, x_min:x_max + 1]
+        width, height = x_max - x_min + 1, y_max - y_min + 1
+        # Primitives are moved to tile coordinates and drawn on a tile sized target, which clips them.
+        # Interpolation only depends on coordinate differences, so the pixels are the same as without moving.
+        if level > 0:
+            target = SupersampleBuff(width, height, level)
+        else:
+            target = Buff.wrap(region)
+        origin = np.array([x_min, y_min])
+
+        i = 0
+        while i < len(indices):
+            p = indices[i]
+            if kinds[p] == TiledRaster.TRIANGLE:
+                vertices = coords[p] - origin
+                if level > 0:
+                    # vertices at subpixel centers, in the same way as Sketch.drawTriangle
+                    vertices = vertices * level + level // 2
+                ScanlineFill.fillTriangleArrays(target, vertices, colors[p], smooth[p], textured[p], texture)
+                i += 1
+                continue
+            # batch consecutive lines with the same smooth flag, later lines still win where they overlap
+            j = i + 1
+            while j < len(indices) and kinds[indices[j]] == TiledRaster.LINE and smooth[indices[j]] == smooth[p]:
+                j += 1
+            batch = indices[i:j]
+            starts, ends = coords[batch, 0] - origin, coords[batch, 1] - origin
+            lineColors = colors[batch, :2]
+            if level > 0:
+                starts, ends, lineColors = LineBatch.supersampled(starts, ends, lineColors, level)
+            LineBatch.draw(target, starts, ends, lineColors, smooth[p])
+            i = j
+
+        if level > 0:
+            target.resolveOnto(region)
+
+    @staticmethod
+    def _attach(key, name, attach):
+        """
+        In class usage only, in a worker: the value of the shared memory block name from attach() -> (block, value),
+        kept for the next tasks until another block is used for key
+        """
+        cached = _worker.get(key)
+        if cached is not None and cached[0] == name:
+            return cached[2]
+        if cached is not None:
+            _worker[key] = None
+            try:
+                cached[1].close()
+            except BufferError:
+                # a view of the block is still alive, it is unmapped when it goes away
+                pass
+        block, value = attach()
+        _worker[key] = (name, block, value)
+        return value
+
+    @staticmethod
+    def _attachTexture(name, shape, mode, mipmapped):
+        """
+        In class usage only, in a worker: open the texture shared by TiledRaster.shareTexture
+        """
+        block = shared_memory.SharedMemory(name=name)
+        texels = np.ndarray(shape, dtype=np.float32, buffer=block.buf)
+        return block, (MipMap if mipmapped else TextureSampler)(texels, mode)
+
+    @staticmethod
+    def _renderTask(task):
+        """
+        In class usage only, pool task: render one tile from the primitives touching it
+        """
+        (name, width, height), textureInfo, rect, scene, level = task
+        pixels = TiledRaster._attach("pixels", name, lambda: SharedBuff.attach(name, width, height))
+        texture = None
+        if textureInfo is not None:
+            texture = TiledRaster._attach("texture", textureInfo[0], lambda: TiledRaster._attachTexture(*textureInfo))
+        TiledRaster.renderTile(pixels, rect, np.arange(len(scene[0])), scene, texture, level)
+        return rect
+
+
+if __name__ == "__main__":
+    import time
+    import random
+
+    rng = random.Random(1)
+    size = 1000
+    n = 5000
+    centers = np.array([[rng.randrange(0, size), rng.randrange(0, size)] for _ in range(n)])
+    offsets = np.array([[[rng.randrange(-40, 40), rng.randrange(-40, 40)] for _ in range(3)] for _ in range(n)])
+    texture = MipMap(np.random.default_rng(3).integers(0, 256, (256, 256, 3), dtype=np.uint8))
+
+    print("%d CPU cores" % (os.cpu_count() or 1))
+    results = {}
+    for processes in sorted({1, 2, 4, os.cpu_count() or 1}):
+        # one pool for all frames, the first frame also starts the workers
+        with TiledRaster(processes=processes) as raster:
+            raster.addTriangles(centers[:, None, :] + offsets, np.random.default_rng(1).random((n, 3, 3)))
+            raster.addTriangles(centers[:500, None, :] + offsets[:500] // 2,
+                                np.random.default_rng(4).random((500, 3, 3)), doTexture=True)
+            raster.addLines(np.zeros((200, 2)), np.array([[size - 1, i * 5] for i in range(200)]),
+                            np.random.default_rng(2).random((200, 2, 3)))
+            times = []
+            for frame in range(3):
+                buff = Buff(size, size)
+                t1 = time.perf_counter()
+                raster.render(buff, texture=texture)
+                times.append(time.perf_counter() - t1)
+            print("%d processes: first frame %.3f s, next frames %.3f s" % (processes, times[0], min(times[1:])))
+            results[processes] = buff.buff.copy()
+    print("same image:", all(np.array_equal(results[1], r) for r in results.values()))
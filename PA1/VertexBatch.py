@@ -0,0 +1,188 @@
+"""
+Defines VertexBatch class, N vertices stored as a structure of arrays instead of N Point objects. Coordinates, colors
+and texture coordinates are each one contiguous NumPy array, so a batch of 100k vertices is built and drawn without
+constructing any Point or ColorType.
+
+Sketch.drawLine and Sketch.drawTriangle accept a VertexBatch in place of their first vertex: every 2 consecutive
+vertices are one line, every 3 consecutive vertices are one triangle.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import numpy as np
+
+from Point import Point
+from ColorType import ColorType
+
+
+class VertexBatch:
+    """
+    N vertices as contiguous arrays. Arrays given to the constructor are used as they are, without copy, when they
+    already have the right dtype and layout, so a batch can be a view of a bigger vertex array.
+
+    * xy(numpy.ndarray[int32]): N x 2 vertex coordinates
+    * rgb(numpy.ndarray[float32]): N x 3 vertex colors in [0, 1]
+    * uv(numpy.ndarray[float32]): N x 2 texture coordinates in texels, same as Point.texture, or None
+    """
+    xy = None
+    rgb = None
+    uv = None
+
+    def __init__(self, xy, rgb=None, uv=None):
+        """
+        :param xy: vertex coordinates, N x 2
+        :type xy: numpy.ndarray or list
+        :param rgb: vertex colors, N x 3 in [0, 1]. Black if not given.
+        :type rgb: numpy.ndarray or list
+        :param uv: texture coordinates in texels, N x 2
+        :type uv: numpy.ndarray or list
+        :rtype: None
+        """
+        self.xy = np.ascontiguousarray(xy, dtype=np.int32).reshape((-1, 2))
+        if rgb is None:
+            self.rgb = np.zeros((len(self.xy), 3), dtype=np.float32)
+        else:
+            self.rgb = np.ascontiguousarray(rgb, dtype=np.float32).reshape((-1, 3))
+        if uv is not None:
+            uv = np.ascontiguousarray(uv, dtype=np.float32).reshape((-1, 2))
+        self.uv = uv
+        if len(self.rgb) != len(self.xy) or (uv is not None and len(uv) != len(self.xy)):
+            raise ValueError("xy, rgb and uv must have the same number of vertices")
+
+    @staticmethod
+    def empty(n, withTexture=False):
+        """
+        Allocate a batch of n vertices at origin, in black, to be filled in place through xy, rgb and uv
+
+        :param n: number of vertices
+        :type n: int
+        :param withTexture: allocate texture coordinates as well
+        :type withTexture: bool
+        :rtype: VertexBatch
+        """
+        return VertexBatch(np.zeros((n, 2), dtype=np.int32), np.zeros((n, 3), dtype=np.float32),
+                           np.zeros((n, 2), dtype=np.float32) if withTexture else None)
+
+    @staticmethod
+    def fromPoints(points):
+        """
+        Pack a list of Point. Texture coordinates are kept only if every point has them.
+
+        :param points: the vertices
+        :type points: list[Point]
+        :rtype: VertexBatch
+        """
+        xy = np.array([p.coords for p in points], dtype=np.int32).reshape((-1, 2))
+        rgb = np.array([(p.color.r, p.color.g, p.color.b) if p.color is not None else (0, 0, 0) for p in points],
+                       dtype=np.float32).reshape((-1, 3))
+        uv = None
+        if points and all(p.texture is not None for p in points):
+            uv = np.array([p.texture for p in points], dtype=np.float32)
+        return VertexBatch(xy, rgb, uv)
+
+    def toPoints(self):
+        """
+        Unpack to a list of Point. Points are independent objects, editing them does not change the batch.
+
+        :rtype: list[Point]
+        """
+        coords = self.xy.tolist()
+        colors = self.rgb.tolist()
+        if self.uv is None:
+            return [Point(tuple(c), ColorType(*rgb)) for c, rgb in zip(coords, colors)]
+        return [Point(tuple(c), ColorType(*rgb), tuple(uv)) for c, rgb, uv in zip(coords, colors, self.uv.tolist())]
+
+    def point(self, i):
+        """
+        The i-th vertex as a Point
+
+        :param i: vertex index
+        :type i: int
+        :rtype: Point
+        """
+        texture = None if self.uv is None else tuple(self.uv[i].tolist())
+        return Point(tuple(self.xy[i].tolist()), ColorType(*self.rgb[i].tolist()), texture)
+
+    def lineArrays(self):
+        """
+        Lines of every 2 consecutive vertices, as the arguments of Sketch.drawLines. Starts and ends are views.
+
+        :return: starts (N/2 x 2), ends (N/2 x 2) and colors (N/2 x 2 x 3)
+        :rtype: tuple[numpy.ndarray]
+        """
+        n = len(self) // 2 * 2
+        return self.xy[0:n:2], self.xy[1:n:2], self.rgb[:n].reshape((-1, 2, 3))
+
+    def triangleArrays(self):
+        """
+        Triangles of every 3 consecutive vertices. All arrays are views of the batch.
+
+        :return: coords (N/3 x 3 x 2), colors (N/3 x 3 x 3) and texture coordinates (N/3 x 3 x 2) or None
+        :rtype: tuple[numpy.ndarray]
+        """
+        n = len(self) // 3 * 3
+        uv = None if self.uv is None else self.uv[:n].reshape((-1, 3, 2))
+        return self.xy[:n].reshape((-1, 3, 2)), self.rgb[:n].reshape((-1, 3, 3)), uv
+
+    @property
+    def nbytes(self):
+        """
+        Memory used by the vertex arrays, in bytes
+
+        :rtype: int
+        """
+        return self.xy.nbytes + self.rgb.nbytes + (0 if self.uv is None else self.uv.nbytes)
+
+    def __len__(self):
+        return len(self.xy)
+
+    def __getitem__(self, index):
+        """
+        A slice of the batch shares the arrays of the batch. An integer index gives that vertex as a Point.
+        """
+        if isinstance(index, slice):
+            return VertexBatch(self.xy[index], self.rgb[index], None if self.uv is None else self.uv[index])
+        return self.point(index)
+
+    def __repr__(self):
+        return "VertexBatch(%d vertices%s)" % (len(self), ", textured" if self.uv is not None else "")
+
+
+if __name__ == "__main__":
+    import time
+    import tracemalloc
+
+    n = 100000
+    rng = np.random.default_rng(1)
+    coords = rng.integers(0, 500, (n, 2))
+    colors = rng.random((n, 3))
+
+    def buildPoints():
+        return [Point((int(x), int(y)), ColorType(float(r), float(g), float(b)))
+                for (x, y), (r, g, b) in zip(coords.tolist(), colors.tolist())]
+
+    def buildBatch():
+        return VertexBatch(coords, colors)
+
+    # best of 3 without tracemalloc, then count the memory kept alive by the result
+    for name, build in (("Points", buildPoints), ("VertexBatch", buildBatch)):
+        seconds = float("inf")
+        for _ in range(3):
+            t1 = time.perf_counter()
+            build()
+            seconds = min(seconds, time.perf_counter() - t1)
+        tracemalloc.start()
+        result = build()
+        kept = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print("%d vertices as %s: %.1f ms, %.0f bytes per vertex" % (n, name, seconds * 1000, kept / n))
+    points, batch = buildPoints(), buildBatch()
+
+    t1 = time.perf_counter()
+    packed = VertexBatch.fromPoints(points)
+    print("fromPoints: %.1f ms, toPoints: " % ((time.perf_counter() - t1) * 1000), end="")
+    t1 = time.perf_counter()
+    unpacked = packed.toPoints()
+    print("%.1f ms" % ((time.perf_counter() - t1) * 1000))
+    assert unpacked[12345].coords == points[12345].coords
+    assert np.array_equal(packed.xy, batch.xy)
@@ -91,6 +91,19 @@ class Component:
 
     quat = None
 
+    # cached transformations of update: parent (world) transformation it was given, this component's local one
+    parentTransformationMat = None
+    localTransformationMat = None
+    # transformDirty: the local transformation changed since the last update
+    # subtreeDirty: some component below this one has a changed local transformation
+    transformDirty = True
+    subtreeDirty = True
+    parentComponent = None  # Component this one was added to as a child
+
+    # SceneGraph this component is compiled into, and its row there
+    sceneGraph = None
+    sceneIndex = -1
+
     def __init__(self, position, display_obj=None):
         """
         Init Component
@@ -148,7 +161,30 @@ class Component:
             raise TypeError("Children of a Component can only be Component")
         # prevent the duplicate child to be added to the self.children
         if child not in self.children:
+            if self.sceneGraph is not None:
+                # the compiled tree changes its structure
+                self.sceneGraph.detach()
             self.children.append(child)
+            child.parentComponent = self
+            child.markDirty()
+
+    def markDirty(self):
+        """
+        Mark the local transformation of this component as changed, so that the next update computes it, and the world
+        transformations of this component and everything below it, again. The setters call it, call it after changing
+        transformation attributes (angles, axes, position, scaling, quat, pre- and post-rotation) directly.
+
+        :return: None
+        """
+        self.transformDirty = True
+        parent = self.parentComponent
+        if self.sceneGraph is not None:
+            # the scene graph updates its components together, only the components above its root need the flag
+            self.sceneGraph.dirty[self.sceneIndex] = True
+            parent = self.sceneGraph.root.parentComponent
+        while parent is not None and not parent.subtreeDirty:
+            parent.subtreeDirty = True
+            parent = parent.parentComponent
 
     def clear(self):
         """
@@ -176,7 +212,10 @@ class Component:
         self.update()
 
     def draw(self, shaderProg):
-        shaderProg.setMat4("modelMat", self.transformationMat.transpose())
+        modelMat = self.transformationMat
+        if isinstance(self.displayObj, Displayable) and self.displayObj.scaleMat is not None:
+            modelMat = modelMat @ self.displayObj.scaleMat
+        shaderProg.setMat4("modelMat", modelMat.transpose())
         shaderProg.setVec3("currentColor", self.current_color)
         if isinstance(self.displayObj, Displayable):
             if self.textureOn:
@@ -195,11 +234,49 @@ class Component:
         Apply translation, rotation and scaling to this component and all its children
         Must be called after any changes made to the instance
 
+        Only what changed is computed again: the local transformation when this component is marked dirty (see
+        markDirty), the world transformation when that or the parent transformation changed, and children only if
+        this world transformation changed or some of them are dirty. An unchanged tree costs no matrix products.
+        Without parentTransformationMat, the parent transformation of the last update is used.
+        A component compiled into a SceneGraph is updated by it, when its root is updated.
+
         :return: None
         """
+        if self.sceneGraph is not None:
+            if self is self.sceneGraph.root:
+                self.sceneGraph.update(parentTransformationMat)
+            self.subtreeDirty = False
+            return
         if parentTransformationMat is None:
-            parentTransformationMat = np.identity(4)
+            parentTransformationMat = self.parentTransformationMat
+            if parentTransformationMat is None:
+                parentTransformationMat = np.identity(4)
+        parentChanged = parentTransformationMat is not self.parentTransformationMat and \
+            (self.parentTransformationMat is None or
+             not np.array_equal(parentTransformationMat, self.parentTransformationMat))
+        if not (parentChanged or self.transformDirty):
+            if self.subtreeDirty:
+                self.subtreeDirty = False
+                for c in self.children:
+                    c.update(self.transformationMat)
+            return
+
+        if self.transformDirty:
+            self.localTransformationMat = self.localTransformation()
+            self.transformDirty = False
+        self.parentTransformationMat = parentTransformationMat
+        self.transformationMat = parentTransformationMat @ self.localTransformationMat
+        self.subtreeDirty = False
+
+        for c in self.children:
+            c.update(self.transformationMat)
+
+    def localTransformation(self):
+        """
+        Transformation of this component relative to its parent, from its current position, rotation and scaling
 
+        :rtype: numpy.ndarray
+        """
         translationMat = self.glUtility.translate(*self.currentPos.getCoords(), False)
 
         # if self.quat is set, use the quaternion as your rotation matrix.
@@ -224,10 +301,7 @@ class Component:
         # Change only this line!
         myTransformation = translationMat @ rotationMatW  @ rotationMatV  @ rotationMatU @ scalingMat
 
-        self.transformationMat = parentTransformationMat @ self.postRotationMat @ myTransformation @ self.preRotationMat 
-
-        for c in self.children:
-            c.update(self.transformationMat)
+        return self.postRotationMat @ myTransformation @ self.preRotationMat
 
     def rotate(self, degree, axis):
         """
@@ -251,6 +325,7 @@ class Component:
         else:
             self.wAngle = max(min(degree + self.wAngle, self.wRange[1]), self.wRange[0])
             # print(self.wAngle)
+        self.markDirty()
 
     def reset(self, mode="all"):
         """
@@ -265,10 +340,13 @@ class Component:
             self.uAngle = self.default_uAngle
             self.vAngle = self.default_vAngle
             self.wAngle = self.default_wAngle
+            self.markDirty()
         if mode in ["position", "all"]:
             self.currentPos = self.defaultPos
+            self.markDirty()
         if mode in ["scale", "all"]:
             self.currentScaling = copy.deepcopy(self.defaultScaling)
+            self.markDirty()
         if mode in ["rotationAxis", "all"]:
             self.setU([1, 0, 0])
             self.setV([0, 1, 0])
@@ -313,6 +391,7 @@ class Component:
             aD = t
         r[0] = iD
         r[1] = aD
+        self.markDirty()
 
     @staticmethod
     def clamp(v, low_bound, up_bound):
@@ -345,6 +424,7 @@ class Component:
             self.vAngle = self.clamp(angle, self.vRange[0], self.vRange[1])
         else:
             self.wAngle = self.clamp(angle, self.wRange[0], self.wRange[1])
+        self.markDirty()
         self.update()
 
     def setDefaultAngle(self, angle, axis):
@@ -366,6 +446,7 @@ class Component:
         else:
             self.default_wAngle = angle
             self.wAngle = angle
+        self.markDirty()
 
     def setDefaultPosition(self, pos):
         """
@@ -378,6 +459,7 @@ class Component:
             raise TypeError("pos should have type Point")
         self.defaultPos = pos.copy()
         self.currentPos = copy.deepcopy(self.defaultPos)
+        self.markDirty()
 
     def setDefaultScale(self, scale):
         """
@@ -395,6 +477,7 @@ class Component:
             raise ValueError("Component only accept uniform scaling")"""
         self.defaultScaling = copy.deepcopy(scale)
         self.currentScaling = copy.deepcopy(self.defaultScaling)
+        self.markDirty()
         self.update()
 
     def setDefaultColor(self, color):
@@ -419,6 +502,7 @@ class Component:
         if not isinstance(pos, Point):
             raise TypeError("pos should have type Point")
         self.currentPos = pos.copy()
+        self.markDirty()
         self.update()
 
     def setCurrentColor(self, color):
@@ -450,6 +534,7 @@ class Component:
         if min(scale) != max(scale):
             raise ValueError("Component only accept uniform scaling")
         self.currentScaling = copy.deepcopy(scale)
+        self.markDirty()
         self.update()
 
     def changeRotationAxis(self, u, v, w):
@@ -482,6 +567,7 @@ class Component:
         self.uAngle = 0
         self.vAngle = 0
         self.wAngle = 0
+        self.markDirty()
 
     def setPreRotation(self, rotation_matrix=None):
         """
@@ -494,6 +580,7 @@ class Component:
         """
         if isinstance(rotation_matrix, np.ndarray):
             self.preRotationMat = rotation_matrix
+            self.markDirty()
 
     def setPostRotation(self, rotation_matrix=None):
         """
@@ -505,6 +592,7 @@ class Component:
         """
         if isinstance(rotation_matrix, np.ndarray):
             self.postRotationMat = rotation_matrix
+            self.markDirty()
 
     def u(self):
         return self.uAxis.copy()
@@ -520,18 +608,21 @@ class Component:
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(u)):
             self.uAxis[i] = u[i]
+        self.markDirty()
 
     def setV(self, v):
         if len(v) != len(self.vAxis):
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(v)):
             self.vAxis[i] = v[i]
+        self.markDirty()
 
     def setW(self, w):
         if len(w) != len(self.wAxis):
             raise TypeError("axis should have the same size as the current one")
         for i in range(len(w)):
             self.wAxis[i] = w[i]
+        self.markDirty()
     
     def setQuaternion(self, q):
         """ 
@@ -543,9 +634,11 @@ class Component:
         if not isinstance(q, Quaternion):
             raise TypeError("q must be of type Quaternion")
         self.quat = q
+        self.markDirty()
 
     def clearQuaternion(self):
         """ 
         clears the existing quaternion
         """
         self.quat = None
+        self.markDirty()
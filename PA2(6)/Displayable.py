@@ -11,6 +11,9 @@ class Displayable:
     """
     Interface for displayable object
     """
+    # scaling applied in the model matrix when drawing, for vertex data which is shared and so not scaled itself
+    scaleMat = None
+
     def __init__(self):
         pass
 
@@ -0,0 +1,352 @@
+"""
+Defines SceneGraph class, a flattened copy of a Component tree kept in arrays: the components in topological order
+with the index of each parent, their poses as (N, 3) arrays of Euler angles, positions and scalings, and (N, 4, 4)
+arrays of local and world transformations. The local transformations of all changed components are built at once
+from the pose arrays, and the world transformations are computed one tree level at a time, with one batched matrix
+product per level instead of one recursive Component.update call per component.
+
+The components stay the interface of the tree. Once compiled, the transformationMat of every component is a view of
+its row of worldMats, so Component.draw reads the batched result, and the setters of a component mark its row to be
+read again by the next update. Updating the root component updates the whole SceneGraph, which Sketch does every
+frame. Poses can also be given for many components at once with setAngles and setPositions.
+
+The tree must not change its structure afterwards: adding a child to a compiled component detaches the SceneGraph,
+and the components go back to updating themselves.
+
+:author: Mutiraj Laksanawisit
+"""
+
+import numpy as np
+
+from Point import Point
+
+
+class SceneGraph:
+    """
+    Array backed Component tree
+
+    * components(list[Component]): the tree in topological order, the root first and every parent before its children
+    * parents(numpy.ndarray[int]): index of the parent of every component, -1 for the root
+    * levels(list[numpy.ndarray[int]]): indices of the components at every depth below the root
+    * angles(numpy.ndarray[float]): (N, 3) u, v and w rotation angles in degrees
+    * angleRanges(numpy.ndarray[float]): (N, 3, 2) lower and upper limits of the angles
+    * positions(numpy.ndarray[float]): (N, 3) translations relative to the parent
+    * scalings(numpy.ndarray[float]): (N, 3) scale factors
+    * axes(numpy.ndarray[float]): (N, 3, 3) u, v and w rotation axes
+    * hasQuat(numpy.ndarray[bool]): components rotated by their quaternion instead of the Euler angles
+    * quatMats(numpy.ndarray[float]): (N, 4, 4) quaternion rotations, where hasQuat is set
+    * preMats, postMats(numpy.ndarray[float]): (N, 4, 4) pre- and post-rotation matrices
+    * localMats, worldMats(numpy.ndarray[float]): (N, 4, 4) local and world transformations
+    * dirty(numpy.ndarray[bool]): components changed by their setters, to be read again
+    * stale(numpy.ndarray[bool]): components whose local transformation must be computed again
+    """
+    root = None
+    components = None
+    parents = None
+    levels = None
+    angles = None
+    angleRanges = None
+    positions = None
+    scalings = None
+    axes = None
+    hasQuat = None
+    quatMats = None
+    preMats = None
+    postMats = None
+    localMats = None
+    worldMats = None
+    dirty = None
+    stale = None
+    parentMat = None
+
+    def __init__(self, root):
+        """
+        Compile the tree below root and attach its components
+
+        :param root: root of the tree
+        :type root: Component
+        :rtype: None
+        """
+        self.root = root
+        # breadth first order lists every level after the one above it
+        self.components = [root]
+        parents = [-1]
+        depths = [0]
+        i = 0
+        while i < len(self.components):
+            for child in self.components[i].children:
+                self.components.append(child)
+                parents.append(i)
+                depths.append(depths[i] + 1)
+            i += 1
+        self.parents = np.array(parents, dtype=np.intp)
+        depths = np.array(depths)
+        self.levels = [np.flatnonzero(depths == d) for d in range(1, depths.max() + 1)]
+
+        n = len(self.components)
+        self.angles = np.zeros((n, 3))
+        self.angleRanges = np.zeros((n, 3, 2))
+        self.positions = np.zeros((n, 3))
+        self.scalings = np.ones((n, 3))
+        self.axes = np.zeros((n, 3, 3))
+        self.hasQuat = np.zeros(n, dtype=bool)
+        self.quatMats = np.tile(np.identity(4), (n, 1, 1))
+        self.preMats = np.tile(np.identity(4), (n, 1, 1))
+        self.postMats = np.tile(np.identity(4), (n, 1, 1))
+        self.localMats = np.tile(np.identity(4), (n, 1, 1))
+        self.worldMats = np.tile(np.identity(4), (n, 1, 1))
+        self.dirty = np.ones(n, dtype=bool)
+        self.stale = np.ones(n, dtype=bool)
+        self.parentMat = None
+
+        for i, c in enumerate(self.components):
+            c.sceneGraph = self
+            c.sceneIndex = i
+            c.transformationMat = self.worldMats[i]
+            c.localTransformationMat = self.localMats[i]
+        self.update()
+
+    def detach(self):
+        """
+        Give the components back their own matrices, after which they update themselves again
+
+        :rtype: None
+        """
+        for i, c in enumerate(self.components):
+            c.sceneGraph = None
+            c.sceneIndex = -1
+            c.transformationMat = self.worldMats[i].copy()
+            c.localTransformationMat = self.localMats[i].copy()
+            c.parentTransformationMat = None
+            c.markDirty()
+        self.components = []
+
+    def pull(self, index):
+        """
+        Read the pose of the components at index from their attributes
+
+        :param index: component indices
+        :type index: numpy.ndarray[int]
+        :rtype: None
+        """
+        for i in index.tolist():
+            c = self.components[i]
+            self.angles[i] = (c.uAngle, c.vAngle, c.wAngle)
+            self.angleRanges[i] = (c.uRange, c.vRange, c.wRange)
+            self.positions[i] = c.currentPos.getCoords()[:3]
+            self.scalings[i] = c.currentScaling
+            self.axes[i] = (c.uAxis.getCoords()[:3], c.vAxis.getCoords()[:3], c.wAxis.getCoords()[:3])
+            self.hasQuat[i] = c.quat is not None
+            if c.quat is not None:
+                self.quatMats[i] = c.quat.toMatrix().transpose()
+            self.preMats[i] = c.preRotationMat
+            self.postMats[i] = c.postRotationMat
+            c.transformDirty = False
+        self.stale[index] = True
+
+    def setAngles(self, angles, index=None):
+        """
+        Set the u, v and w angles of many components at once, clamped to their rotation extents like
+        Component.setCurrentAngle. The angle attributes of the components are set to the same values.
+
+        :param angles: angles in degrees, (len(index), 3) or (N, 3) without index
+        :type angles: numpy.ndarray[float]
+        :param index: component indices, all components if None
+        :type index: numpy.ndarray[int]
+        :rtype: None
+        """
+        index = np.arange(len(self.components)) if index is None else np.asarray(index)
+        ranges = self.angleRanges[index]
+        angles = np.clip(angles, ranges[..., 0], ranges[..., 1])
+        self.angles[index] = angles
+        self.stale[index] = True
+        for i, (u, v, w) in zip(index.tolist(), angles.tolist()):
+            c = self.components[i]
+            c.uAngle, c.vAngle, c.wAngle = u, v, w
+        # lets the components above the root know that something below them changed
+        self.root.markDirty()
+
+    def setPositions(self, positions, index=None):
+        """
+        Set the translations of many components at once. The currentPos of the components are set to the same values.
+
+        :param positions: translations relative to the parents, (len(index), 3) or (N, 3) without index
+        :type positions: numpy.ndarray[float]
+        :param index: component indices, all components if None
+        :type index: numpy.ndarray[int]
+        :rtype: None
+        """
+        index = np.arange(len(self.components)) if index is None else np.asarray(index)
+        positions = np.asarray(positions, dtype=np.float64)
+        self.positions[index] = positions
+        self.stale[index] = True
+        for i, p in zip(index.tolist(), positions.tolist()):
+            self.components[i].currentPos = Point(p)
+        self.root.markDirty()
+
+    @staticmethod
+    def rotations(angles, axes):
+        """
+        Rotation matrices of angles around axes, the same as GLUtility.rotate of every pair
+
+        :param angles: angles in degrees, shape (m,)
+        :type angles: numpy.ndarray[float]
+        :param axes: rotation axes, shape (m, 3)
+        :type axes: numpy.ndarray[float]
+        :return: row-major rotations, shape (m, 3, 3)
+        :rtype: numpy.ndarray[float]
+        """
+        half = np.radians(angles) * 0.5
+        q = np.empty((len(angles), 4))
+        q[:, 0] = np.cos(half)
+        q[:, 1:] = np.sin(half)[:, None] * axes
+        norm = np.sqrt((q * q).sum(axis=1))
+        degenerate = norm < 1e-6
+        q /= np.where(degenerate, 1, norm)[:, None]
+        s, a, b, c = q.T
+        result = np.empty((len(angles), 3, 3))
+        result[:, 0, 0] = 1 - 2 * b * b - 2 * c * c
+        result[:, 1, 0] = 2 * a * b + 2 * s * c
+        result[:, 2, 0] = 2 * a * c - 2 * s * b
+        result[:, 0, 1] = 2 * a * b - 2 * s * c
+        result[:, 1, 1] = 1 - 2 * a * a - 2 * c * c
+        result[:, 2, 1] = 2 * b * c + 2 * s * a
+        result[:, 0, 2] = 2 * a * c + 2 * s * b
+        result[:, 1, 2] = 2 * b * c - 2 * s * a
+        result[:, 2, 2] = 1 - 2 * a * a - 2 * b * b
+        result[degenerate] = np.identity(3)
+        return result
+
+    def computeLocal(self, index):
+        """
+        Build the local transformations of the components at index from the pose arrays, the same product as
+        Component.localTransformation: postRotation @ translation @ Rw @ Rv @ Ru @ scaling @ preRotation
+
+        :param index: component indices
+        :type index: numpy.ndarray[int]
+        :rtype: None
+        """
+        if index.size == 0:
+            return
+        angles, axes = self.angles[index], self.axes[index]
+        rotation = self.rotations(angles[:, 2], axes[:, 2]) @ self.rotations(angles[:, 1], axes[:, 1]) @ \
+            self.rotations(angles[:, 0], axes[:, 0])
+        quat = self.hasQuat[index]
+        rotation[quat] = self.quatMats[index[quat], :3, :3]
+
+        # translation @ rotation @ scaling: scaled rotation columns and the translation in the last column
+        transform = np.zeros((index.size, 4, 4))
+        transform[:, :3, :3] = rotation * self.scalings[index][:, None, :]
+        transform[:, :3, 3] = self.positions[index]
+        transform[:, 3, 3] = 1
+        self.localMats[index] = self.postMats[index] @ transform @ self.preMats[index]
+
+    def computeWorld(self):
+        """
+        World transformations of all components, one batched product per tree level
+
+        :rtype: None
+        """
+        np.matmul(self.parentMat, self.localMats[0], out=self.worldMats[0])
+        for level in self.levels:
+            self.worldMats[level] = self.worldMats[self.parents[level]] @ self.localMats[level]
+
+    def update(self, parentTransformationMat=None):
+        """
+        Bring the world transformations up to date: read the components changed by their setters, build the stale
+        local transformations and compute the world transformations again if anything changed
+
+        :param parentTransformationMat: transformation of the parent of the root, the last one or identity if None
+        :type parentTransformationMat: numpy.ndarray
+        :return: whether the world transformations changed
+        :rtype: bool
+        """
+        if parentTransformationMat is None:
+            parentTransformationMat = np.identity(4) if self.parentMat is None else self.parentMat
+        parentChanged = self.parentMat is None or not np.array_equal(parentTransformationMat, self.parentMat)
+
+        dirty = np.flatnonzero(self.dirty)
+        if dirty.size:
+            self.dirty[dirty] = False
+            self.pull(dirty)
+        stale = np.flatnonzero(self.stale)
+        if not (parentChanged or stale.size):
+            return False
+
+        self.stale[stale] = False
+        self.computeLocal(stale)
+        self.parentMat = np.array(parentTransformationMat, dtype=np.float64)
+        self.computeWorld()
+        return True
+
+
+if __name__ == "__main__":
+    import time
+    from Component import Component
+
+    # a rig of 300 parts: a body with 12 limbs of 25 segments
+    def buildRig():
+        body = Component(Point((0, 0, 0)))
+        for limb in range(12):
+            parent = body
+            for segment in range(25):
+                part = Component(Point((0, 0.1, 0.2)))
+                part.setRotateExtent(part.uAxis, -45, 45)
+                parent.addChild(part)
+                parent = part
+        return body
+
+    def best(f, repeat=7):
+        times = []
+        for _ in range(repeat):
+            t1 = time.perf_counter()
+            f()
+            times.append(time.perf_counter() - t1)
+        return min(times) * 1000
+
+    rng = np.random.default_rng(1)
+    recursive, compiled = buildRig(), buildRig()
+    recursive.update(np.identity(4))
+    scene = SceneGraph(compiled)
+    parts = scene.components
+    n = len(parts)
+    poses = [rng.uniform(-60, 60, (n, 3)) for _ in range(7)]
+
+    def animateRecursive():
+        angles = poses[rng.integers(len(poses))]
+        stack, i = [recursive], 0
+        while stack:
+            c = stack.pop(0)
+            c.uAngle, c.vAngle, c.wAngle = angles[i].tolist()
+            c.markDirty()
+            stack.extend(c.children)
+            i += 1
+        recursive.update(np.identity(4))
+
+    def animateCompiled():
+        scene.setAngles(poses[rng.integers(len(poses))])
+        compiled.update(np.identity(4))
+
+    print("%d components, %d levels" % (n, len(scene.levels) + 1))
+    print("all components posed: recursive Component.update %.2f ms, SceneGraph %.2f ms"
+          % (best(animateRecursive), best(animateCompiled)))
+    print("unchanged frame: recursive %.3f ms, SceneGraph %.3f ms"
+          % (best(lambda: recursive.update(np.identity(4))), best(lambda: compiled.update(np.identity(4)))))
+
+    # same pose on both: the world matrices agree
+    scene.setAngles(np.clip(poses[0], scene.angleRanges[..., 0], scene.angleRanges[..., 1]))
+    compiled.update(np.identity(4))
+    stack, i = [recursive], 0
+    while stack:
+        c = stack.pop(0)
+        c.uAngle, c.vAngle, c.wAngle = scene.angles[i].tolist()
+        c.markDirty()
+        stack.extend(c.children)
+        i += 1
+    recursive.update(np.identity(4))
+    stack, largest = [(recursive, compiled)], 0.0
+    while stack:
+        a, b = stack.pop()
+        largest = max(largest, np.abs(a.transformationMat - b.transformationMat).max())
+        stack.extend(zip(a.children, b.children))
+    print("largest difference of the world matrices: %.2e" % largest)
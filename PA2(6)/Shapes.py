@@ -4,47 +4,95 @@ Implements four geometric primitives (Sphere, Cube, Cone, Cylinder) using the Di
 Modified by Daniel Scrivener 09/2023
 """
 
-from collada import *
+import os
+import hashlib
 from DisplayableMesh import DisplayableMesh
 from Component import Component
 import GLUtility
 import ColorType
 import numpy as np
 
-def getVertexData(filename):
+# floats per vertex: position, normal, color, texture coordinate
+VERTEX_SIZE = 11
+
 
-    colladaData = Collada(filename)
+def meshCachePaths(filename, digest):
+    """
+    :param filename: .dae file
+    :type filename: string
+    :param digest: hash of the .dae file content
+    :type digest: string
+    :return: paths of the cached vertex and index arrays
+    :rtype: tuple
+    """
+    prefix = "%s.%s" % (filename, digest)
+    return prefix + ".vertices.npy", prefix + ".indices.npy"
 
-    # generate vertices from model data
-    # also generate indices
 
-    geo = colladaData.geometries[0]
-    tridata = geo.primitives[0]
-    trilist = list(tridata)
+def parseVertexData(filename):
+    """
+    Parse a .dae file with pycollada. Only the positions are read, normals, colors and texture coordinates are left 0.
 
-    # construct vertex list
-    vertices = np.array([])
-    
-    for vert in tridata.vertex:
-        vert = np.concatenate((vert, [0.,0.,0.]), axis=0) # empty normals
-        vert = np.concatenate((vert, [0.,0.,0.]), axis=0) # color
-        vert = np.concatenate((vert, [0.,0.]), axis=0) # empty UV
-        vertices = np.append(vertices, vert)
+    :param filename: .dae file
+    :type filename: string
+    :return: vertices, N x 11 floats flattened, and triangle indices
+    :rtype: tuple
+    """
+    # pycollada is only needed when the cache is missing or stale
+    from collada import Collada
 
-    # construct indices
-    indices = np.array([])
+    tridata = Collada(filename).geometries[0].primitives[0]
+    positions = np.asarray(tridata.vertex, dtype=np.float32).reshape((-1, 3))
+    vertices = np.zeros((len(positions), VERTEX_SIZE), dtype=np.float32)
+    vertices[:, :3] = positions
+    indices = np.asarray(tridata.vertex_index, dtype=np.int32).ravel()
+    return vertices.ravel(), indices
 
-    for tri in trilist:
-        indices = np.append(indices, tri.indices)
 
-    return (vertices, indices)
+def getVertexData(filename):
+    """
+    Vertex and index arrays of a .dae file. The parsed arrays are saved as .npy files next to the .dae file, named
+    after the hash of its content, and later calls memory-map them instead of parsing the XML again.
+    The returned arrays are read-only, copy them before changing them.
+
+    :param filename: .dae file
+    :type filename: string
+    :return: vertices, N x 11 float32 flattened, and int32 triangle indices
+    :rtype: tuple
+    """
+    with open(filename, "rb") as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:16]
+    vertexPath, indexPath = meshCachePaths(filename, digest)
+
+    try:
+        return np.load(vertexPath, mmap_mode="r"), np.load(indexPath, mmap_mode="r")
+    except (OSError, ValueError):
+        pass
+
+    vertices, indices = parseVertexData(filename)
+    vertices.flags.writeable = False
+    indices.flags.writeable = False
+    folder, name = os.path.split(filename)
+    try:
+        # arrays of older versions of the file are not needed anymore
+        for entry in os.listdir(folder or "."):
+            if entry.startswith(name + ".") and entry.endswith((".vertices.npy", ".indices.npy")):
+                os.remove(os.path.join(folder, entry))
+        for path, data in ((vertexPath, vertices), (indexPath, indices)):
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, data)
+            os.replace(path + ".tmp", path)
+    except OSError:
+        # e.g. a read-only folder, the arrays are parsed again next time
+        pass
+    return vertices, indices
 
 class Shape(Component):
     vertexData = None
     indexData = None
     mesh = None
 
-    def __init__(self, center, shaderProg, size, vertexData, indexData, color=ColorType.YELLOW):
+    def __init__(self, center, shaderProg, size, vertexData, indexData, color=ColorType.YELLOW, meshKey=None):
         """
         :param center: location of the object
         :type center: Point
@@ -59,8 +107,10 @@ class Shape(Component):
         :param limb: sets the rotation behavior of the object. if true, rotations happen "at the joint" \
             rather than the object's center
         :type limb: boolean
+        :param meshKey: name of the geometry, meshes of the same name share their GPU buffers and vertex data
+        :type meshKey: string
         """
-        self.mesh = DisplayableMesh(shaderProg, size, vertexData, indexData, color)
+        self.mesh = DisplayableMesh(shaderProg, size, vertexData, indexData, color, meshKey)
         super(Shape, self).__init__(center, self.mesh)
 
 class Cone(Shape):
@@ -86,9 +136,9 @@ class Cone(Shape):
         :type color: ColorType
         """
         if lowPoly:
-            super(Cone, self).__init__(center, shaderProg, size, self.verticesLP.copy(), self.indicesLP.copy(), color)
+            super(Cone, self).__init__(center, shaderProg, size, self.verticesLP, self.indicesLP, color, self.pathnameLP)
         else:
-            super(Cone, self).__init__(center, shaderProg, size, self.vertices.copy(), self.indices.copy(), color)
+            super(Cone, self).__init__(center, shaderProg, size, self.vertices, self.indices, color, self.pathname)
 
         # translate object by -z extent of the new component so that rotations occur @ the joint
         # rather than around the object's true center
@@ -130,7 +180,7 @@ class Cube(Shape):
         :param color: vertex color to be applied uniformly
         :type color: ColorType
         """
-        super(Cube, self).__init__(center, shaderProg, size, self.vertices.copy(), self.indices.copy(), color)
+        super(Cube, self).__init__(center, shaderProg, size, self.vertices, self.indices, color, self.pathname)
         # translate object by -z extent of the new component so that rotations occur @ the joint
         # rather than around the object's true center
         glutility = GLUtility.GLUtility()
@@ -176,9 +226,9 @@ class Cylinder(Shape):
         :type color: ColorType
         """
         if lowPoly:
-            super(Cylinder, self).__init__(center, shaderProg, size, self.verticesLP.copy(), self.indicesLP.copy(), color)
+            super(Cylinder, self).__init__(center, shaderProg, size, self.verticesLP, self.indicesLP, color, self.pathnameLP)
         else:
-            super(Cylinder, self).__init__(center, shaderProg, size, self.vertices.copy(), self.indices.copy(), color)
+            super(Cylinder, self).__init__(center, shaderProg, size, self.vertices, self.indices, color, self.pathname)
         # translate object by -z extent of the new component so that rotations occur @ the joint
         # rather than around the object's true center
         glutility = GLUtility.GLUtility()
@@ -224,9 +274,9 @@ class Sphere(Shape):
         :type color: ColorType
         """
         if lowPoly:
-            super(Sphere, self).__init__(center, shaderProg, size, self.verticesLP.copy(), self.indicesLP.copy(), color)
+            super(Sphere, self).__init__(center, shaderProg, size, self.verticesLP, self.indicesLP, color, self.pathnameLP)
         else:
-            super(Sphere, self).__init__(center, shaderProg, size, self.vertices.copy(), self.indices.copy(), color)
+            super(Sphere, self).__init__(center, shaderProg, size, self.vertices, self.indices, color, self.pathname)
         # translate object by -z extent of the new component so that rotations occur @ the joint
         # rather than around the object's true center   
         glutility = GLUtility.GLUtility()
@@ -20,6 +20,7 @@ from Point import Point
 from CanvasBase import CanvasBase
 from GLProgram import GLProgram
 from Quaternion import Quaternion
+from SceneGraph import SceneGraph
 import GLUtility
 
 try:
@@ -94,6 +95,7 @@ class Sketch(CanvasBase):
     texture = None
     shaderProg = None
     glutility = None
+    sceneGraph = None  # compiled transformations of the model
 
     lookAtPt = None
     upVector = None
@@ -162,6 +164,8 @@ class Sketch(CanvasBase):
         self.topLevelComponent.addChild(model)
         self.topLevelComponent.addChild(axes)
         self.topLevelComponent.initialize()
+        # the model's world transformations are computed in batch, level by level
+        self.sceneGraph = SceneGraph(model)
 
         self.components = model.componentList
         self.cDict = model.componentDict
@@ -10,6 +10,9 @@ class Displayable:
     """
     Interface for displayable object
     """
+    # scaling applied in the model matrix when drawing, for vertex data which is shared and so not scaled itself
+    scaleMat = None
+
     callListHandle = 0
     parent = None  # parent class, used for SetCurrent
 
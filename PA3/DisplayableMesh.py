@@ -11,9 +11,9 @@ from random import random
 from Point import Point
 from Displayable import Displayable
 from GLBuffer import VAO, VBO, EBO
+import weakref
 import numpy as np
 import ColorType
-from collada import *
 
 try:
     import OpenGL
@@ -52,7 +52,14 @@ class DisplayableMesh(Displayable):
 
     defaultColor = None
 
-    def __init__(self, shaderProg, scale, vertexData, indexData, color=ColorType.BLUE):
+    # name of the geometry, e.g. its .dae path. Meshes of the same name share one set of GPU buffers
+    meshKey = None
+
+    # GPU buffers of the shared geometries, shader program -> {meshKey: (vao, vbo, ebo)}
+    # Each program (and so each GL context) has its own buffers, they are dropped together with the program
+    sharedBuffers = weakref.WeakKeyDictionary()
+
+    def __init__(self, shaderProg, scale, vertexData, indexData, color=ColorType.BLUE, meshKey=None):
         """
         :param shaderProg: compiled shader program
         :type shaderProg: GLProgram
@@ -62,6 +69,10 @@ class DisplayableMesh(Displayable):
         :type filename: string
         :param color: vertex color to be applied uniformly
         :type color: ColorType
+        :param meshKey: name of the geometry, e.g. the .dae path. Vertex data of a named geometry is uploaded once and
+            shared by all meshes of that name, so it is not changed: the scale goes into scaleMat instead, and the color
+            comes from the currentColor uniform as for every mesh.
+        :type meshKey: string
         """
         super(DisplayableMesh, self).__init__()
         assert(len(scale) == 3)
@@ -71,21 +82,44 @@ class DisplayableMesh(Displayable):
         self.shaderProg = shaderProg
         self.shaderProg.use()
 
-        self.vao = VAO()
-        self.vbo = VBO()  # vbo can only be initiate with glProgram activated
-        self.ebo = EBO()
+        self.meshKey = meshKey
+        # N x 11 view of the vertex data, columns are position, normal, color and texture coordinate.
+        # float32 data is viewed without copying
+        self.vertices = np.asarray(vertexData, dtype=np.float32).reshape((-1, 11))
+        self.indices = np.asarray(indexData, dtype=np.int32)
 
-        self.indices = indexData
-        self.vertices = vertexData
+        if meshKey is not None:
+            self.scaleMat = np.diag([scale[0], scale[1], scale[2], 1.0])
+        else:
+            self.vertices[:, 0:3] *= np.asarray(scale, dtype=np.float32)
+            self.vertices[:, 6:9] = self.defaultColor
 
-        for i in range(len(self.vertices) // 11):
-            i = i * 11
-            self.vertices[i] = self.vertices[i] * scale[0]
-            self.vertices[i + 1] = self.vertices[i + 1] * scale[1]
-            self.vertices[i + 2] = self.vertices[i + 2] * scale[2]
-            self.vertices[i + 5] = self.defaultColor[0]
-            self.vertices[i + 6] = self.defaultColor[1]
-            self.vertices[i + 7] = self.defaultColor[2]
+    @staticmethod
+    def from_arrays(shaderProg, scale, vertices, indices, color=ColorType.BLUE, meshKey=None):
+        """
+        Mesh on arrays which already have the layout of the GPU buffers, they are used without copying. Without a
+        meshKey the scale and color are applied to vertices in place.
+
+        :param shaderProg: compiled shader program
+        :type shaderProg: GLProgram
+        :param scale: set of three scale factors to be applied to each vertex
+        :type scale: list or tuple
+        :param vertices: N x 11 vertices, C contiguous
+        :type vertices: numpy.ndarray[float32]
+        :param indices: triangle indices
+        :type indices: numpy.ndarray[int32]
+        :param color: vertex color to be applied uniformly
+        :type color: ColorType
+        :param meshKey: name of the geometry, see __init__
+        :type meshKey: string
+        :rtype: DisplayableMesh
+        """
+        if not (isinstance(vertices, np.ndarray) and vertices.dtype == np.float32 and vertices.ndim == 2
+                and vertices.shape[1] == 11 and vertices.flags.c_contiguous):
+            raise TypeError("vertices should be a C contiguous N x 11 float32 array")
+        if not (isinstance(indices, np.ndarray) and indices.dtype == np.int32):
+            raise TypeError("indices should be an int32 array")
+        return DisplayableMesh(shaderProg, scale, vertices, indices, color, meshKey)
 
     def draw(self):
         self.vao.bind()
@@ -96,7 +130,23 @@ class DisplayableMesh(Displayable):
         """
         Remember to bind VAO before this initialization. If VAO is not bind, program might throw an error
         in systems that don't enable a default VAO after GLProgram compilation
+
+        A shared mesh uploads its geometry only if no other mesh of the same meshKey did so for this shader program
         """
+        if self.meshKey is not None:
+            buffers = self.sharedBuffers.setdefault(self.shaderProg, {})
+            if self.meshKey in buffers:
+                self.vao, self.vbo, self.ebo = buffers[self.meshKey]
+                return
+            self.vao = None
+        if self.vao is None:
+            self.shaderProg.use()
+            self.vao = VAO()
+            self.vbo = VBO()  # vbo can only be initiate with glProgram activated
+            self.ebo = EBO()
+            if self.meshKey is not None:
+                buffers[self.meshKey] = (self.vao, self.vbo, self.ebo)
+
         self.vao.bind()
         self.vbo.setBuffer(self.vertices, 11)
         self.ebo.setBuffer(self.indices)
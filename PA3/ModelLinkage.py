@@ -113,6 +113,7 @@ class Jellyfish(Component, EnvironmentObject):
             if comp.wAngle in comp.wRange:
                 self.rotation_speed[i][2] *= -1
         self.vAngle = (self.vAngle + 3) % 360
+        self.markDirty()
 
         ##### BONUS 6: Group behaviors
         # Requirements:
@@ -9,7 +9,6 @@ from Component import Component
 from GLBuffer import VAO, VBO, lineEBO
 import numpy as np
 import ColorType
-from collada import *
 
 class Tank(Component):
 